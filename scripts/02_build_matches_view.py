@@ -1,6 +1,7 @@
-import duckdb
+from football_risk_analytics.db import connect
+from football_risk_analytics.features.table_stats import parquet_stats
 
-con = duckdb.connect("lakehouse/analytics.duckdb")
+con = connect("lakehouse/analytics.duckdb", stage="matches")
 
 con.execute("""
 CREATE OR REPLACE VIEW matches AS
@@ -12,7 +13,10 @@ SELECT
 FROM read_parquet('lakehouse/bronze/matches/*/*/*.parquet')
 """)
 
-print("Matches:", con.execute("SELECT COUNT(*) FROM matches").fetchall())
-print("Date sanity:", con.execute("SELECT MIN(match_date), MAX(match_date) FROM matches").fetchall())
+# Recuento y rango de fechas desde los footers de Parquet, sin leer los datos
+stats = parquet_stats(con, "lakehouse/bronze/matches/*/*/*.parquet", "matches", columns=["match_id", "match_date"])
+match_date = stats["columns"]["match_date"]
+print("Matches:", stats["rows"])
+print("Date sanity:", (match_date["min"], match_date["max"]))
 
 con.close()
@@ -1,5 +1,8 @@
+import os
+
 from football_risk_analytics.features.acwr import build_player_acwr_true
 
 
 if __name__ == "__main__":
-    build_player_acwr_true()
+    # FRA_FEATURES_INCREMENTAL=1 recalcula solo las filas afectadas por partidos nuevos o cambiados
+    build_player_acwr_true(incremental=os.environ.get("FRA_FEATURES_INCREMENTAL", "0") == "1")
@@ -1,5 +1,8 @@
+import os
+
 from football_risk_analytics.features.dataset_final import build_player_dataset_final
 
 
 if __name__ == "__main__":
-    build_player_dataset_final()
+    # FRA_FEATURES_INCREMENTAL=1 recalcula solo las filas afectadas por partidos nuevos o cambiados
+    build_player_dataset_final(incremental=os.environ.get("FRA_FEATURES_INCREMENTAL", "0") == "1")
@@ -0,0 +1,9 @@
+import os
+
+from football_risk_analytics.modeling.backtest import run_backtest
+
+
+if __name__ == "__main__":
+    # Walk-forward semanal del modelo base; cada fold se entrena en un worker de joblib
+    # FRA_BACKTEST_JOBS: workers en paralelo (por defecto -1, todos los núcleos)
+    run_backtest(n_jobs=int(os.environ.get("FRA_BACKTEST_JOBS", "-1")))
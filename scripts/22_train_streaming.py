@@ -0,0 +1,18 @@
+import os
+
+from football_risk_analytics.modeling.train_streaming import BATCH_ROWS, train_streaming
+
+
+if __name__ == "__main__":
+    # Entrenamiento fuera de memoria: lotes Arrow desde DuckDB y partial_fit
+    # FRA_STREAMING_BATCH_ROWS: filas por lote (acota la memoria del proceso)
+    # FRA_STREAMING_EPOCHS: pasadas sobre la tabla (por defecto 5)
+    # FRA_STREAMING_PARITY=1 compara antes con el modelo base en memoria (sobre muestras acotadas)
+    # FRA_STREAMING_LEARNING_RATE / FRA_STREAMING_ETA0: paso de SGD (por defecto constant, 0.01, promediado)
+    train_streaming(
+        epochs=int(os.environ.get("FRA_STREAMING_EPOCHS", "5")),
+        batch_rows=int(os.environ.get("FRA_STREAMING_BATCH_ROWS", str(BATCH_ROWS))),
+        parity=os.environ.get("FRA_STREAMING_PARITY", "0") == "1",
+        learning_rate=os.environ.get("FRA_STREAMING_LEARNING_RATE", "constant"),
+        eta0=float(os.environ.get("FRA_STREAMING_ETA0", "0.01")),
+    )
@@ -0,0 +1,9 @@
+import os
+
+from football_risk_analytics.features.dataset_final import compare_dataset_final_modes
+
+
+if __name__ == "__main__":
+    # Hash joins frente a tablas co-ordenadas unidas por posición, sobre las fuentes de 08 escaladas
+    # FRA_BENCH_SCALE: copias de cada jugador (por defecto 10x)
+    compare_dataset_final_modes(scale=int(os.environ.get("FRA_BENCH_SCALE", "10")))
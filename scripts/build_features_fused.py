@@ -0,0 +1,14 @@
+import os
+
+from football_risk_analytics.features.fused import build_features_fused, compare_feature_modes
+
+
+if __name__ == "__main__":
+    # Sustituye a los scripts 04-09: un solo plan, solo se materializan final y predictive
+    # FRA_FUSED_DEBUG_TABLES=1 materializa también las tablas intermedias
+    # FRA_FUSED_COMPARE=1 ejecuta ambos modos e informa del tiempo y la E/S ahorrados
+    if os.environ.get("FRA_FUSED_COMPARE", "0") == "1":
+        compare_feature_modes()
+    else:
+        seconds = build_features_fused(debug_tables=os.environ.get("FRA_FUSED_DEBUG_TABLES", "0") == "1")
+        print(f"✅ Features 04-09 en {seconds:.2f}s")
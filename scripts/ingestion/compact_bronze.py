@@ -0,0 +1,15 @@
+import os
+
+from football_risk_analytics.ingestion.compaction import BRONZE_TABLES, DEFAULT_ROW_GROUP_ROWS, compact_bronze
+
+
+if __name__ == "__main__":
+    # Tras las exportaciones: un fichero por partición, ordenado por (match_id, player_id)
+    # FRA_COMPACT_TABLES=events_flat,player_match_stats limita las tablas
+    # FRA_COMPACT_FORCE=1 reescribe también las particiones ya compactadas
+    tables = os.environ.get("FRA_COMPACT_TABLES")
+    compact_bronze(
+        tables=tuple(tables.split(",")) if tables else BRONZE_TABLES,
+        row_group_size=int(os.environ.get("FRA_COMPACT_ROW_GROUP_ROWS", str(DEFAULT_ROW_GROUP_ROWS))),
+        force=os.environ.get("FRA_COMPACT_FORCE", "0") == "1",
+    )
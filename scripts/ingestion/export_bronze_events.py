@@ -0,0 +1,15 @@
+import os
+
+from football_risk_analytics.ingestion.bronze_events import export_bronze_events
+
+
+if __name__ == "__main__":
+    # Sustituye a export_events_parquet + export_events_flat + export_minutes_true_from_raw_events:
+    # cada JSON de eventos se lee y parsea una sola vez.
+    # FRA_INGEST_STREAMING=1 escribe por record batches con techo de memoria FRA_INGEST_MEMORY_MB
+    export_bronze_events(
+        data_root=os.environ.get("FRA_DATA_ROOT", "data"),
+        workers=int(os.environ.get("FRA_INGEST_WORKERS", "1")),
+        streaming=os.environ.get("FRA_INGEST_STREAMING", "0") == "1",
+        memory_limit_mb=float(os.environ.get("FRA_INGEST_MEMORY_MB", "256")),
+    )
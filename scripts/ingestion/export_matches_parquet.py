@@ -1,17 +1,20 @@
 from pathlib import Path
-import json
+import os
 import polars as pl
 
-DATA_ROOT = Path("data")
+from football_risk_analytics.ingestion.manifest import read_json
+from football_risk_analytics.ingestion.sources import open_source
+from football_risk_analytics.ingestion.writers import clear_outputs
+
+# Directorio, zip o tar (FRA_DATA_ROOT)
+DATA_ROOT = open_source(os.environ.get("FRA_DATA_ROOT", "data"))
 OUT_ROOT = Path("lakehouse/bronze/matches")
 
 OUT_ROOT.mkdir(parents=True, exist_ok=True)
+# Export completo: fuera los ficheros de ejecuciones anteriores (también los compactados)
+clear_outputs(OUT_ROOT)
 
-def read_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-competitions = read_json(DATA_ROOT / "competitions.json")
+competitions = read_json(DATA_ROOT.file("competitions.json"))
 
 total_exported = 0
 
@@ -19,7 +22,7 @@ for comp in competitions:
     competition_id = comp["competition_id"]
     season_id = comp["season_id"]
 
-    matches_path = DATA_ROOT / "matches" / str(competition_id) / f"{season_id}.json"
+    matches_path = DATA_ROOT.file(f"matches/{competition_id}/{season_id}.json")
 
     if not matches_path.exists():
         continue
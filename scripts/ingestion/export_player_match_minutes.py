@@ -1,16 +1,19 @@
 from pathlib import Path
-import json
+import os
 import polars as pl
 
-DATA_ROOT = Path("data")
+from football_risk_analytics.ingestion.manifest import read_json
+from football_risk_analytics.ingestion.sources import open_source
+from football_risk_analytics.ingestion.writers import clear_outputs
+
+# Directorio, zip o tar (FRA_DATA_ROOT)
+DATA_ROOT = open_source(os.environ.get("FRA_DATA_ROOT", "data"))
 MANIFEST_PATH = Path("lakehouse/manifests/match_manifest.parquet")
 OUT_ROOT = Path("lakehouse/bronze/player_match_minutes")
 
 OUT_ROOT.mkdir(parents=True, exist_ok=True)
-
-def read_json(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+# Export completo: fuera los ficheros de ejecuciones anteriores (también los compactados)
+clear_outputs(OUT_ROOT)
 
 df_manifest = (
     pl.read_parquet(MANIFEST_PATH)
@@ -74,7 +77,7 @@ for row in df_manifest.iter_rows(named=True):
     season_id = row["season_id"]
     match_id = row["match_id"]
 
-    path = DATA_ROOT / "lineups" / f"{match_id}.json"
+    path = DATA_ROOT.file(f"lineups/{match_id}.json")
     lineups_json = read_json(path)
 
     rows.extend(extract_minutes(lineups_json, comp_id, season_id, match_id))
@@ -0,0 +1,20 @@
+import os
+
+from football_risk_analytics.pipeline.runner import run_pipeline
+from football_risk_analytics.pipeline.stages import DATA_STAGES, PIPELINE_STAGES
+
+
+if __name__ == "__main__":
+    # Etapas como grafo de dependencias: las ramas independientes corren en paralelo
+    # FRA_PIPELINE_STAGES=all incluye entrenamiento, scoring, ranking y alertas (por defecto solo 01-09)
+    # FRA_PIPELINE_WORKERS: hilos para etapas en paralelo
+    # FRA_PIPELINE_SUBPROCESS=1 ejecuta cada etapa en su propio proceso
+    # FRA_STAGE_CACHE=0 ejecuta todas las etapas aunque no hayan cambiado
+    # FRA_PIPELINE_PROFILE=1 guarda tiempos, filas, bytes leídos, pico de RSS y el perfil de DuckDB en pipeline_runs
+    run_pipeline(
+        stages=PIPELINE_STAGES if os.environ.get("FRA_PIPELINE_STAGES", "data") == "all" else DATA_STAGES,
+        max_workers=int(os.environ.get("FRA_PIPELINE_WORKERS", "4")),
+        use_cache=os.environ.get("FRA_STAGE_CACHE", "1") == "1",
+        in_process=os.environ.get("FRA_PIPELINE_SUBPROCESS", "0") != "1",
+        profile=os.environ.get("FRA_PIPELINE_PROFILE", "0") == "1",
+    )
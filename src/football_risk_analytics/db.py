@@ -0,0 +1,240 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import tempfile
+import threading
+import time
+import duckdb
+import yaml
+
+
+CONFIG_PATH = "config/base.yaml"
+
+# Ajustes que gestiona un perfil; null en el perfil = valor por defecto de DuckDB
+SETTINGS = (
+    "threads",
+    "memory_limit",
+    "temp_directory",
+    "max_temp_directory_size",
+    "preserve_insertion_order",
+)
+
+# Conexiones raíz abiertas por shared_connection(): ruta resuelta -> conexión
+_shared = {}
+
+# Perfiles de sentencias que recoge collect_profiles(), por hilo (etapas en paralelo)
+_profiles = threading.local()
+
+
+def load_profiles(config_path: str = CONFIG_PATH) -> dict:
+    """
+    The duckdb section of the config: {"profiles": {...}, "stages": {...}}.
+    Without a config file every stage uses DuckDB's defaults.
+    """
+    path = Path(config_path)
+    if not path.exists():
+        return {"profiles": {"default": {}}, "stages": {}}
+    with path.open(encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    section = config.get("duckdb") or {}
+    return {
+        "profiles": section.get("profiles") or {"default": {}},
+        "stages": section.get("stages") or {},
+    }
+
+
+def _memory_limit(value):
+    # DuckDB no admite porcentajes: "75%" se traduce con la RAM física de la máquina
+    if not isinstance(value, str) or not value.endswith("%"):
+        return value
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+    return f"{int(total * float(value[:-1]) / 100 / 2**20)}MiB"
+
+
+def profile_settings(
+    profile: str | None = None,
+    stage: str | None = None,
+    config_path: str = CONFIG_PATH,
+) -> tuple[str, dict]:
+    """
+    (profile name, settings) for a stage: FRA_DUCKDB_PROFILE, else the
+    explicit profile, else the stage mapping in the config, else
+    "default". Profiles are applied over "default".
+    """
+    config = load_profiles(config_path)
+    name = os.environ.get("FRA_DUCKDB_PROFILE") or profile or config["stages"].get(stage) or "default"
+    if name not in config["profiles"]:
+        raise KeyError(f"Unknown DuckDB profile {name!r} in {config_path}")
+
+    settings = {key: None for key in SETTINGS}
+    settings |= config["profiles"].get("default") or {}
+    settings |= config["profiles"][name] or {}
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Profile {name!r}: unsupported settings {sorted(unknown)} (use {SETTINGS})")
+
+    settings["memory_limit"] = _memory_limit(settings["memory_limit"])
+    return name, settings
+
+
+def apply_settings(con, settings: dict) -> None:
+    for key, value in settings.items():
+        if value is None:
+            con.execute(f"RESET {key}")
+            continue
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif isinstance(value, str):
+            value = f"'{value}'"
+        con.execute(f"SET {key} = {value}")
+
+
+def effective_settings(con) -> dict:
+    """
+    Current value of the managed settings, as DuckDB reports them.
+    """
+    names = ", ".join(f"'{key}'" for key in SETTINGS)
+    return dict(con.execute(f"SELECT name, value FROM duckdb_settings() WHERE name IN ({names})").fetchall())
+
+
+def connect(
+    db_path: str = "lakehouse/analytics.duckdb",
+    stage: str | None = None,
+    profile: str | None = None,
+    read_only: bool = False,
+    config_path: str = CONFIG_PATH,
+    apply_profile: bool = True,
+):
+    """
+    DuckDB connection with the resource profile of the stage applied.
+
+    Inside shared_connection() for the same database this is a cursor of
+    the shared connection: closing it does not close the database, and
+    read_only is ignored (one process can't mix read-only and read-write
+    handles on a file). The settings are database-wide, so the last stage
+    to connect sets them for stages running concurrently.
+
+    apply_profile=False leaves the settings alone: for bookkeeping queries
+    next to running stages without changing their profile.
+    """
+    settings = profile_settings(profile, stage, config_path)[1] if apply_profile else {}
+    shared = _shared.get(str(Path(db_path).resolve()))
+    if shared is not None:
+        con = shared.cursor()
+    else:
+        con = duckdb.connect(db_path, read_only=read_only)
+    apply_settings(con, settings)
+    return con
+
+
+def arrow_reader(result, batch_rows: int = 1_000_000):
+    """
+    pyarrow RecordBatchReader over the result of con.execute().
+    """
+    # DuckDB 1.4 renombró fetch_record_batch a to_arrow_reader (y marca el anterior como obsoleto)
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(batch_rows)
+    return result.fetch_record_batch(batch_rows)
+
+
+@contextmanager
+def collect_profiles():
+    """
+    Collect, in this thread, the profile of every statement run through
+    execute_main() inside the block. Yields the list the profiles are
+    appended to. Outside the block execute_main() does not profile.
+    """
+    previous = getattr(_profiles, "records", None)
+    _profiles.records = []
+    try:
+        yield _profiles.records
+    finally:
+        _profiles.records = previous
+
+
+def _rows_out(profile: dict) -> int | None:
+    # CREATE TABLE AS / INSERT devuelven una fila con el recuento: las filas escritas son las de su hijo
+    root = (profile.get("children") or [{}])[0]
+    children = root.get("children") or []
+    if root.get("operator_type") in ("CREATE_TABLE_AS", "INSERT") and children:
+        return children[0].get("operator_cardinality")
+    return profile.get("rows_returned")
+
+
+def execute_main(con, sql: str):
+    """
+    con.execute(sql) for the main statement of a stage. Inside
+    collect_profiles() the statement runs with DuckDB's JSON profiler and
+    a record with its wall time, rows scanned and written, bytes read and
+    the full profile is collected, and the result is returned as a
+    relation over the fetched rows.
+    """
+    records = getattr(_profiles, "records", None)
+    if records is None:
+        return con.execute(sql)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "profile.json"
+        con.execute("SET enable_profiling = 'json'")
+        con.execute(f"SET profiling_output = '{output.as_posix()}'")
+        start = time.perf_counter()
+        try:
+            # materializado antes del RESET, que descartaría el resultado pendiente de un SELECT
+            result = con.from_arrow(arrow_reader(con.execute(sql)).read_all())
+            seconds = time.perf_counter() - start
+            # se lee antes del RESET: cada sentencia perfilada sobrescribe el fichero
+            profile = json.loads(output.read_text()) if output.exists() else {}
+        finally:
+            con.execute("RESET enable_profiling")
+            con.execute("RESET profiling_output")
+
+    records.append({
+        "seconds": seconds,
+        "rows_in": profile.get("cumulative_rows_scanned"),
+        "rows_out": _rows_out(profile),
+        "bytes_read": profile.get("total_bytes_read"),
+        "bytes_written": profile.get("total_bytes_written"),
+        "peak_buffer_memory": profile.get("system_peak_buffer_memory"),
+        "peak_temp_dir_size": profile.get("system_peak_temp_dir_size"),
+        "profile": profile,
+    })
+    return result
+
+
+@contextmanager
+def shared_connection(
+    db_path: str = "lakehouse/analytics.duckdb",
+    profile: str | None = None,
+    config_path: str = CONFIG_PATH,
+):
+    """
+    Keep one connection to db_path open for the block; connect() calls for
+    the same file reuse it instead of opening and closing the database
+    every stage.
+    """
+    key = str(Path(db_path).resolve())
+    if key in _shared:
+        yield _shared[key]
+        return
+
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    con = connect(db_path, profile=profile, config_path=config_path)
+    _shared[key] = con
+    try:
+        yield con
+    finally:
+        del _shared[key]
+        con.close()
+
+
+if __name__ == "__main__":
+    for stage in (None, *load_profiles()["stages"]):
+        name, settings = profile_settings(stage=stage)
+        print(f"{stage or '(other stages)'}: {name} {settings}")
+    con = connect()
+    print("Effective (default):", effective_settings(con))
+    con.close()
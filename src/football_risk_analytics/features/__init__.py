@@ -0,0 +1,3 @@
+from football_risk_analytics.features.point_in_time import FeatureIndex, as_of
+
+__all__ = ["FeatureIndex", "as_of"]
@@ -1,4 +1,171 @@
-import duckdb
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.incremental import (
+    KEYS,
+    can_merge,
+    create_changes,
+    null_safe_on,
+    replace_rows,
+    save_build_params,
+    table_columns,
+)
+from football_risk_analytics.features.match_features import SORT_ORDER
+from football_risk_analytics.features.table_stats import table_stats
+
+
+ACWR_VARIANTS = ("acwr", "acwr_uncoupled", "acwr_ewma", "acwr_seasonal")
+
+RISK_THRESHOLDS = (1.3, 1.5, 2.0)
+
+
+def flag_column(variant: str, threshold: float) -> str:
+    # acwr_ewma, 1.5 -> acwr_ewma_gt_1_5
+    return f"{variant}_gt_{threshold:g}".replace(".", "_")
+
+
+def acwr_sql(
+    source: str,
+    min_minutes_28d: int,
+    variants: bool = True,
+    min_minutes_chronic: int = 90,
+    ewma_acute_days: int = 7,
+    ewma_chronic_days: int = 28,
+    ewma_horizon_days: int = 180,
+    risk_thresholds: tuple[float, ...] = RISK_THRESHOLDS,
+) -> str:
+    """
+    SELECT source.* plus acwr (coupled). With variants=True, in the same
+    query:
+
+    - acwr_uncoupled: minutes_last_7d / ((minutes_last_28d - minutes_last_7d) / 3.0),
+      valid with min_minutes_chronic outside the acute week
+    - acwr_ewma: daily EWMA of minutes, decay 2 / (days + 1) for the acute
+      and chronic spans, over the matches of the last ewma_horizon_days
+    - acwr_seasonal: the coupled ratio with 7/28-day windows that restart
+      every season (minutes_last_7d_season, minutes_last_28d_season)
+    - {variant}_gt_{threshold}: 1 when the variant exceeds each threshold
+
+    Every variant except seasonal needs minutes_last_28d >= min_minutes_28d.
+    """
+    coupled = f"""
+        CASE
+          WHEN minutes_last_28d >= {min_minutes_28d}
+          THEN minutes_last_7d / (minutes_last_28d / 4.0)
+          ELSE NULL
+        END AS acwr"""
+    if not variants:
+        return f"""
+    SELECT
+        *,{coupled}
+    FROM {source}
+    """
+
+    decay_acute = 2.0 / (ewma_acute_days + 1)
+    decay_chronic = 2.0 / (ewma_chronic_days + 1)
+    flags = ",\n        ".join(
+        f"CASE WHEN {variant} > {threshold} THEN 1 ELSE 0 END AS {flag_column(variant, threshold)}"
+        for variant in ACWR_VARIANTS
+        for threshold in risk_thresholds
+    )
+
+    # Una sola lectura del origen: las ventanas por temporada y el historial para el EWMA
+    # salen del mismo SELECT; el resto son expresiones por fila
+    return f"""
+    WITH acwr_windows AS (
+        SELECT
+            *,
+            SUM(minutes) OVER (w_season RANGE BETWEEN INTERVAL 7 DAY PRECEDING AND CURRENT ROW) AS minutes_last_7d_season,
+            SUM(minutes) OVER (w_season RANGE BETWEEN INTERVAL 28 DAY PRECEDING AND CURRENT ROW) AS minutes_last_28d_season,
+            LIST({{'match_date': match_date, 'minutes': minutes}}) OVER (
+                w_player RANGE BETWEEN INTERVAL {ewma_horizon_days} DAY PRECEDING AND CURRENT ROW
+            ) AS _history
+        FROM {source}
+        WINDOW
+            w_player AS (PARTITION BY player_id ORDER BY match_date),
+            w_season AS (PARTITION BY player_id, season_id ORDER BY match_date)
+    ),
+    acwr_loads AS (
+        SELECT
+            * EXCLUDE (_history),
+            {decay_acute} * list_sum([
+                h.minutes * pow({1 - decay_acute}, date_diff('day', h.match_date, match_date)) for h in _history
+            ]) AS ewma_acute_load,
+            {decay_chronic} * list_sum([
+                h.minutes * pow({1 - decay_chronic}, date_diff('day', h.match_date, match_date)) for h in _history
+            ]) AS ewma_chronic_load
+        FROM acwr_windows
+    ),
+    acwr_variants AS (
+        SELECT
+            *,{coupled},
+            CASE
+              WHEN minutes_last_28d >= {min_minutes_28d}
+               AND (minutes_last_28d - minutes_last_7d) >= {min_minutes_chronic}
+              THEN minutes_last_7d / ((minutes_last_28d - minutes_last_7d) / 3.0)
+              ELSE NULL
+            END AS acwr_uncoupled,
+            CASE
+              WHEN minutes_last_28d >= {min_minutes_28d}
+              THEN ewma_acute_load / ewma_chronic_load
+              ELSE NULL
+            END AS acwr_ewma,
+            CASE
+              WHEN minutes_last_28d_season >= {min_minutes_28d}
+              THEN minutes_last_7d_season / (minutes_last_28d_season / 4.0)
+              ELSE NULL
+            END AS acwr_seasonal
+        FROM acwr_loads
+    )
+    SELECT
+        *,
+        {flags}
+    FROM acwr_variants
+    """
+
+
+def merge_acwr(
+    con,
+    source_table: str,
+    target_table: str,
+    min_minutes_28d: int,
+    variants: bool = True,
+    ewma_horizon_days: int = 180,
+    **variant_params,
+) -> int:
+    """
+    Recompute the (player_id, match_id) rows whose load features changed
+    and, with variants, the later rows of the same player whose seasonal
+    or EWMA windows reach a changed match. Returns the number of rows
+    recomputed.
+    """
+    changed = create_changes(con, "_acwr_changes", source_table, target_table, table_columns(con, source_table))
+    if changed == 0:
+        return 0
+
+    reach = max(28, ewma_horizon_days) if variants else 0
+    keys = ", ".join(KEYS)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE _acwr_keys AS
+    SELECT {keys} FROM _acwr_changes
+    UNION
+    SELECT s.player_id, s.match_id
+    FROM {source_table} s
+    JOIN _acwr_changes c
+      ON s.player_id IS NOT DISTINCT FROM c.player_id
+     AND s.match_date BETWEEN c.match_date AND c.match_date + INTERVAL {reach} DAY
+    """)
+
+    # Las ventanas son por jugador: basta con el historial completo de los jugadores afectados
+    players = f"(SELECT DISTINCT player_id FROM _acwr_keys) p ON {null_safe_on('s', 'p', ('player_id',))}"
+    src = f"(SELECT s.* FROM {source_table} s SEMI JOIN {players}) AS src"
+    acwr = acwr_sql(src, min_minutes_28d, variants, ewma_horizon_days=ewma_horizon_days, **variant_params)
+
+    return replace_rows(
+        con,
+        target_table,
+        delete_using="_acwr_keys k",
+        delete_where=null_safe_on("t", "k"),
+        insert_sql=f"SELECT a.* FROM ({acwr}) a SEMI JOIN _acwr_keys k ON {null_safe_on('a', 'k')}",
+    )
 
 
 def build_player_acwr_true(
@@ -7,6 +174,13 @@ def build_player_acwr_true(
     target_table: str = "player_acwr_true",
     min_minutes_28d: int = 180,
     risk_threshold: float = 1.5,
+    incremental: bool = False,
+    variants: bool = True,
+    min_minutes_chronic: int = 90,
+    ewma_acute_days: int = 7,
+    ewma_chronic_days: int = 28,
+    ewma_horizon_days: int = 180,
+    risk_thresholds: tuple[float, ...] = RISK_THRESHOLDS,
 ) -> None:
     """
     Build ACWR table using the 'true' load features table.
@@ -15,43 +189,59 @@ def build_player_acwr_true(
         minutes_last_7d / (minutes_last_28d / 4.0)
 
     Valid only when minutes_last_28d >= min_minutes_28d.
+
+    With variants=True the uncoupled, EWMA and seasonal ACWR and their
+    flags for every threshold in risk_thresholds are computed in the same
+    query (see acwr_sql), so label definitions can be compared without a
+    rebuild per threshold.
+
+    With incremental=True only rows whose load features changed, plus the
+    later rows their windows reach, are recomputed (merge_acwr), provided
+    the table was built with the same parameters.
     """
-    con = duckdb.connect(db_path)
+    con = connect(db_path, stage="player_acwr_true")
 
-    con.execute(f"""
-    CREATE OR REPLACE TABLE {target_table} AS
-    SELECT
-        *,
-        CASE
-          WHEN minutes_last_28d >= {min_minutes_28d}
-          THEN minutes_last_7d / (minutes_last_28d / 4.0)
-          ELSE NULL
-        END AS acwr
-    FROM {source_table}
-    """)
+    risk_thresholds = tuple(sorted({*risk_thresholds, risk_threshold}))
+    variant_params = {
+        "min_minutes_chronic": min_minutes_chronic,
+        "ewma_acute_days": ewma_acute_days,
+        "ewma_chronic_days": ewma_chronic_days,
+        "ewma_horizon_days": ewma_horizon_days,
+        "risk_thresholds": risk_thresholds,
+    }
+
+    params = {"source_table": source_table, "min_minutes_28d": min_minutes_28d}
+    if variants:
+        params |= {**variant_params, "risk_thresholds": list(risk_thresholds)}
+    if incremental and can_merge(con, target_table, params):
+        recomputed = merge_acwr(con, source_table, target_table, min_minutes_28d, variants, **variant_params)
+        print(f"Incremental: filas recalculadas: {recomputed}")
+    else:
+        execute_main(con, f"""
+        CREATE OR REPLACE TABLE {target_table} AS
+        {acwr_sql(source_table, min_minutes_28d, variants, **variant_params)}
+        ORDER BY {SORT_ORDER}
+        """)
+        recomputed = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchone()[0]
+    save_build_params(con, target_table, params, recomputed)
+
+    # Todas las comprobaciones en una sola pasada sobre la tabla, guardadas en table_stats
+    shown = ACWR_VARIANTS if variants else ("acwr",)
+    stats = table_stats(con, target_table, thresholds={variant: risk_thresholds for variant in shown})
+    acwr = stats["columns"]["acwr"]
+
+    print("Rows:", stats["rows"])
+    print("Valid share:", 1 - acwr["null_share"])
+    print("ACWR sanity:", (acwr["min"], acwr["max"], acwr["mean"]))
+    print(f"High risk share (>{risk_threshold}):", acwr["threshold_shares"][risk_threshold])
 
-    rows = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchall()
-    valid_share = con.execute(f"""
-    SELECT AVG(CASE WHEN acwr IS NOT NULL THEN 1 ELSE 0 END)
-    FROM {target_table}
-    """).fetchall()
-
-    acwr_sanity = con.execute(f"""
-    SELECT MIN(acwr), MAX(acwr), AVG(acwr)
-    FROM {target_table}
-    WHERE acwr IS NOT NULL
-    """).fetchall()
-
-    high_risk_share = con.execute(f"""
-    SELECT AVG(CASE WHEN acwr > {risk_threshold} THEN 1 ELSE 0 END)
-    FROM {target_table}
-    WHERE acwr IS NOT NULL
-    """).fetchall()
-
-    print("Rows:", rows)
-    print("Valid share:", valid_share)
-    print("ACWR sanity:", acwr_sanity)
-    print(f"High risk share (>{risk_threshold}):", high_risk_share)
+    if variants:
+        for variant in shown[1:]:
+            column = stats["columns"][variant]
+            print(f"{variant}: valid share {1 - column['null_share']} | avg {column['mean']}")
+        print("Flag share by threshold", risk_thresholds)
+        for variant in shown:
+            print(f"  {variant}:", [stats["columns"][variant]["threshold_shares"][t] for t in risk_thresholds])
 
     con.close()
 
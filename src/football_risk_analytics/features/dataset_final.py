@@ -1,28 +1,34 @@
-import duckdb
+import os
+import subprocess
+import sys
+import time
 
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.incremental import (
+    KEYS,
+    can_merge,
+    create_changes,
+    null_safe_on,
+    replace_rows,
+    save_build_params,
+)
+from football_risk_analytics.features.match_features import SORT_ORDER
+from football_risk_analytics.features.table_stats import table_stats
 
-def build_player_dataset_final(
-    db_path: str = "lakehouse/analytics.duckdb",
-    source_match_features: str = "player_match_features_true_time",
-    source_form_features: str = "player_form_features",
-    source_load_features: str = "player_load_features_true",
-    source_acwr: str = "player_acwr_true",
-    target_table: str = "player_dataset_final",
-    risk_threshold: float = 1.5,
-) -> None:
-    """
-    Build final modeling dataset by joining:
-    - match-level player features
-    - rolling form features
-    - rolling load features
-    - ACWR features
 
-    The target label 'high_risk' is defined from ACWR threshold.
-    """
-    con = duckdb.connect(db_path)
+# Columnas que dataset_final toma de cada tabla de origen
+MATCH_FEATURE_COLUMNS = [
+    "player_id", "competition_id", "season_id", "match_id", "match_date", "team",
+    "minutes", "shots_per90", "xg_per90", "passes_per90", "carries_per90", "progressive_x_per90",
+]
+FORM_COLUMNS = ["xg_last_5", "shots_last_5", "progressive_last_5", "trend_xg_3v3"]
+LOAD_COLUMNS = ["minutes_last_7d", "minutes_last_14d", "minutes_last_28d", "minutes_last_5_matches"]
+ACWR_COLUMNS = ["acwr"]
 
-    con.execute(f"""
-    CREATE OR REPLACE TABLE {target_table} AS
+
+def _final_select(risk_threshold: float) -> str:
+    # alias: f = match features, pf = forma, pl = carga, pa = ACWR
+    return f"""
     SELECT
         f.player_id,
         f.competition_id,
@@ -59,7 +65,18 @@ def build_player_dataset_final(
             WHEN pa.acwr > {risk_threshold} THEN 1
             ELSE 0
         END AS high_risk
+    """
 
+
+def dataset_final_sql(
+    source_match_features: str,
+    source_form_features: str,
+    source_load_features: str,
+    source_acwr: str,
+    risk_threshold: float,
+) -> str:
+    return f"""
+    {_final_select(risk_threshold)}
     FROM {source_match_features} f
     LEFT JOIN {source_form_features} pf
       ON f.player_id = pf.player_id
@@ -70,26 +87,281 @@ def build_player_dataset_final(
     LEFT JOIN {source_acwr} pa
       ON f.player_id = pa.player_id
      AND f.match_id = pa.match_id
+    """
+
+
+def dataset_final_wide_sql(
+    source_match_features: str,
+    source_form_features: str,
+    source_load_features: str,
+    source_acwr: str,
+    risk_threshold: float,
+) -> str:
+    """
+    dataset_final_sql for co-sorted sources: the form, load and ACWR
+    columns are appended to the match features by row position (POSITIONAL
+    JOIN), so no hash table is built and the output keeps the sources'
+    (player_id, match_date, match_id) order. Only valid when co_sorted().
+    """
+    return f"""
+    {_final_select(risk_threshold)}
+    FROM {source_match_features} f
+    POSITIONAL JOIN {source_form_features} pf
+    POSITIONAL JOIN {source_load_features} pl
+    POSITIONAL JOIN {source_acwr} pa
+    """
+
+
+def co_sorted(
+    con,
+    source_match_features: str,
+    source_form_features: str,
+    source_load_features: str,
+    source_acwr: str,
+) -> bool:
+    """
+    True when the four tables hold the same (player_id, match_id) at every
+    row position and no player_id is NULL, i.e. the LEFT JOINs of
+    dataset_final_sql would pair exactly the rows at the same position,
+    since keys are unique. Full builds write them in SORT_ORDER; an
+    incremental merge appends rows and breaks it. Reads only the key
+    columns.
+    """
+    sources = (source_form_features, source_load_features, source_acwr)
+    keys = ", ".join(KEYS)
+    aligned = " AND ".join(f"f.{k} = s{i}.{k}" for i in range(len(sources)) for k in KEYS)
+    joins = "\n    ".join(f"POSITIONAL JOIN (SELECT {keys} FROM {source}) s{i}" for i, source in enumerate(sources))
+    return con.execute(f"""
+    SELECT COALESCE(bool_and(COALESCE({aligned}, false)), true)
+    FROM (SELECT {keys} FROM {source_match_features}) f
+    {joins}
+    """).fetchone()[0]
+
+
+def merge_dataset_final(
+    con,
+    source_match_features: str,
+    source_form_features: str,
+    source_load_features: str,
+    source_acwr: str,
+    target_table: str,
+    risk_threshold: float,
+) -> int:
+    """
+    Re-join only the (player_id, match_id) rows where any of the four
+    sources differs from what target_table holds, and merge them in.
+    Returns the number of rows recomputed.
+
+    Form, load and ACWR tables derive row for row from the match features,
+    so every row with a player_id has a match in each of them.
+    """
+    keys = ", ".join(KEYS)
+    changed = create_changes(con, "_final_changes_f", source_match_features, target_table, MATCH_FEATURE_COLUMNS)
+    for name, source, columns in (
+        ("_final_changes_pf", source_form_features, FORM_COLUMNS),
+        ("_final_changes_pl", source_load_features, LOAD_COLUMNS),
+        ("_final_changes_pa", source_acwr, ACWR_COLUMNS),
+    ):
+        # las filas sin player_id no cruzan en el LEFT JOIN: solo dependen de f
+        changed += create_changes(con, name, source, target_table, list(KEYS) + columns, where="player_id IS NOT NULL")
+    if changed == 0:
+        return 0
+
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE _final_keys AS
+    SELECT {keys} FROM _final_changes_f
+    UNION
+    SELECT {keys} FROM _final_changes_pf
+    UNION
+    SELECT {keys} FROM _final_changes_pl
+    UNION
+    SELECT {keys} FROM _final_changes_pa
+    """)
+
+    return replace_rows(
+        con,
+        target_table,
+        delete_using="_final_keys k",
+        delete_where=null_safe_on("t", "k"),
+        insert_sql=dataset_final_sql(
+            f"(SELECT s.* FROM {source_match_features} s SEMI JOIN _final_keys k ON {null_safe_on('s', 'k')})",
+            source_form_features,
+            source_load_features,
+            source_acwr,
+            risk_threshold,
+        ),
+    )
+
+
+def build_player_dataset_final(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_match_features: str = "player_match_features_true_time",
+    source_form_features: str = "player_form_features",
+    source_load_features: str = "player_load_features_true",
+    source_acwr: str = "player_acwr_true",
+    target_table: str = "player_dataset_final",
+    risk_threshold: float = 1.5,
+    incremental: bool = False,
+) -> None:
+    """
+    Build final modeling dataset by joining:
+    - match-level player features
+    - rolling form features
+    - rolling load features
+    - ACWR features
+
+    The target label 'high_risk' is defined from ACWR threshold.
+
+    The four sources derive row for row from the match features and full
+    builds write them in SORT_ORDER, so the columns are appended by
+    position (dataset_final_wide_sql) instead of hash-joined; if they are
+    not co-sorted the joins of dataset_final_sql are used.
+
+    With incremental=True only rows whose inputs changed are re-joined
+    (merge_dataset_final), provided the table was built with the same
+    risk_threshold.
+    """
+    con = connect(db_path, stage="player_dataset_final")
+
+    sources = (source_match_features, source_form_features, source_load_features, source_acwr)
+    params = {"sources": list(sources), "risk_threshold": risk_threshold}
+    if incremental and can_merge(con, target_table, params):
+        recomputed = merge_dataset_final(con, *sources, target_table, risk_threshold)
+        print(f"Incremental: filas recalculadas: {recomputed}")
+    else:
+        # fuentes en el mismo orden: se añaden columnas por posición en lugar de tres hash joins
+        wide = co_sorted(con, *sources)
+        if not wide:
+            print("⚠️ Sources are not co-sorted (e.g. after an incremental merge): building with joins")
+        final_sql = dataset_final_wide_sql if wide else dataset_final_sql
+        execute_main(con, f"""
+        CREATE OR REPLACE TABLE {target_table} AS
+        {final_sql(*sources, risk_threshold)}
+        """)
+        recomputed = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchone()[0]
+    save_build_params(con, target_table, params, recomputed)
+
+    stats = table_stats(con, target_table)
+
+    print("Rows:", stats["rows"])
+    print("Risk share:", stats["columns"]["high_risk"]["mean"])
+    print("Null ACWR share:", stats["columns"]["acwr"]["null_share"])
+
+    con.close()
+
+
+def scale_sources(con, sources: tuple[str, ...], scale: int, prefix: str = "_bench") -> tuple[str, ...]:
+    """
+    Copies of the sources with every row repeated scale times as new
+    players (player_id offset per copy), written in SORT_ORDER.
+    """
+    span = con.execute(f"SELECT COALESCE(MAX(player_id), 0) + 1 FROM {sources[0]}").fetchone()[0]
+    scaled = []
+    for source in sources:
+        name = f"{prefix}_{source}"
+        con.execute(f"""
+        CREATE OR REPLACE TABLE {name} AS
+        SELECT * REPLACE (player_id + copy * {span} AS player_id)
+        FROM {source}, range({scale}) AS copies(copy)
+        ORDER BY {SORT_ORDER}
+        """)
+        scaled.append(name)
+    return tuple(scaled)
+
+
+def _build_in_child(db_path: str, mode: str, sources: tuple[str, ...], risk_threshold: float) -> tuple[float, int | None]:
+    # Proceso nuevo por build: el pico de RSS (os.wait4) es solo de ese build; sin wait4 (Windows), None
+    code = (
+        "from football_risk_analytics.features.dataset_final import _timed_build; "
+        f"_timed_build({db_path!r}, {mode!r}, {sources!r}, {risk_threshold!r})"
+    )
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    output = proc.stdout.read()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # Linux da KiB; macOS, bytes
+        peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        proc.wait()
+        peak_rss = None
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+    return float(output.strip().splitlines()[-1]), peak_rss
+
+
+def _timed_build(db_path: str, mode: str, sources: tuple[str, ...], risk_threshold: float) -> None:
+    final_sql = dataset_final_wide_sql if mode == "wide" else dataset_final_sql
+    con = connect(db_path, stage="player_dataset_final")
+    start = time.perf_counter()
+    con.execute(f"""
+    CREATE OR REPLACE TABLE _bench_final_{mode} AS
+    {final_sql(*sources, risk_threshold)}
     """)
+    print(time.perf_counter() - start)
+    con.close()
 
-    rows = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchall()
 
-    risk_share = con.execute(f"""
-    SELECT AVG(high_risk)
-    FROM {target_table}
-    """).fetchall()
+def compare_dataset_final_modes(
+    db_path: str = "lakehouse/analytics.duckdb",
+    scale: int = 10,
+    risk_threshold: float = 1.5,
+    repeats: int = 3,
+) -> dict:
+    """
+    Benchmark building player_dataset_final with the three hash joins
+    (dataset_final_sql) against the co-sorted positional build
+    (dataset_final_wide_sql) on the sources scaled scale times
+    (scale_sources).
 
-    null_acwr_share = con.execute(f"""
-    SELECT AVG(CASE WHEN acwr IS NULL THEN 1 ELSE 0 END)
-    FROM {target_table}
-    """).fetchall()
+    Each build runs repeats times in its own process; the report holds
+    the best wall-clock of the CREATE TABLE and the highest peak RSS of
+    each mode, and checks that both modes give the same rows. The scaled
+    tables are dropped at the end.
+    """
+    con = connect(db_path, stage="player_dataset_final")
+    sources = scale_sources(
+        con,
+        ("player_match_features_true_time", "player_form_features", "player_load_features_true", "player_acwr_true"),
+        scale,
+    )
+    rows = con.execute(f"SELECT COUNT(*) FROM {sources[0]}").fetchone()[0]
+    # los builds abren la base en otro proceso
+    con.close()
 
-    print("Rows:", rows)
-    print("Risk share:", risk_share)
-    print("Null ACWR share:", null_acwr_share)
+    results = {}
+    for mode in ("join", "wide"):
+        runs = [_build_in_child(db_path, mode, sources, risk_threshold) for _ in range(repeats)]
+        peaks = [peak for _, peak in runs if peak is not None]
+        results[mode] = (min(seconds for seconds, _ in runs), max(peaks) if peaks else None)
 
+    con = connect(db_path, stage="player_dataset_final")
+    same = con.execute("""
+    SELECT (SELECT COUNT(*) FROM (SELECT * FROM _bench_final_join EXCEPT ALL SELECT * FROM _bench_final_wide))
+         + (SELECT COUNT(*) FROM (SELECT * FROM _bench_final_wide EXCEPT ALL SELECT * FROM _bench_final_join)) = 0
+    """).fetchone()[0]
+    for table in (*sources, "_bench_final_join", "_bench_final_wide"):
+        con.execute(f"DROP TABLE IF EXISTS {table}")
     con.close()
 
+    report = {
+        "scale": scale,
+        "rows": rows,
+        "join_seconds": results["join"][0],
+        "wide_seconds": results["wide"][0],
+        "join_peak_rss": results["join"][1],
+        "wide_peak_rss": results["wide"][1],
+        "same_rows": same,
+    }
+
+    print(f"=== dataset_final: hash joins vs co-sorted wide ({scale}x, {rows} rows) ===")
+    print(f"Build wall-clock (best of {repeats}): join {report['join_seconds']:.3f}s | wide {report['wide_seconds']:.3f}s")
+    if report["join_peak_rss"] is not None and report["wide_peak_rss"] is not None:
+        print(f"Peak RSS: join {report['join_peak_rss'] / 2**20:.0f} MiB | wide {report['wide_peak_rss'] / 2**20:.0f} MiB")
+    print("Same rows:", same)
+
+    return report
+
 
 if __name__ == "__main__":
     build_player_dataset_final()
@@ -1,4 +1,25 @@
-import duckdb
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.table_stats import table_stats
+
+
+def dataset_predictive_sql(source: str) -> str:
+    return f"""
+    WITH base AS (
+        SELECT
+            *,
+            LEAD(high_risk) OVER next_match AS high_risk_next,
+            -- fecha del partido del que sale la etiqueta: el backtest purga con ella
+            LEAD(match_date) OVER next_match AS next_match_date
+        FROM {source}
+        WINDOW next_match AS (
+            PARTITION BY player_id, season_id
+            ORDER BY match_date
+        )
+    )
+    SELECT *
+    FROM base
+    WHERE high_risk_next IS NOT NULL
+    """
 
 
 def build_player_dataset_predictive(
@@ -12,34 +33,21 @@ def build_player_dataset_predictive(
 
     Target:
         high_risk_next = LEAD(high_risk) over (player_id, season_id, match_date)
+
+    next_match_date is the date of that next match, i.e. when the target
+    becomes known.
     """
-    con = duckdb.connect(db_path)
+    con = connect(db_path, stage="player_dataset_predictive")
 
-    con.execute(f"""
+    execute_main(con, f"""
     CREATE OR REPLACE TABLE {target_table} AS
-    WITH base AS (
-        SELECT
-            *,
-            LEAD(high_risk) OVER (
-                PARTITION BY player_id, season_id
-                ORDER BY match_date
-            ) AS high_risk_next
-        FROM {source_table}
-    )
-    SELECT *
-    FROM base
-    WHERE high_risk_next IS NOT NULL
+    {dataset_predictive_sql(source_table)}
     """)
 
-    rows = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchall()
-
-    risk_next_share = con.execute(f"""
-    SELECT AVG(high_risk_next)
-    FROM {target_table}
-    """).fetchall()
+    stats = table_stats(con, target_table)
 
-    print("Rows:", rows)
-    print("Risk next share:", risk_next_share)
+    print("Rows:", stats["rows"])
+    print("Risk next share:", stats["columns"]["high_risk_next"]["mean"])
 
     con.close()
 
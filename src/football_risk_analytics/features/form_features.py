@@ -0,0 +1,48 @@
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.match_features import SORT_ORDER
+from football_risk_analytics.features.rolling_spec import CONFIG_PATH, compile_rolling_sql, load_rolling_spec
+from football_risk_analytics.features.table_stats import table_stats
+
+
+FORM_SPEC = "player_form_features"
+
+
+def form_features_sql(source: str, config_path: str = CONFIG_PATH) -> str:
+    return compile_rolling_sql(load_rolling_spec(FORM_SPEC, config_path), source)
+
+
+def build_player_form_features(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_match_features_true_time",
+    target_table: str = "player_form_features",
+    config_path: str = CONFIG_PATH,
+) -> None:
+    """
+    Build short-term form features over each player's last matches within
+    a season.
+
+    Features:
+    - xg_last_5, shots_last_5, progressive_last_5
+    - trend_xg_3v3 (xg of the last 3 matches minus the 3 before)
+
+    The windows are declared in the rolling_features spec of
+    config_path and compiled by rolling_spec.
+    """
+    con = connect(db_path, stage="player_form_features")
+
+    execute_main(con, f"""
+    CREATE OR REPLACE TABLE {target_table} AS
+    {form_features_sql(source_table, config_path)}
+    ORDER BY {SORT_ORDER}
+    """)
+
+    stats = table_stats(con, target_table)
+
+    print("Rows:", stats["rows"])
+    print("Sanity (xg_last_5 max):", stats["columns"]["xg_last_5"]["max"])
+
+    con.close()
+
+
+if __name__ == "__main__":
+    build_player_form_features()
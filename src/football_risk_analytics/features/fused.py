@@ -0,0 +1,205 @@
+from pathlib import Path
+import time
+
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.acwr import acwr_sql, build_player_acwr_true
+from football_risk_analytics.features.dataset_final import build_player_dataset_final, dataset_final_sql
+from football_risk_analytics.features.dataset_predictive import build_player_dataset_predictive, dataset_predictive_sql
+from football_risk_analytics.features.form_features import build_player_form_features, form_features_sql
+from football_risk_analytics.features.incremental import save_build_params, table_exists
+from football_risk_analytics.features.load_features import build_player_load_features_true, load_features_sql
+from football_risk_analytics.features.match_features import (
+    build_player_match_features_true_time,
+    create_minutes_true_view,
+    match_features_sql,
+)
+from football_risk_analytics.features.rolling_spec import CONFIG_PATH
+
+
+# Tablas intermedias de las etapas 04-07: en modo fusionado no se materializan
+INTERMEDIATE_TABLES = (
+    "player_match_features_true_time",
+    "player_form_features",
+    "player_load_features_true",
+    "player_acwr_true",
+)
+
+
+def fused_dataset_final_sql(
+    min_minutes_28d: int = 180,
+    risk_threshold: float = 1.5,
+    config_path: str = CONFIG_PATH,
+) -> str:
+    """
+    Stages 04-08 as one query: every intermediate table becomes a CTE over
+    the same sources, so DuckDB plans the whole chain at once and nothing
+    is written and read back between stages.
+    """
+    # dataset_final solo usa acwr: las variantes de ACWR quedan para player_acwr_true
+    return f"""
+    WITH
+    stage_match_features AS MATERIALIZED ({match_features_sql()}),
+    stage_form_features AS ({form_features_sql("stage_match_features", config_path)}),
+    stage_load_features AS ({load_features_sql("stage_match_features", config_path)}),
+    stage_acwr AS ({acwr_sql("stage_load_features", min_minutes_28d, variants=False)})
+    {dataset_final_sql(
+        "stage_match_features",
+        "stage_form_features",
+        "stage_load_features",
+        "stage_acwr",
+        risk_threshold,
+    )}
+    """
+
+
+def _process_io() -> tuple[int, int] | None:
+    # (bytes leídos, bytes escritos) por este proceso; solo en Linux
+    path = Path("/proc/self/io")
+    if not path.exists():
+        return None
+    counters = dict(line.split(": ") for line in path.read_text().splitlines())
+    return int(counters["rchar"]), int(counters["wchar"])
+
+
+def _io_delta(before, after) -> tuple[int, int] | None:
+    if before is None or after is None:
+        return None
+    return after[0] - before[0], after[1] - before[1]
+
+
+def build_features_staged(
+    db_path: str = "lakehouse/analytics.duckdb",
+    min_minutes_28d: int = 180,
+    risk_threshold: float = 1.5,
+    minutes_path: str = "lakehouse/bronze/player_match_minutes_true",
+    config_path: str = CONFIG_PATH,
+) -> None:
+    """
+    Stages 04-09 one after another, each materializing its table.
+    """
+    build_player_match_features_true_time(db_path, minutes_path)
+    build_player_form_features(db_path, config_path=config_path)
+    build_player_load_features_true(db_path, config_path=config_path)
+    build_player_acwr_true(db_path, min_minutes_28d=min_minutes_28d, risk_threshold=risk_threshold)
+    build_player_dataset_final(db_path, risk_threshold=risk_threshold)
+    build_player_dataset_predictive(db_path)
+
+
+def build_features_fused(
+    db_path: str = "lakehouse/analytics.duckdb",
+    min_minutes_28d: int = 180,
+    risk_threshold: float = 1.5,
+    minutes_path: str = "lakehouse/bronze/player_match_minutes_true",
+    debug_tables: bool = False,
+    config_path: str = CONFIG_PATH,
+) -> float:
+    """
+    Build player_dataset_final and player_dataset_predictive from the
+    stage 03 inputs in one connection, with stages 04-08 fused into a
+    single query plan (fused_dataset_final_sql).
+
+    The intermediate tables (INTERMEDIATE_TABLES) are not written. With
+    debug_tables=True they are materialized as in the staged build and
+    the final tables are built from them, for inspection.
+
+    Returns the wall-clock seconds.
+    """
+    start = time.perf_counter()
+
+    if debug_tables:
+        build_features_staged(db_path, min_minutes_28d, risk_threshold, minutes_path, config_path)
+        return time.perf_counter() - start
+
+    con = connect(db_path, stage="fused")
+    create_minutes_true_view(con, minutes_path)
+
+    execute_main(con, f"""
+    CREATE OR REPLACE TABLE player_dataset_final AS
+    {fused_dataset_final_sql(min_minutes_28d, risk_threshold, config_path)}
+    """)
+    # mismos parámetros que el modo por etapas: un incremental posterior sigue siendo válido
+    save_build_params(
+        con,
+        "player_dataset_final",
+        {"sources": list(INTERMEDIATE_TABLES), "risk_threshold": risk_threshold},
+        con.execute("SELECT COUNT(*) FROM player_dataset_final").fetchone()[0],
+    )
+
+    execute_main(con, f"""
+    CREATE OR REPLACE TABLE player_dataset_predictive AS
+    {dataset_predictive_sql("player_dataset_final")}
+    """)
+
+    print("Rows (final):", con.execute("SELECT COUNT(*) FROM player_dataset_final").fetchall())
+    print("Rows (predictive):", con.execute("SELECT COUNT(*) FROM player_dataset_predictive").fetchall())
+
+    stale = [t for t in INTERMEDIATE_TABLES if table_exists(con, t)]
+    if stale:
+        print(f"⚠️ Intermediate tables left by a staged build, not rebuilt here: {stale}")
+
+    con.close()
+    return time.perf_counter() - start
+
+
+def compare_feature_modes(
+    db_path: str = "lakehouse/analytics.duckdb",
+    min_minutes_28d: int = 180,
+    risk_threshold: float = 1.5,
+    minutes_path: str = "lakehouse/bronze/player_match_minutes_true",
+    config_path: str = CONFIG_PATH,
+) -> dict:
+    """
+    Run the staged build and then the fused build on db_path and report
+    the wall-clock and I/O saved by fusing.
+
+    I/O is the bytes read and written by this process (Linux only) plus
+    the rows and storage blocks of the intermediate tables that the staged
+    build writes and reads back. The intermediate tables are left in
+    place as debug outputs.
+    """
+    io_start = _process_io()
+    start = time.perf_counter()
+    build_features_staged(db_path, min_minutes_28d, risk_threshold, minutes_path, config_path)
+    staged_seconds = time.perf_counter() - start
+    staged_io = _io_delta(io_start, _process_io())
+
+    io_start = _process_io()
+    fused_seconds = build_features_fused(
+        db_path, min_minutes_28d, risk_threshold, minutes_path, config_path=config_path
+    )
+    fused_io = _io_delta(io_start, _process_io())
+
+    con = connect(db_path, stage="fused", read_only=True)
+    block_size = con.execute("SELECT block_size FROM pragma_database_size()").fetchone()[0]
+    intermediate_rows = 0
+    intermediate_bytes = 0
+    for table in INTERMEDIATE_TABLES:
+        intermediate_rows += con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        blocks = con.execute(f"""
+        SELECT COUNT(DISTINCT block_id) FROM pragma_storage_info('{table}') WHERE persistent
+        """).fetchone()[0]
+        intermediate_bytes += blocks * block_size
+    con.close()
+
+    report = {
+        "staged_seconds": staged_seconds,
+        "fused_seconds": fused_seconds,
+        "seconds_saved": staged_seconds - fused_seconds,
+        "intermediate_tables": len(INTERMEDIATE_TABLES),
+        "intermediate_rows": intermediate_rows,
+        "intermediate_bytes": intermediate_bytes,
+        "staged_io_bytes": staged_io,
+        "fused_io_bytes": fused_io,
+    }
+
+    print("=== Staged vs fused (stages 04-09) ===")
+    print(f"Wall-clock: staged {staged_seconds:.2f}s | fused {fused_seconds:.2f}s | saved {report['seconds_saved']:.2f}s")
+    print(f"Intermediate tables not materialized: {len(INTERMEDIATE_TABLES)} | rows: {intermediate_rows} | ~{intermediate_bytes / 1e6:.1f} MB written and re-read")
+    if staged_io is not None and fused_io is not None:
+        print(f"Process I/O (read / written): staged {staged_io[0] / 1e6:.1f} / {staged_io[1] / 1e6:.1f} MB | fused {fused_io[0] / 1e6:.1f} / {fused_io[1] / 1e6:.1f} MB")
+
+    return report
+
+
+if __name__ == "__main__":
+    build_features_fused()
@@ -0,0 +1,112 @@
+import json
+
+from football_risk_analytics.db import execute_main
+
+
+# Parámetros con los que se construyó cada tabla de features (ver can_merge)
+BUILDS_TABLE = "feature_builds"
+
+KEYS = ("player_id", "match_id")
+
+
+def null_safe_on(left: str, right: str, keys: tuple[str, ...] = KEYS) -> str:
+    # player_id puede ser NULL: = no empareja esas filas
+    return " AND ".join(f"{left}.{k} IS NOT DISTINCT FROM {right}.{k}" for k in keys)
+
+
+def table_exists(con, table: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table]
+    ).fetchone()[0] > 0
+
+
+def table_columns(con, table: str) -> list[str]:
+    return [row[0] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+
+
+def table_fingerprint(con, table: str) -> list | None:
+    """
+    Columns, row count and an order-independent sum of row hashes: one scan.
+    """
+    if not table_exists(con, table):
+        return None
+    columns = con.execute(f"DESCRIBE {table}").fetchall()
+    rows, checksum = con.execute(f"SELECT COUNT(*), SUM(hash(t)::HUGEINT) FROM {table} t").fetchone()
+    return [[(c[0], c[1]) for c in columns], rows, str(checksum)]
+
+
+def load_build_params(con, target_table: str) -> dict | None:
+    if not table_exists(con, BUILDS_TABLE):
+        return None
+    row = con.execute(f"SELECT params FROM {BUILDS_TABLE} WHERE target_table = ?", [target_table]).fetchone()
+    return None if row is None else json.loads(row[0])
+
+
+def save_build_params(con, target_table: str, params: dict, rows_recomputed: int) -> None:
+    """
+    Record the parameters a feature table was built with, so the next
+    incremental run can tell whether merging into it is valid.
+    """
+    con.execute(f"""
+    CREATE TABLE IF NOT EXISTS {BUILDS_TABLE} (
+        target_table VARCHAR PRIMARY KEY,
+        params VARCHAR,
+        rows_recomputed BIGINT,
+        updated_at TIMESTAMP
+    )
+    """)
+    con.execute(
+        f"INSERT OR REPLACE INTO {BUILDS_TABLE} VALUES (?, ?, ?, now())",
+        [target_table, json.dumps(params, sort_keys=True), rows_recomputed],
+    )
+
+
+def can_merge(con, target_table: str, params: dict) -> bool:
+    """
+    An incremental merge is only valid into an existing table built with
+    the same parameters; anything else needs a full rebuild.
+    """
+    built_with = load_build_params(con, target_table)
+    return (
+        table_exists(con, target_table)
+        and built_with is not None
+        and built_with == json.loads(json.dumps(params, sort_keys=True))
+    )
+
+
+def create_changes(con, name: str, source: str, target: str, columns: list[str], where: str = "TRUE") -> int:
+    """
+    Create temp table name with the rows (restricted to columns) that differ
+    between source and the copy of them kept in target: new or modified
+    source rows, plus the target rows they replace or that were removed.
+    Returns the number of changed rows.
+
+    Detection is a full diff: both tables are scanned (within where) and
+    compared row by row, so corrections to old matches are found too. Only
+    the recomputation that follows is limited to the affected rows.
+    """
+    cols = ", ".join(columns)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE {name} AS
+    (SELECT {cols} FROM {source} WHERE {where} EXCEPT ALL SELECT {cols} FROM {target} WHERE {where})
+    UNION ALL
+    (SELECT {cols} FROM {target} WHERE {where} EXCEPT ALL SELECT {cols} FROM {source} WHERE {where})
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+
+def replace_rows(con, target: str, delete_using: str, delete_where: str, insert_sql: str) -> int:
+    """
+    Merge recomputed rows into target in one transaction: delete the rows
+    matched by delete_using / delete_where, then insert insert_sql.
+    Returns the number of rows inserted.
+    """
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute(f"DELETE FROM {target} t USING {delete_using} WHERE {delete_where}")
+        inserted = execute_main(con, f"INSERT INTO {target} {insert_sql}").fetchone()[0]
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return inserted
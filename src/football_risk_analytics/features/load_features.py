@@ -1,10 +1,130 @@
-import duckdb
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.incremental import (
+    can_merge,
+    create_changes,
+    null_safe_on,
+    replace_rows,
+    save_build_params,
+)
+from football_risk_analytics.features.match_features import SORT_ORDER
+from football_risk_analytics.features.rolling_spec import (
+    CONFIG_PATH,
+    compile_rolling_sql,
+    load_rolling_spec,
+    window_groups,
+    window_reach,
+)
+from football_risk_analytics.features.table_stats import table_stats
+
+
+LOAD_SPEC = "player_load_features_true"
+
+
+def load_features_sql(source: str, config_path: str = CONFIG_PATH) -> str:
+    return compile_rolling_sql(load_rolling_spec(LOAD_SPEC, config_path), source)
+
+
+def merge_load_features(
+    con, source_table: str, target_table: str, config_path: str = CONFIG_PATH
+) -> tuple[int, int]:
+    """
+    Recompute only the rows of target_table affected by changes in
+    source_table and merge them in. Returns (players, rows recomputed).
+
+    Each player with new, modified or removed matches gets a watermark: the
+    earliest changed match_date. From there, rows are affected up to the
+    longest window of the spec (28 days or 5 matches by default) after the
+    latest change, whichever reaches further. Those rows are recomputed
+    from the history their windows need, deleted from the target and
+    inserted again.
+    """
+    spec = load_rolling_spec(LOAD_SPEC, config_path)
+    reach_days, reach_rows = window_reach(spec)
+
+    changed = create_changes(con, "_load_changes", source_table, target_table, spec["columns"])
+    if changed == 0:
+        return 0, 0
+
+    con.execute("""
+    CREATE OR REPLACE TEMP TABLE _load_watermarks AS
+    SELECT player_id, MIN(match_date) AS since, MAX(match_date) AS last_change
+    FROM _load_changes
+    GROUP BY player_id
+    """)
+
+    # Posición de cada partido en el historial del jugador (solo jugadores afectados)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE _load_ranked AS
+    SELECT
+        s.player_id,
+        s.match_date,
+        ROW_NUMBER() OVER (PARTITION BY s.player_id ORDER BY s.match_date, s.match_id) AS rn
+    FROM {source_table} s
+    JOIN _load_watermarks w ON {null_safe_on("s", "w", ("player_id",))}
+    """)
+
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE _load_windows AS
+    WITH bounds AS (
+        SELECT
+            w.player_id,
+            w.since,
+            w.last_change,
+            COALESCE(MAX(r.rn) FILTER (WHERE r.match_date <= w.last_change), 0) AS last_rn,
+            MIN(r.rn) FILTER (WHERE r.match_date >= w.since) AS first_rn
+        FROM _load_watermarks w
+        LEFT JOIN _load_ranked r ON {null_safe_on("r", "w", ("player_id",))}
+        GROUP BY w.player_id, w.since, w.last_change
+    )
+    SELECT
+        b.player_id,
+        b.since,
+        -- filas afectadas: hasta la ventana más larga después del último cambio
+        GREATEST(
+            CAST(b.last_change + INTERVAL {reach_days} DAY AS DATE),
+            MAX(r.match_date) FILTER (WHERE r.rn <= b.last_rn + {reach_rows})
+        ) AS until,
+        -- historial necesario para recalcularlas: la misma ventana hacia atrás
+        LEAST(
+            CAST(b.since - INTERVAL {reach_days} DAY AS DATE),
+            MIN(r.match_date) FILTER (WHERE r.rn >= b.first_rn - {reach_rows})
+        ) AS context_from
+    FROM bounds b
+    LEFT JOIN _load_ranked r ON {null_safe_on("r", "b", ("player_id",))}
+    GROUP BY b.player_id, b.since, b.last_change, b.last_rn, b.first_rn
+    """)
+
+    context = f"""(
+        SELECT s.*
+        FROM {source_table} s
+        JOIN _load_windows w
+          ON {null_safe_on("s", "w", ("player_id",))}
+         AND s.match_date >= w.context_from
+    ) AS src"""
+
+    inserted = replace_rows(
+        con,
+        target_table,
+        delete_using="_load_windows w",
+        delete_where=f"{null_safe_on('t', 'w', ('player_id',))} AND t.match_date BETWEEN w.since AND w.until",
+        insert_sql=f"""
+        SELECT x.*
+        FROM ({compile_rolling_sql(spec, context)}) x
+        JOIN _load_windows w
+          ON {null_safe_on("x", "w", ("player_id",))}
+         AND x.match_date BETWEEN w.since AND w.until
+        """,
+    )
+    players = con.execute("SELECT COUNT(*) FROM _load_watermarks").fetchone()[0]
+    return players, inserted
 
 
 def build_player_load_features_true(
     db_path: str = "lakehouse/analytics.duckdb",
     source_table: str = "player_match_features_true_time",
     target_table: str = "player_load_features_true",
+    incremental: bool = False,
+    config_path: str = CONFIG_PATH,
 ) -> None:
     """
     Build rolling workload features using true match-minute data.
@@ -14,59 +134,40 @@ def build_player_load_features_true(
     - minutes_last_14d
     - minutes_last_28d
     - minutes_last_5_matches
+
+    The windows are declared in the rolling_features spec of
+    config_path and compiled by rolling_spec.
+
+    With incremental=True an existing table is updated in place with
+    merge_load_features instead of being rebuilt; a missing table is built
+    in full.
     """
-    con = duckdb.connect(db_path)
+    con = connect(db_path, stage="player_load_features_true")
 
-    con.execute(f"""
-    CREATE OR REPLACE TABLE {target_table} AS
-    SELECT
-        player_id,
-        competition_id,
-        season_id,
-        match_id,
-        match_date,
-        minutes,
-
-        SUM(minutes) OVER (
-            PARTITION BY player_id
-            ORDER BY match_date
-            RANGE BETWEEN INTERVAL 7 DAY PRECEDING AND CURRENT ROW
-        ) AS minutes_last_7d,
-
-        SUM(minutes) OVER (
-            PARTITION BY player_id
-            ORDER BY match_date
-            RANGE BETWEEN INTERVAL 14 DAY PRECEDING AND CURRENT ROW
-        ) AS minutes_last_14d,
-
-        SUM(minutes) OVER (
-            PARTITION BY player_id
-            ORDER BY match_date
-            RANGE BETWEEN INTERVAL 28 DAY PRECEDING AND CURRENT ROW
-        ) AS minutes_last_28d,
-
-        SUM(minutes) OVER (
-            PARTITION BY player_id
-            ORDER BY match_date
-            ROWS BETWEEN 4 PRECEDING AND CURRENT ROW
-        ) AS minutes_last_5_matches
-
-    FROM {source_table}
-    """)
+    # cambiar la spec obliga a reconstruir la tabla entera
+    spec = load_rolling_spec(LOAD_SPEC, config_path)
+    params = {"source_table": source_table, "spec": spec}
+    # el merge recorre el historial de cada jugador por fecha
+    mergeable = all(
+        "player_id" in partition and order[0] == "match_date" for partition, order in window_groups(spec)
+    )
+    if incremental and mergeable and can_merge(con, target_table, params):
+        players, recomputed = merge_load_features(con, source_table, target_table, config_path)
+        print(f"Incremental: {players} jugadores | filas recalculadas: {recomputed}")
+    else:
+        execute_main(con, f"""
+        CREATE OR REPLACE TABLE {target_table} AS
+        {load_features_sql(source_table, config_path)}
+        ORDER BY {SORT_ORDER}
+        """)
+        recomputed = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchone()[0]
+    save_build_params(con, target_table, params, recomputed)
 
-    rows = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchall()
+    stats = table_stats(con, target_table)
+    last_7d, last_28d = stats["columns"]["minutes_last_7d"], stats["columns"]["minutes_last_28d"]
 
-    sanity = con.execute(f"""
-    SELECT
-        MIN(minutes_last_7d),
-        MAX(minutes_last_7d),
-        MIN(minutes_last_28d),
-        MAX(minutes_last_28d)
-    FROM {target_table}
-    """).fetchall()
-
-    print("Rows:", rows)
-    print("Sanity:", sanity)
+    print("Rows:", stats["rows"])
+    print("Sanity:", (last_7d["min"], last_7d["max"], last_28d["min"], last_28d["max"]))
 
     con.close()
 
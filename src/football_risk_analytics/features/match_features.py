@@ -0,0 +1,96 @@
+from football_risk_analytics.db import connect, execute_main
+from football_risk_analytics.features.table_stats import table_stats
+
+
+# Orden de escritura de esta tabla y de las derivadas fila a fila (forma, carga, ACWR):
+# al estar ordenadas igual, dataset_final las une por posición, sin hash join
+SORT_ORDER = "player_id, match_date, match_id"
+
+
+def match_features_sql(
+    minutes_source: str = "player_match_minutes_true",
+    matches_source: str = "matches",
+    stats_source: str = "player_match_stats",
+) -> str:
+    return f"""
+    SELECT
+        mt.competition_id,
+        mt.season_id,
+        mt.match_id,
+        mt.match_max_minute,
+        CAST(m.match_date AS DATE) AS match_date,
+
+        mt.team,
+        mt.player_id,
+        mt.player,
+        mt.minutes_played AS minutes,
+
+        COALESCE(s.events_count, 0) AS events_count,
+        COALESCE(s.shots, 0)        AS shots,
+        COALESCE(s.xg, 0.0)         AS xg,
+        COALESCE(s.passes, 0)       AS passes,
+        COALESCE(s.total_pass_length, 0.0) AS total_pass_length,
+        COALESCE(s.carries, 0)      AS carries,
+        COALESCE(s.progressive_x, 0.0) AS progressive_x,
+
+        CASE WHEN mt.minutes_played > 0 THEN COALESCE(s.shots, 0) * 90.0 / mt.minutes_played ELSE 0 END AS shots_per90,
+        CASE WHEN mt.minutes_played > 0 THEN COALESCE(s.xg, 0.0) * 90.0 / mt.minutes_played ELSE 0 END AS xg_per90,
+        CASE WHEN mt.minutes_played > 0 THEN COALESCE(s.passes, 0) * 90.0 / mt.minutes_played ELSE 0 END AS passes_per90,
+        CASE WHEN mt.minutes_played > 0 THEN COALESCE(s.carries, 0) * 90.0 / mt.minutes_played ELSE 0 END AS carries_per90,
+        CASE WHEN mt.minutes_played > 0 THEN COALESCE(s.progressive_x, 0.0) * 90.0 / mt.minutes_played ELSE 0 END AS progressive_x_per90
+
+    FROM {minutes_source} mt
+    JOIN {matches_source} m
+      ON mt.competition_id = m.competition_id
+     AND mt.season_id      = m.season_id
+     AND mt.match_id       = m.match_id
+    LEFT JOIN {stats_source} s
+      ON mt.competition_id = s.competition_id
+     AND mt.season_id      = s.season_id
+     AND mt.match_id       = s.match_id
+     AND mt.player_id      = s.player_id
+    """
+
+
+def create_minutes_true_view(con, minutes_path: str = "lakehouse/bronze/player_match_minutes_true") -> None:
+    con.execute(f"""
+    CREATE OR REPLACE VIEW player_match_minutes_true AS
+    SELECT *
+    FROM read_parquet('{minutes_path}/*/*/*.parquet')
+    """)
+
+
+def build_player_match_features_true_time(
+    db_path: str = "lakehouse/analytics.duckdb",
+    minutes_path: str = "lakehouse/bronze/player_match_minutes_true",
+    target_table: str = "player_match_features_true_time",
+) -> None:
+    """
+    Build player-match features from true minutes played (bronze
+    player_match_minutes_true), match dates and per-match event stats.
+
+    Counts are also expressed per 90 minutes played; players with zero
+    minutes get 0.
+    """
+    con = connect(db_path, stage="player_match_features_true_time")
+
+    create_minutes_true_view(con, minutes_path)
+
+    execute_main(con, f"""
+    CREATE OR REPLACE TABLE {target_table} AS
+    {match_features_sql()}
+    ORDER BY {SORT_ORDER}
+    """)
+
+    stats = table_stats(con, target_table)
+    minutes, match_date = stats["columns"]["minutes"], stats["columns"]["match_date"]
+
+    print("Rows:", stats["rows"])
+    print("Minutes sanity:", (minutes["min"], minutes["max"], minutes["mean"]))
+    print("Date sanity:", (match_date["min"], match_date["max"]))
+
+    con.close()
+
+
+if __name__ == "__main__":
+    build_player_match_features_true_time()
@@ -0,0 +1,223 @@
+from collections import deque
+from datetime import date, timedelta
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from football_risk_analytics.db import connect
+
+
+# Un partido retenido por fila: lo justo para reconstruir el estado al restaurar
+SNAPSHOT_SCHEMA = pa.schema([
+    ("player_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("match_date", pa.date32()),
+    ("minutes", pa.int64()),
+    ("xg", pa.float64()),
+])
+
+PARAMS_KEY = b"football_risk_analytics.online_store"
+
+# Mismas ventanas que rolling_features en config/base.yaml
+LOAD_WINDOW_DAYS = (7, 14, 28)
+LOAD_WINDOW_MATCHES = 5
+FORM_WINDOW_MATCHES = 5
+# trend_xg_3v3: 3 últimos menos los 3 anteriores -> 6 partidos por temporada
+FORM_BUFFER_MATCHES = 6
+
+# Partido retenido: (season_id, match_id, match_date, minutes, xg)
+_SEASON, _MATCH, _DATE, _MINUTES, _XG = range(5)
+
+
+class DayWindow:
+    """
+    Running sum of minutes over the matches of the last `days` days
+    (RANGE BETWEEN INTERVAL days DAY PRECEDING AND CURRENT ROW).
+    """
+
+    __slots__ = ("days", "matches", "total")
+
+    def __init__(self, days: int):
+        self.days = days
+        self.matches = deque()
+        self.total = 0
+
+    def add(self, match: tuple) -> int:
+        self.matches.append(match)
+        self.total += match[_MINUTES]
+        start = match[_DATE] - timedelta(days=self.days)
+        while self.matches[0][_DATE] < start:
+            self.total -= self.matches.popleft()[_MINUTES]
+        return self.total
+
+
+class PlayerState:
+    """
+    Rolling state of one player: the day windows and the last 5 matches
+    over all their matches, and the last 6 matches of each season for the
+    form features.
+    """
+
+    __slots__ = ("last_key", "day_windows", "last_matches", "seasons")
+
+    def __init__(self):
+        self.last_key = None
+        self.day_windows = tuple(DayWindow(days) for days in LOAD_WINDOW_DAYS)
+        self.last_matches = deque(maxlen=LOAD_WINDOW_MATCHES)
+        self.seasons = {}
+
+    def retained(self) -> list[tuple]:
+        """
+        Matches still covered by some window, in (match_date, match_id) order.
+        """
+        matches = {}
+        for buffer in (*(w.matches for w in self.day_windows), self.last_matches, *self.seasons.values()):
+            for match in buffer:
+                matches[match[_MATCH]] = match
+        return sorted(matches.values(), key=lambda m: (m[_DATE], m[_MATCH]))
+
+
+class OnlineFeatureStore:
+    """
+    In-memory rolling features per player_id, updated in O(1) amortized
+    time per new match without running the DuckDB pipeline.
+
+    update() returns, for the match just played, the same values as:
+    - minutes_last_7d / 14d / 28d, minutes_last_5_matches (load_features.py)
+    - xg_last_5, trend_xg_3v3 (player_form_features, per player and season)
+    - acwr (acwr.py, NULL below min_minutes_28d)
+
+    A player's matches must arrive in (match_date, match_id) order, the
+    order of the SQL windows; an older match raises ValueError. The SQL day
+    windows also count later matches of the same date (RANGE peers), so
+    the values match when a player has at most one match per day. Only the
+    matches some window still covers are kept, and snapshot() / restore()
+    store exactly those in Parquet.
+    """
+
+    def __init__(self, min_minutes_28d: int = 180):
+        self.min_minutes_28d = min_minutes_28d
+        self.players = {}
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def update(
+        self,
+        player_id: int,
+        season_id: int,
+        match_id: int,
+        match_date: date,
+        minutes: int,
+        xg: float,
+    ) -> dict:
+        state = self.players.get(player_id)
+        if state is None:
+            state = self.players[player_id] = PlayerState()
+
+        key = (match_date, match_id)
+        if state.last_key is not None and key <= state.last_key:
+            raise ValueError(
+                f"player {player_id}: match {match_id} ({match_date}) is not after "
+                f"match {state.last_key[1]} ({state.last_key[0]})"
+            )
+        state.last_key = key
+
+        match = (season_id, match_id, match_date, minutes, xg)
+        m7, m14, m28 = (window.add(match) for window in state.day_windows)
+        state.last_matches.append(match)
+
+        season = state.seasons.get(season_id)
+        if season is None:
+            season = state.seasons[season_id] = deque(maxlen=FORM_BUFFER_MATCHES)
+        season.append(match)
+        xgs = [m[_XG] for m in season]
+
+        # ROWS BETWEEN 5 PRECEDING AND 3 PRECEDING: marco vacío (NULL) hasta el 4º partido
+        previous = xgs[:-3][-3:]
+        trend = sum(xgs[-3:]) - sum(previous) if previous else None
+
+        return {
+            "player_id": player_id,
+            "match_id": match_id,
+            "match_date": match_date,
+            "minutes_last_7d": m7,
+            "minutes_last_14d": m14,
+            "minutes_last_28d": m28,
+            "minutes_last_5_matches": sum(m[_MINUTES] for m in state.last_matches),
+            "xg_last_5": sum(xgs[-FORM_WINDOW_MATCHES:]),
+            "trend_xg_3v3": trend,
+            "acwr": m7 / (m28 / 4.0) if m28 >= self.min_minutes_28d else None,
+        }
+
+    def update_many(self, rows) -> list[dict]:
+        """
+        update() for each row (a dict with the update() arguments), in order.
+        """
+        return [self.update(**row) for row in rows]
+
+    def snapshot(self, path: str) -> int:
+        """
+        Write the retained matches of every player to a Parquet file.
+        Returns the number of matches written.
+        """
+        rows = [
+            (player_id, *match)
+            for player_id, state in self.players.items()
+            for match in state.retained()
+        ]
+        columns = list(zip(*rows)) if rows else [[] for _ in SNAPSHOT_SCHEMA]
+        table = pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, SNAPSHOT_SCHEMA)],
+            schema=SNAPSHOT_SCHEMA.with_metadata(
+                {PARAMS_KEY: json.dumps({"min_minutes_28d": self.min_minutes_28d}).encode()}
+            ),
+        )
+        pq.write_table(table, path)
+        return table.num_rows
+
+    @classmethod
+    def restore(cls, path: str) -> "OnlineFeatureStore":
+        """
+        Rebuild a store from a snapshot() file by replaying its matches.
+        """
+        table = pq.read_table(path)
+        params = json.loads((table.schema.metadata or {}).get(PARAMS_KEY, b"{}"))
+        store = cls(**params)
+        rows = sorted(
+            table.select(SNAPSHOT_SCHEMA.names).to_pylist(),
+            key=lambda r: (r["match_date"], r["match_id"]),
+        )
+        store.update_many(rows)
+        return store
+
+    @classmethod
+    def from_duckdb(
+        cls,
+        db_path: str = "lakehouse/analytics.duckdb",
+        source_table: str = "player_match_features_true_time",
+        min_minutes_28d: int = 180,
+    ) -> "OnlineFeatureStore":
+        """
+        Warm a store with every match of source_table (stage 04 output).
+        """
+        con = connect(db_path, stage="online_store", read_only=True)
+        rows = con.execute(f"""
+        SELECT player_id, season_id, match_id, match_date, minutes, xg
+        FROM {source_table}
+        WHERE player_id IS NOT NULL
+        ORDER BY match_date, match_id, player_id
+        """).fetchall()
+        con.close()
+
+        store = cls(min_minutes_28d)
+        for row in rows:
+            store.update(*row)
+        print(f"Players: {len(store)} | matches replayed: {len(rows)}")
+        return store
+
+
+if __name__ == "__main__":
+    store = OnlineFeatureStore.from_duckdb()
+    print("Snapshot rows:", store.snapshot("lakehouse/online_store.parquet"))
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from football_risk_analytics.db import connect, execute_main
+
+
+def build_player_match_stats(
+    db_path: str = "lakehouse/analytics.duckdb",
+    stats_root: str = "lakehouse/bronze/player_match_stats",
+    events_flat_root: str = "lakehouse/bronze/events_flat",
+    target_table: str = "player_match_stats",
+) -> None:
+    """
+    Build per player-match event stats.
+
+    The per-match aggregates are written at ingestion time to
+    bronze/player_match_stats (export_events_flat / export_bronze_events),
+    so this is a union of small partitions and new matches never force a
+    rescan of the historical events. If that table has not been exported
+    yet, it falls back to aggregating bronze/events_flat.
+
+    Features:
+    - events_count
+    - shots, xg
+    - passes, total_pass_length
+    - carries, progressive_x
+    """
+    con = connect(db_path, stage="player_match_stats")
+
+    if any(Path(stats_root).glob("*/*/*.parquet")):
+        # Mismos tipos que el GROUP BY original (SUM de enteros -> HUGEINT)
+        execute_main(con, f"""
+        CREATE OR REPLACE TABLE {target_table} AS
+        SELECT
+            competition_id,
+            season_id,
+            match_id,
+            player_id,
+            player,
+            team,
+            events_count,
+            CAST(shots AS HUGEINT) AS shots,
+            xg,
+            CAST(passes AS HUGEINT) AS passes,
+            total_pass_length,
+            CAST(carries AS HUGEINT) AS carries,
+            progressive_x
+        FROM read_parquet('{stats_root}/*/*/*.parquet')
+        """)
+    else:
+        print(f"⚠️ Sin {stats_root}: agregando desde {events_flat_root}")
+        execute_main(con, f"""
+        CREATE OR REPLACE TABLE {target_table} AS
+        SELECT
+            competition_id,
+            season_id,
+            match_id,
+            player_id,
+            player,
+            team,
+
+            COUNT(*) AS events_count,
+
+            SUM(CASE WHEN type = 'Shot' THEN 1 ELSE 0 END) AS shots,
+            SUM(CASE WHEN type = 'Shot' THEN shot_statsbomb_xg ELSE 0 END) AS xg,
+
+            SUM(CASE WHEN type = 'Pass' THEN 1 ELSE 0 END) AS passes,
+            SUM(pass_length) AS total_pass_length,
+
+            SUM(CASE WHEN type = 'Carry' THEN 1 ELSE 0 END) AS carries,
+
+            SUM(
+                CASE
+                    WHEN end_x IS NOT NULL AND x IS NOT NULL
+                    THEN end_x - x
+                    ELSE 0
+                END
+            ) AS progressive_x
+
+        FROM read_parquet('{events_flat_root}/*/*/*.parquet')
+        GROUP BY
+            competition_id,
+            season_id,
+            match_id,
+            player_id,
+            player,
+            team
+        """)
+
+    result = con.execute(f"SELECT COUNT(*) FROM {target_table}").fetchall()
+    print("Filas en player_match_stats:", result)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    build_player_match_stats()
@@ -0,0 +1,112 @@
+from datetime import date
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from football_risk_analytics.db import connect
+
+
+_INDEXES = {}
+
+
+class FeatureIndex:
+    """
+    A feature table held in memory sorted by (player_id, match_date,
+    match_id), with one int64 key per row:
+
+        (player_id - min_player_id) * span + (match_date - min_date)
+
+    The keys are sorted, so "latest row of player p strictly before date d"
+    is one np.searchsorted for any number of (p, d) pairs.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.player_ids = self.df["player_id"].to_numpy(dtype=np.int64)
+        days = self.df["match_date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+        self.min_player_id = int(self.player_ids.min()) if len(df) else 0
+        self.min_day = int(days.min()) if len(df) else 0
+        # +2: hueco para fechas de consulta posteriores al último partido
+        self.span = (int(days.max()) - self.min_day + 2) if len(df) else 1
+        self.keys = (self.player_ids - self.min_player_id) * self.span + (days - self.min_day)
+
+    @classmethod
+    def from_duckdb(
+        cls,
+        db_path: str = "lakehouse/analytics.duckdb",
+        source_table: str = "player_dataset_final",
+    ) -> "FeatureIndex":
+        con = connect(db_path, stage="point_in_time", read_only=True)
+        df = con.execute(f"""
+        SELECT *
+        FROM {source_table}
+        WHERE player_id IS NOT NULL AND match_date IS NOT NULL
+        ORDER BY player_id, match_date, match_id
+        """).df()
+        con.close()
+        return cls(df)
+
+    def positions(self, player_ids, as_of_dates) -> np.ndarray:
+        """
+        Row position of the latest match strictly before each date for each
+        player, or -1 when the player has none.
+        """
+        players = np.asarray(player_ids, dtype=np.int64)
+        days = np.broadcast_to(
+            np.asarray(as_of_dates, dtype="datetime64[D]").astype(np.int64), players.shape
+        )
+        offsets = np.clip(days - self.min_day, 0, self.span - 1)
+        query = (players - self.min_player_id) * self.span + offsets
+
+        # primera clave >= (jugador, fecha): la anterior es el último partido antes de la fecha
+        pos = np.searchsorted(self.keys, query, side="left") - 1
+        found = pos >= 0
+        found[found] = self.player_ids[pos[found]] == players[found]
+        return np.where(found, pos, -1)
+
+    def as_of(self, player_ids, as_of_date, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Latest row strictly before as_of_date for each player that has one,
+        in request order. as_of_date is one date or one per player.
+        """
+        pos = self.positions(player_ids, as_of_date)
+        rows = self.df.iloc[pos[pos >= 0]]
+        if columns is not None:
+            rows = rows[list(dict.fromkeys(["player_id", "match_date", *columns]))]
+        return rows.reset_index(drop=True)
+
+
+def load_index(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_dataset_final",
+) -> FeatureIndex:
+    """
+    FeatureIndex of source_table, cached until the database file changes.
+    """
+    stat = Path(db_path).stat()
+    key = (str(Path(db_path).resolve()), source_table)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _INDEXES.get(key)
+    if cached is None or cached[0] != version:
+        cached = _INDEXES[key] = (version, FeatureIndex.from_duckdb(db_path, source_table))
+    return cached[1]
+
+
+def as_of(
+    player_ids,
+    as_of_date: date,
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_dataset_final",
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Features of each player as of a date: their latest row of source_table
+    with match_date strictly before as_of_date (no same-day leakage).
+
+    as_of_date is a single date or one per player. Players without a match
+    before the date are left out. The first call loads and sorts the
+    table; later calls reuse the index (load_index).
+    """
+    return load_index(db_path, source_table).as_of(player_ids, as_of_date, columns)
@@ -0,0 +1,131 @@
+import re
+import yaml
+
+
+CONFIG_PATH = "config/base.yaml"
+
+AGGREGATES = ("sum", "avg", "min", "max", "count")
+
+_REF = re.compile(r"\{(\w+)\}")
+
+
+def load_rolling_spec(table: str, config_path: str = CONFIG_PATH) -> dict:
+    """
+    Rolling-feature spec of one table from the rolling_features section of
+    the config (see config/base.yaml for the format).
+    """
+    with open(config_path, encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    specs = config.get("rolling_features") or {}
+    if table not in specs:
+        raise KeyError(f"No rolling_features spec for {table} in {config_path}")
+    return specs[table]
+
+
+def _window_key(spec: dict, feature: dict) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    partition = tuple(feature.get("partition_by", spec["partition_by"]))
+    order = tuple(feature.get("order_by", spec["order_by"]))
+    if "range_days" in feature:
+        # RANGE va sobre la primera columna; los empates son pares y entran todos, así que
+        # las columnas de desempate no cambian el resultado
+        order = order[:1]
+    return partition, order
+
+
+def _frame(name: str, feature: dict) -> str:
+    if "range_days" in feature:
+        return f"RANGE BETWEEN INTERVAL {int(feature['range_days'])} DAY PRECEDING AND CURRENT ROW"
+
+    start, end = (int(v) for v in feature["rows"])
+    if not start >= end >= 0:
+        raise ValueError(f"{name}: rows must be [a, b] with a >= b >= 0 (b PRECEDING, 0 = CURRENT ROW)")
+    end_sql = "CURRENT ROW" if end == 0 else f"{end} PRECEDING"
+    return f"ROWS BETWEEN {start} PRECEDING AND {end_sql}"
+
+
+def window_groups(spec: dict) -> dict[tuple[tuple[str, ...], tuple[str, ...]], list[str]]:
+    """
+    {(partition_by, order_by): [window features]}: one window pass (sort)
+    per entry, in first-use order.
+    """
+    groups = {}
+    for section in ("features", "helpers"):
+        for name, feature in (spec.get(section) or {}).items():
+            if "expr" not in feature:
+                groups.setdefault(_window_key(spec, feature), []).append(name)
+    return groups
+
+
+def window_reach(spec: dict) -> tuple[int, int]:
+    """
+    (days, rows) a window looks back at most: how far a changed match
+    propagates forward, and how much history a recomputed row needs.
+    """
+    days, rows = 0, 0
+    for section in ("features", "helpers"):
+        for feature in (spec.get(section) or {}).values():
+            if "range_days" in feature:
+                days = max(days, int(feature["range_days"]))
+            elif "rows" in feature:
+                rows = max(rows, int(feature["rows"][0]))
+    return days, rows
+
+
+def compile_rolling_sql(spec: dict, source: str) -> str:
+    """
+    SELECT with the spec columns and rolling features over source.
+
+    Features sharing partition_by and order_by reference the same named
+    WINDOW, so DuckDB sorts once per group; only the frame differs. expr
+    features are inlined from their helper windows.
+    """
+    groups = window_groups(spec)
+    window_names = {key: f"w{i}" for i, key in enumerate(groups, start=1)}
+
+    windows = {}
+    for section in ("features", "helpers"):
+        for name, feature in (spec.get(section) or {}).items():
+            if "expr" in feature:
+                continue
+            agg = feature["agg"].lower()
+            if agg not in AGGREGATES:
+                raise ValueError(f"{name}: unsupported agg {feature['agg']!r} (use one of {AGGREGATES})")
+            key = _window_key(spec, feature)
+            windows[name] = (
+                f"{agg.upper()}({feature['column']}) OVER ({window_names[key]} {_frame(name, feature)})"
+            )
+
+    def expand(name: str, feature: dict) -> str:
+        if "expr" not in feature:
+            return windows[name]
+
+        def ref(match):
+            if match.group(1) not in windows:
+                raise ValueError(f"{name}: expr references unknown window {match.group(1)!r}")
+            return windows[match.group(1)]
+
+        return f"({_REF.sub(ref, feature['expr'])})"
+
+    select = list(spec["columns"])
+    select += [f"{expand(name, feature)} AS {name}" for name, feature in spec["features"].items()]
+    window_sql = ",\n        ".join(
+        f"{window_names[key]} AS (PARTITION BY {', '.join(key[0])} ORDER BY {', '.join(key[1])})"
+        for key in groups
+    )
+    select_sql = ",\n        ".join(select)
+
+    return f"""
+    SELECT
+        {select_sql}
+    FROM {source}
+    WINDOW
+        {window_sql}
+    """
+
+
+if __name__ == "__main__":
+    for table in ("player_form_features", "player_load_features_true"):
+        spec = load_rolling_spec(table)
+        print(f"{table}: {len(window_groups(spec))} window passes")
+        for (partition, order), names in window_groups(spec).items():
+            print(f"  PARTITION BY {', '.join(partition)} ORDER BY {', '.join(order)}: {names}")
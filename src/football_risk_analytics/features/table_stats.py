@@ -0,0 +1,241 @@
+from datetime import datetime
+import json
+
+
+STATS_TABLE = "table_stats"
+
+NUMERIC_TYPES = (
+    "TINYINT",
+    "SMALLINT",
+    "INTEGER",
+    "BIGINT",
+    "HUGEINT",
+    "UTINYINT",
+    "USMALLINT",
+    "UINTEGER",
+    "UBIGINT",
+    "FLOAT",
+    "DOUBLE",
+    "DECIMAL",
+    "BOOLEAN",
+)
+
+
+def _numeric(column_type: str) -> bool:
+    return column_type.split("(")[0] in NUMERIC_TYPES
+
+
+def _scalar(column_type: str) -> bool:
+    # listas, structs y maps: solo la proporción de nulos
+    return not column_type.endswith("]") and column_type.split("(")[0] not in ("STRUCT", "MAP", "UNION")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def relation_columns(con, relation: str) -> dict[str, str]:
+    return {name: column_type for name, column_type, *_ in con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+
+
+def scan_stats(
+    con,
+    relation: str,
+    columns: dict[str, str],
+    thresholds: dict[str, tuple[float, ...]] | None = None,
+) -> dict:
+    """
+    Stats of columns ({name: type}) of relation in one aggregate query:
+    rows, and per column null_share, min, max, mean (numeric columns),
+    approx_distinct and threshold_shares, the share of non-null values
+    above each threshold given for the column.
+    """
+    thresholds = thresholds or {}
+    exprs = ["COUNT(*)"]
+    layout = []
+    for name, column_type in columns.items():
+        col = _quote(name)
+        fields = [("count", f"COUNT({col})")]
+        if _scalar(column_type):
+            fields += [
+                ("min", f"MIN({col})"),
+                ("max", f"MAX({col})"),
+                ("approx_distinct", f"approx_count_distinct({col})"),
+            ]
+        if _numeric(column_type):
+            fields.append(("mean", f"AVG({col}::DOUBLE)"))
+            fields += [
+                (t, f"AVG(CASE WHEN {col} > {t} THEN 1 ELSE 0 END) FILTER (WHERE {col} IS NOT NULL)")
+                for t in thresholds.get(name, ())
+            ]
+        layout.append((name, [key for key, _ in fields]))
+        exprs += [expr for _, expr in fields]
+
+    values = iter(con.execute(f"SELECT {', '.join(exprs)} FROM {relation}").fetchone())
+    rows = next(values)
+    stats = {}
+    for name, keys in layout:
+        found = dict(zip(keys, values))
+        count = found.pop("count")
+        stats[name] = {
+            "null_share": 1 - count / rows if rows else None,
+            "min": found.pop("min", None),
+            "max": found.pop("max", None),
+            "mean": found.pop("mean", None),
+            "approx_distinct": found.pop("approx_distinct", None),
+            "threshold_shares": found,
+            "source": "scan",
+        }
+    return {"rows": rows, "columns": stats}
+
+
+def parquet_metadata_stats(con, path: str, columns: dict[str, str]) -> dict:
+    """
+    rows, null_share, min and max of top-level scalar columns from the
+    Parquet footers of path (a file or glob), without reading data pages.
+    Columns whose row groups lack exact statistics are left out.
+    """
+    names = ", ".join(f"'{name}'" for name in columns)
+    # min_is_exact solo existe en DuckDB recientes; sin él se asume exacto (pyarrow no trunca)
+    exact = "true"
+    if "min_is_exact" in relation_columns(con, f"parquet_metadata('{path}')"):
+        exact = "min_is_exact AND max_is_exact"
+    meta = con.execute(f"""
+    SELECT
+        path_in_schema,
+        SUM(row_group_num_rows),
+        SUM(stats_null_count),
+        COUNT(*) - COUNT(stats_null_count),
+        COUNT(*) FILTER (WHERE stats_min_value IS NOT NULL AND NOT ({exact})),
+        list(stats_min_value) FILTER (WHERE stats_min_value IS NOT NULL),
+        list(stats_max_value) FILTER (WHERE stats_max_value IS NOT NULL)
+    FROM parquet_metadata('{path}')
+    WHERE path_in_schema IN ({names})
+    GROUP BY path_in_schema
+    """).fetchall()
+
+    rows = None
+    stats = {}
+    for name, column_rows, nulls, missing_nulls, inexact, mins, maxs in meta:
+        column_type = columns[name]
+        if missing_nulls or inexact or not _scalar(column_type):
+            continue
+        # los min/max del footer son texto: se comparan con el tipo de la columna
+        bounds = con.execute(
+            f"SELECT MIN(TRY_CAST(v AS {column_type})), MAX(TRY_CAST(w AS {column_type})) "
+            "FROM (SELECT UNNEST(?::VARCHAR[]) AS v, UNNEST(?::VARCHAR[]) AS w)",
+            [mins or [], maxs or []],
+        ).fetchone()
+        rows = column_rows
+        stats[name] = {
+            "null_share": nulls / column_rows if column_rows else None,
+            "min": bounds[0],
+            "max": bounds[1],
+            "mean": None,
+            "approx_distinct": None,
+            "threshold_shares": {},
+            "source": "metadata",
+        }
+    return {"rows": rows, "columns": stats}
+
+
+def _ensure_stats_table(con) -> None:
+    con.execute(f"""
+    CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+        run_id VARCHAR,
+        table_name VARCHAR,
+        column_name VARCHAR,
+        source VARCHAR,
+        rows BIGINT,
+        null_share DOUBLE,
+        min_value VARCHAR,
+        max_value VARCHAR,
+        mean DOUBLE,
+        approx_distinct BIGINT,
+        threshold_shares JSON,
+        computed_at TIMESTAMP
+    )
+    """)
+
+
+def save_table_stats(con, table_name: str, stats: dict, run_id: str | None = None) -> str:
+    """
+    Append the stats of one table to table_stats under run_id (a new
+    timestamp id by default). Returns the run_id.
+    """
+    run_id = run_id or datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    _ensure_stats_table(con)
+    con.executemany(
+        f"INSERT INTO {STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, now()::TIMESTAMP)",
+        [
+            [
+                run_id,
+                table_name,
+                name,
+                s["source"],
+                stats["rows"],
+                s["null_share"],
+                None if s["min"] is None else str(s["min"]),
+                None if s["max"] is None else str(s["max"]),
+                s["mean"],
+                s["approx_distinct"],
+                json.dumps({f"{t:g}": share for t, share in s["threshold_shares"].items()}),
+            ]
+            for name, s in stats["columns"].items()
+        ],
+    )
+    return run_id
+
+
+def table_stats(
+    con,
+    table: str,
+    thresholds: dict[str, tuple[float, ...]] | None = None,
+    columns: list[str] | None = None,
+    run_id: str | None = None,
+    save: bool = True,
+) -> dict:
+    """
+    Data-quality stats of every column of a table (or of columns) in one
+    aggregate scan (scan_stats), stored in table_stats with save.
+
+    Returns {"rows": n, "columns": {name: {"null_share", "min", "max",
+    "mean", "approx_distinct", "threshold_shares", "source"}}}.
+    """
+    types = relation_columns(con, table)
+    if columns is not None:
+        types = {name: types[name] for name in columns}
+    stats = scan_stats(con, table, types, thresholds)
+    if save:
+        save_table_stats(con, table, stats, run_id)
+    return stats
+
+
+def parquet_stats(
+    con,
+    path: str,
+    name: str,
+    columns: list[str] | None = None,
+    run_id: str | None = None,
+    save: bool = True,
+) -> dict:
+    """
+    table_stats for Parquet files: rows, null share, min and max come from
+    the footers where they are exact (parquet_metadata_stats); only the
+    columns they can't answer are scanned. Stored under name.
+    """
+    relation = f"read_parquet('{path}')"
+    types = relation_columns(con, relation)
+    if columns is not None:
+        types = {column: types[column] for column in columns}
+
+    stats = parquet_metadata_stats(con, path, types)
+    missing = {column: t for column, t in types.items() if column not in stats["columns"]}
+    if missing or stats["rows"] is None:
+        scanned = scan_stats(con, relation, missing)
+        stats = {"rows": scanned["rows"], "columns": stats["columns"] | scanned["columns"]}
+    stats["columns"] = {column: stats["columns"][column] for column in types}
+
+    if save:
+        save_table_stats(con, name, stats, run_id)
+    return stats
@@ -1,9 +1,15 @@
 from pathlib import Path
 from datetime import datetime, timezone
-import duckdb
+import numpy as np
 import pandas as pd
 
 from football_risk_analytics.inference.load_model import load_model_artifacts
+from football_risk_analytics.modeling.feature_matrix import (
+    ID_COLUMNS,
+    ensure_feature_matrix,
+    feature_array,
+    load_feature_matrix,
+)
 
 
 DEFAULT_FEATURES = [
@@ -35,7 +41,8 @@ def score_batch(
     """
     Score batch player workload risk using a trained model.
 
-    Reads features from DuckDB, applies the model, and exports predictions.
+    Reads the features from the memory-mapped feature matrix of
+    source_table, applies the model, and exports predictions.
     """
     features = features or DEFAULT_FEATURES
 
@@ -43,29 +50,12 @@ def score_batch(
     model = artifacts["model"]
     metadata = artifacts.get("metadata", {})
 
-    con = duckdb.connect(db_path)
+    # Matriz float32 mapeada en memoria (modeling.feature_matrix), exportada solo si la tabla cambió
+    matrix = load_feature_matrix(ensure_feature_matrix(db_path, source_table, features))
 
-    id_cols = [
-        "player_id",
-        "competition_id",
-        "season_id",
-        "match_id",
-        "match_date",
-        "team",
-    ]
-
-    select_cols = id_cols + features
-
-    query = f"""
-    SELECT {", ".join(select_cols)}
-    FROM {source_table}
-    """
-
-    df = con.execute(query).df()
-    con.close()
-
-    X = df[features].copy()
-    X = X.fillna(0)
+    X = feature_array(matrix, features)
+    X[np.isnan(X)] = 0
+    X = pd.DataFrame(X, columns=features, copy=False)
 
     if hasattr(model, "predict_proba"):
         scores = model.predict_proba(X)[:, 1]
@@ -74,7 +64,7 @@ def score_batch(
     else:
         scores = model.predict(X)
 
-    scored = df[id_cols].copy()
+    scored = matrix.select(ID_COLUMNS).to_pandas(date_as_object=False)
     scored["risk_score"] = scores
     scored["model_name"] = metadata.get("model_name", "baseline_model")
     scored["model_version"] = metadata.get("model_version", "v1")
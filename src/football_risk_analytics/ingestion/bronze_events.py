@@ -0,0 +1,202 @@
+from pathlib import Path
+import polars as pl
+import pyarrow as pa
+
+from football_risk_analytics.ingestion.checkpoint import Checkpoint
+from football_risk_analytics.ingestion.events_flat import (
+    EVENTS_FLAT_PARQUET_OPTIONS,
+    EVENTS_FLAT_SCHEMA,
+    flatten_events,
+    map_matches,
+)
+from football_risk_analytics.ingestion.events_raw import events_frame
+from football_risk_analytics.ingestion.manifest import match_fingerprints, match_tasks, read_json
+from football_risk_analytics.ingestion.minutes_true import MINUTES_TRUE_SCHEMA, match_minutes_true
+from football_risk_analytics.ingestion.player_match_stats import PLAYER_MATCH_STATS_SCHEMA, match_player_stats
+from football_risk_analytics.ingestion.sources import DataFile
+from football_risk_analytics.ingestion.writers import BatchWriter, StreamingParquetWriter, clear_outputs
+
+
+def parse_match(
+    task: tuple[DataFile, int, int, int],
+) -> tuple[pl.DataFrame, pa.RecordBatch, list[dict], pa.RecordBatch]:
+    """
+    Parse one match events file once and derive every bronze output from it:
+    raw events frame, flattened events batch, true-minutes rows and
+    per-player match stats.
+    """
+    events_file, comp_id, season_id, match_id = task
+    events = read_json(events_file)
+    flat = flatten_events(events, comp_id, season_id, match_id)
+
+    return (
+        events_frame(events, comp_id, season_id, match_id),
+        flat,
+        match_minutes_true(events, comp_id, season_id, match_id),
+        match_player_stats(flat),
+    )
+
+
+def export_bronze_events(
+    data_root: str = "data",
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+    bronze_root: str = "lakehouse/bronze",
+    events_batch_size: int = 50,
+    flat_batch_size: int = 100,
+    workers: int = 1,
+    streaming: bool = False,
+    memory_limit_mb: float = 256,
+) -> dict:
+    """
+    Single-pass ingestion of raw match events.
+
+    Each data/events/{match_id}.json file is read and parsed once, and the
+    event-derived bronze tables are written together:
+    - bronze/events                     (same layout as export_events_parquet)
+    - bronze/events_flat                (same layout as export_events_flat)
+    - bronze/player_match_stats         (same layout as export_events_flat)
+    - bronze/player_match_minutes_true  (same layout as export_player_match_minutes_true)
+
+    With streaming=True, events_flat and player_match_minutes_true are
+    streamed as typed record batches into one file per partition, sharing a
+    memory_limit_mb buffer ceiling. Raw events are already bounded by
+    events_batch_size matches per file.
+
+    This is always a full run: previous files are replaced and the events,
+    events_flat and player_match_stats checkpoints are rewritten, so
+    export_events_parquet / export_events_flat can later resume=True on top
+    of it.
+
+    Returns the number of rows written per table.
+    """
+    bronze_root = Path(bronze_root)
+
+    tasks = match_tasks(data_root, manifest_path)
+    fingerprints = match_fingerprints(manifest_path)
+
+    events_checkpoint = Checkpoint(bronze_root / "events", fingerprints)
+    flat_checkpoint = Checkpoint(bronze_root / "events_flat", fingerprints)
+    stats_checkpoint = Checkpoint(bronze_root / "player_match_stats", fingerprints)
+    for checkpoint in (events_checkpoint, flat_checkpoint, stats_checkpoint):
+        checkpoint.reset()
+    for table in ("events", "events_flat", "player_match_stats", "player_match_minutes_true"):
+        clear_outputs(bronze_root / table)
+
+    events_writer = BatchWriter(bronze_root / "events", "events_batch")
+    # Agregados pequeños: un fichero por cada fichero de events_flat
+    stats_writer = BatchWriter(bronze_root / "player_match_stats", "player_match_stats")
+    if streaming:
+        # Casi todo el volumen está en events_flat: le damos la mayor parte del presupuesto
+        flat_writer = StreamingParquetWriter(
+            bronze_root / "events_flat", "events_flat", EVENTS_FLAT_SCHEMA,
+            memory_limit_mb=memory_limit_mb * 0.9, parquet_options=EVENTS_FLAT_PARQUET_OPTIONS,
+        )
+        minutes_writer = StreamingParquetWriter(
+            bronze_root / "player_match_minutes_true", "player_match_minutes_true", MINUTES_TRUE_SCHEMA,
+            numbered=False, memory_limit_mb=memory_limit_mb * 0.1,
+        )
+    else:
+        flat_writer = BatchWriter(
+            bronze_root / "events_flat", "events_flat", parquet_options=EVENTS_FLAT_PARQUET_OPTIONS
+        )
+        minutes_writer = BatchWriter(
+            bronze_root / "player_match_minutes_true", "player_match_minutes_true", numbered=False
+        )
+
+    events_buf, flat_buf, minutes_buf, stats_buf = [], [], [], []
+    events_tasks, flat_tasks = [], []
+    flat_rows = 0
+
+    def flush_events(key):
+        if events_buf:
+            events_writer.write(key, pl.concat(events_buf, how="diagonal_relaxed"))
+            events_checkpoint.record(events_tasks, events_writer.last_file)
+            events_buf.clear()
+            events_tasks.clear()
+
+    def flush_stats(key):
+        if not flat_tasks:
+            return
+        if any(b.num_rows for b in stats_buf):
+            stats_writer.write_table(key, pa.Table.from_batches(stats_buf, schema=PLAYER_MATCH_STATS_SCHEMA))
+            stats_checkpoint.record(flat_tasks, stats_writer.last_file)
+        else:
+            stats_checkpoint.record(flat_tasks, None)
+        stats_buf.clear()
+
+    def flush_flat(key):
+        nonlocal flat_rows
+        if streaming:
+            # el fichero de la partición solo existe al cerrarlo
+            flat_checkpoint.record(flat_tasks, flat_writer.close())
+        elif flat_buf:
+            flat_writer.write_table(key, pa.Table.from_batches(flat_buf, schema=EVENTS_FLAT_SCHEMA))
+            flat_checkpoint.record(flat_tasks, flat_writer.last_file)
+            flat_buf.clear()
+            flat_rows = 0
+        flush_stats(key)
+        flat_tasks.clear()
+
+    def flush_minutes(key):
+        if minutes_buf:
+            minutes_writer.write(key, pl.from_dicts(minutes_buf, infer_schema_length=None))
+            minutes_buf.clear()
+
+    current_key = None
+    processed = 0
+
+    for task, (df_events, flat_batch, minutes_rows, stats_batch) in zip(tasks, map_matches(parse_match, tasks, workers)):
+        key = (task[1], task[2])
+
+        if current_key is None:
+            current_key = key
+
+        # Cambio de partición: volcamos todas las tablas
+        if key != current_key:
+            flush_events(current_key)
+            flush_flat(current_key)
+            flush_minutes(current_key)
+            current_key = key
+
+        events_buf.append(df_events)
+        events_tasks.append(task)
+        flat_tasks.append(task)
+        stats_buf.append(stats_batch)
+        if streaming:
+            flat_writer.write_batch(key, flat_batch)
+            minutes_writer.write_rows(key, minutes_rows)
+        else:
+            flat_buf.append(flat_batch)
+            flat_rows += flat_batch.num_rows
+            minutes_buf.extend(minutes_rows)
+
+        if len(events_buf) >= events_batch_size:
+            flush_events(current_key)
+        if not streaming and flat_rows >= flat_batch_size * 2000:
+            flush_flat(current_key)
+
+        processed += 1
+        if processed % 50 == 0:
+            print(f"Procesados {processed}/{len(tasks)} partidos | events: {events_writer.total_rows} | flat: {flat_writer.total_rows}")
+
+    flush_events(current_key)
+    flush_flat(current_key)
+    flush_minutes(current_key)
+    if streaming:
+        minutes_writer.close()
+
+    totals = {
+        "events": events_writer.total_rows,
+        "events_flat": flat_writer.total_rows,
+        "player_match_stats": stats_writer.total_rows,
+        "player_match_minutes_true": minutes_writer.total_rows,
+    }
+
+    print(f"✅ Bronze events exportados en una pasada: {totals}")
+    print(f"📁 Salida: {bronze_root}")
+
+    return totals
+
+
+if __name__ == "__main__":
+    export_bronze_events()
@@ -0,0 +1,205 @@
+from pathlib import Path
+import json
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from football_risk_analytics.ingestion.sources import DataFile
+from football_risk_analytics.ingestion.writers import partition_dir, write_atomic
+
+
+CHECKPOINT_FILE = "_checkpoint.jsonl"
+
+
+class Checkpoint:
+    """
+    Append-only record of which matches an exporter has written, kept in
+    <out_root>/_checkpoint.jsonl.
+
+    Each line maps a match_id to the events fingerprint it was built from
+    (events_hash in the manifest) and the file, relative to out_root, that
+    holds its rows. The last line for a match wins; removed matches get a
+    line with "removed": true. Lines are appended only after the file they
+    point to is in place, so a crash never records work that was not done.
+    """
+
+    def __init__(self, out_root: str | Path, fingerprints: dict[int, str | None] | None = None):
+        self.out_root = Path(out_root)
+        self.path = self.out_root / CHECKPOINT_FILE
+        self.fingerprints = fingerprints or {}
+        self.entries = {}
+
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # última línea a medias tras una caída
+                        continue
+                    self.entries[entry["match_id"]] = entry
+
+    def reset(self) -> None:
+        self.out_root.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding="utf-8")
+        self.entries = {}
+
+    def _append(self, entries: list[dict]) -> None:
+        self.out_root.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            # una sola escritura por fichero de salida
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self.entries[entry["match_id"]] = entry
+
+    def record(self, tasks: list[tuple[DataFile, int, int, int]], file: Path | None) -> None:
+        """
+        Record that the matches in tasks are stored in file (None for a match
+        without rows).
+        """
+        rel = Path(file).relative_to(self.out_root).as_posix() if file is not None else None
+        self._append([
+            {
+                "match_id": match_id,
+                "competition_id": comp_id,
+                "season_id": season_id,
+                "fingerprint": self.fingerprints.get(match_id),
+                "file": rel,
+            }
+            for _, comp_id, season_id, match_id in tasks
+        ])
+
+    def move(self, files: list[str | Path], file: Path) -> int:
+        """
+        Record that every match stored in one of files (paths relative to
+        out_root, e.g. merged by compaction) now lives in file. Returns the
+        number of matches moved.
+        """
+        old = {Path(f).as_posix() for f in files}
+        rel = Path(file).relative_to(self.out_root).as_posix()
+        moved = [
+            {**entry, "file": rel}
+            for entry in self.live().values()
+            if entry["file"] in old
+        ]
+        if moved:
+            self._append(moved)
+        return len(moved)
+
+    def rewrite(self) -> None:
+        """
+        Rewrite the checkpoint with only the last line per match, atomically.
+        """
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in self.entries.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def live(self) -> dict[int, dict]:
+        return {m: e for m, e in self.entries.items() if not e.get("removed")}
+
+    def is_done(self, match_id: int) -> bool:
+        entry = self.entries.get(match_id)
+        return (
+            entry is not None
+            and not entry.get("removed")
+            and entry["fingerprint"] == self.fingerprints.get(match_id)
+        )
+
+    def remove_orphans(self) -> int:
+        """
+        Delete partition files not referenced by any match, e.g. written
+        just before a crash and never recorded.
+        """
+        referenced = {e["file"] for e in self.live().values() if e["file"] is not None}
+        removed = 0
+        for pattern in ("*/*/*.parquet", "*/*/.*.tmp"):
+            for path in self.out_root.glob(pattern):
+                if path.relative_to(self.out_root).as_posix() not in referenced:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def drop(self, match_ids: list[int]) -> None:
+        """
+        Remove the rows of match_ids from the output and record them as
+        removed. A file holding only these matches is deleted; a file shared
+        with other matches (batched or compacted) is rewritten without them.
+        """
+        live = self.live()
+        match_ids = [m for m in match_ids if m in live]
+        if not match_ids:
+            return
+
+        by_file = {}
+        for match_id, entry in live.items():
+            if entry["file"] is not None:
+                by_file.setdefault(entry["file"], []).append(match_id)
+
+        drop_ids = set(match_ids)
+        for rel, file_matches in by_file.items():
+            dropped = [m for m in file_matches if m in drop_ids]
+            if not dropped:
+                continue
+            path = self.out_root / rel
+            if not path.exists():
+                continue
+            if len(dropped) == len(file_matches):
+                path.unlink()
+            else:
+                table = pq.ParquetFile(path).read()
+                keep = pc.invert(pc.is_in(table["match_id"], value_set=pa.array(dropped, table.schema.field("match_id").type)))
+                write_atomic(path, table.filter(keep))
+
+        self._append([
+            {
+                "match_id": m,
+                "competition_id": live[m]["competition_id"],
+                "season_id": live[m]["season_id"],
+                "fingerprint": None,
+                "file": None,
+                "removed": True,
+            }
+            for m in match_ids
+        ])
+
+    def pending(self, tasks: list[tuple[DataFile, int, int, int]]) -> list[tuple[DataFile, int, int, int]]:
+        """
+        Bring the output in line with tasks and return the tasks still to do.
+
+        Orphan files are deleted, matches no longer in tasks are dropped, and
+        matches whose fingerprint changed are dropped so they can be written
+        again. Matches already done with the same fingerprint are skipped.
+        """
+        self.remove_orphans()
+
+        current = {task[3] for task in tasks}
+        self.drop([m for m in self.live() if m not in current])
+
+        todo = [task for task in tasks if not self.is_done(task[3])]
+        self.drop([task[3] for task in todo])
+        return todo
+
+    def write_match(self, task: tuple[DataFile, int, int, int], prefix: str, data, parquet_options: dict | None = None) -> int:
+        """
+        Write one match to <partition>/<prefix>_match_<match_id>.parquet
+        atomically and record it. Returns the number of rows written.
+        """
+        _, comp_id, season_id, match_id = task
+        n_rows = data.height if hasattr(data, "height") else data.num_rows
+
+        if n_rows == 0:
+            self.record([task], None)
+            return 0
+
+        out_dir = partition_dir(self.out_root, comp_id, season_id)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"{prefix}_match_{match_id}.parquet"
+        write_atomic(path, data, parquet_options)
+        self.record([task], path)
+        return n_rows
@@ -0,0 +1,147 @@
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from football_risk_analytics.ingestion.checkpoint import Checkpoint
+from football_risk_analytics.ingestion.events_flat import EVENTS_FLAT_PARQUET_OPTIONS
+from football_risk_analytics.ingestion.writers import write_atomic
+
+
+BRONZE_TABLES = (
+    "events",
+    "events_flat",
+    "player_match_stats",
+    "player_match_minutes_true",
+    "player_match_minutes",
+    "matches",
+)
+
+# Orden de las filas: los min/max por row group permiten a DuckDB saltarse grupos
+SORT_KEYS = ("match_id", "player_id")
+
+# Tamaño de row group por defecto de DuckDB
+DEFAULT_ROW_GROUP_ROWS = 122_880
+
+TABLE_PARQUET_OPTIONS = {
+    "events_flat": EVENTS_FLAT_PARQUET_OPTIONS,
+}
+
+# Marca en los metadatos del fichero compactado, para no reescribirlo otra vez
+LAYOUT_KEY = b"football_risk_analytics.layout"
+
+
+def _layout(sort_keys: list[str], row_group_size: int) -> bytes:
+    return f"sorted_by={','.join(sort_keys)};row_group_size={row_group_size}".encode()
+
+
+def _next_compact_file(part_dir: Path, prefix: str) -> Path:
+    idx = 0
+    while (part_dir / f"{prefix}_compact_{idx:05d}.parquet").exists():
+        idx += 1
+    return part_dir / f"{prefix}_compact_{idx:05d}.parquet"
+
+
+def compact_partition(
+    part_dir: str | Path,
+    prefix: str,
+    checkpoint: Checkpoint | None = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_ROWS,
+    parquet_options: dict | None = None,
+    force: bool = False,
+) -> tuple[int, int] | None:
+    """
+    Rewrite every Parquet file of one partition into a single zstd file
+    with row groups of row_group_size rows, sorted by match_id, player_id
+    (the SORT_KEYS the table has; event index breaks ties).
+
+    A partition that is already one file with the same layout is skipped
+    unless force=True. Returns (files merged, rows) or None if skipped.
+
+    The new file is written atomically and recorded in checkpoint before
+    the old files are deleted: after a crash the leftover files are
+    orphans that the next resume=True run removes.
+    """
+    part_dir = Path(part_dir)
+    files = sorted(part_dir.glob("*.parquet"))
+    if not files:
+        return None
+
+    schema = pq.read_schema(files[0])
+    sort_keys = [k for k in SORT_KEYS if k in schema.names]
+    layout = _layout(sort_keys, row_group_size)
+    if len(files) == 1 and not force and (schema.metadata or {}).get(LAYOUT_KEY) == layout:
+        return None
+
+    # Los ficheros de events (polars, diagonal_relaxed) pueden traer columnas distintas.
+    # ParquetFile y no read_table: sin columnas de partición deducidas de la ruta
+    table = pa.concat_tables([pq.ParquetFile(f).read() for f in files], promote_options="permissive")
+
+    order = sort_keys + (["index"] if "index" in table.column_names else [])
+    if order:
+        table = table.sort_by([(k, "ascending") for k in order], null_placement="at_end")
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), LAYOUT_KEY: layout})
+
+    out_file = _next_compact_file(part_dir, prefix)
+    write_atomic(out_file, table, {"row_group_size": row_group_size, **(parquet_options or {})})
+
+    if checkpoint is not None:
+        checkpoint.move([f.relative_to(checkpoint.out_root) for f in files], out_file)
+
+    for f in files:
+        f.unlink()
+
+    return len(files), table.num_rows
+
+
+def compact_bronze(
+    bronze_root: str = "lakehouse/bronze",
+    tables: tuple[str, ...] = BRONZE_TABLES,
+    row_group_size: int = DEFAULT_ROW_GROUP_ROWS,
+    force: bool = False,
+) -> dict:
+    """
+    Compact the competition_id / season_id partitions of the bronze tables
+    so each partition is read as one file with large, sorted row groups
+    instead of many small batch or per-match files.
+
+    Tables with a _checkpoint.jsonl (events, events_flat,
+    player_match_stats) keep it in line with the new files, so
+    export_*(resume=True) still works on top of a compacted table.
+
+    Returns {table: (files before, files after)}.
+    """
+    bronze_root = Path(bronze_root)
+    summary = {}
+
+    for name in tables:
+        out_root = bronze_root / name
+        parts = sorted(p for p in out_root.glob("*/*") if p.is_dir())
+        if not parts:
+            continue
+
+        checkpoint = Checkpoint(out_root)
+        if not checkpoint.path.exists():
+            checkpoint = None
+
+        files_before = sum(len(list(p.glob("*.parquet"))) for p in parts)
+        rewritten = 0
+        for part in parts:
+            result = compact_partition(
+                part, name, checkpoint, row_group_size, TABLE_PARQUET_OPTIONS.get(name), force
+            )
+            if result is not None:
+                rewritten += 1
+                print(f"  {part.relative_to(bronze_root)}: {result[0]} ficheros -> 1 | filas: {result[1]}")
+
+        if checkpoint is not None and rewritten:
+            checkpoint.rewrite()
+
+        files_after = sum(len(list(p.glob("*.parquet"))) for p in parts)
+        summary[name] = (files_before, files_after)
+        print(f"✅ {name}: {files_before} -> {files_after} ficheros ({rewritten} particiones reescritas)")
+
+    return summary
+
+
+if __name__ == "__main__":
+    compact_bronze()
@@ -0,0 +1,358 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import multiprocessing
+from pathlib import Path
+import pyarrow as pa
+
+from football_risk_analytics.ingestion.checkpoint import Checkpoint
+from football_risk_analytics.ingestion.manifest import match_fingerprints, match_tasks, read_json
+from football_risk_analytics.ingestion.player_match_stats import PLAYER_MATCH_STATS_SCHEMA, match_player_stats
+from football_risk_analytics.ingestion.sources import DataFile
+from football_risk_analytics.ingestion.writers import BatchWriter, StreamingParquetWriter, clear_outputs
+
+
+# Columnas de baja cardinalidad: se guardan como diccionario
+DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+
+EVENTS_FLAT_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("id", pa.string()),
+    ("index", pa.int64()),
+    ("period", pa.int64()),
+    ("timestamp", pa.string()),
+    ("minute", pa.int64()),
+    ("second", pa.int64()),
+    ("type", DICT_STRING),
+    ("possession", pa.int64()),
+    ("possession_team", DICT_STRING),
+    ("play_pattern", DICT_STRING),
+    ("team", DICT_STRING),
+    ("player", DICT_STRING),
+    ("player_id", pa.int64()),
+    ("x", pa.float64()),
+    ("y", pa.float64()),
+    ("pass_outcome", pa.string()),
+    ("pass_length", pa.float64()),
+    ("shot_outcome", pa.string()),
+    ("shot_statsbomb_xg", pa.float64()),
+    ("end_x", pa.float64()),
+    ("end_y", pa.float64()),
+])
+
+PARTITION_COLUMNS = ("competition_id", "season_id", "match_id")
+
+# El id de evento es un UUID: un diccionario Parquet solo añade tamaño
+EVENTS_FLAT_PARQUET_OPTIONS = {
+    "use_dictionary": [name for name in EVENTS_FLAT_SCHEMA.names if name != "id"],
+}
+
+
+def _name(obj):
+    return obj.get("name") if isinstance(obj, dict) else None
+
+
+def flatten_events(events: list[dict], comp_id: int, season_id: int, match_id: int) -> pa.RecordBatch:
+    """
+    Flatten one match of StatsBomb events into a RecordBatch with
+    EVENTS_FLAT_SCHEMA.
+
+    Values are appended column by column and converted once per column to
+    the declared Arrow type, so there is no per-row dict and no schema
+    inference: a match with no shots still yields a float64
+    shot_statsbomb_xg column, and integer pass lengths are stored as float64.
+    """
+    cols = {name: [] for name in EVENTS_FLAT_SCHEMA.names if name not in PARTITION_COLUMNS}
+
+    for e in events:
+        # Campos base bastante estables en StatsBomb
+        cols["id"].append(e.get("id"))
+        cols["index"].append(e.get("index"))
+        cols["period"].append(e.get("period"))
+        cols["timestamp"].append(e.get("timestamp"))
+        cols["minute"].append(e.get("minute"))
+        cols["second"].append(e.get("second"))
+        cols["type"].append(_name(e.get("type")))
+        cols["possession"].append(e.get("possession"))
+        cols["possession_team"].append(_name(e.get("possession_team")))
+        cols["play_pattern"].append(_name(e.get("play_pattern")))
+        cols["team"].append(_name(e.get("team")))
+        player = e.get("player") or {}
+        cols["player"].append(player.get("name"))
+        cols["player_id"].append(player.get("id"))
+
+        loc = e.get("location")
+        if isinstance(loc, list) and len(loc) >= 2:
+            cols["x"].append(loc[0])
+            cols["y"].append(loc[1])
+        else:
+            cols["x"].append(None)
+            cols["y"].append(None)
+
+        # Si quieres luego features de progresión: end_location (pass/carry/shot)
+        end_loc = None
+        pass_ = e.get("pass")
+        if isinstance(pass_, dict):
+            end_loc = pass_.get("end_location")
+            cols["pass_outcome"].append(_name(pass_.get("outcome")))
+            cols["pass_length"].append(pass_.get("length"))
+        else:
+            cols["pass_outcome"].append(None)
+            cols["pass_length"].append(None)
+
+        shot = e.get("shot")
+        if isinstance(shot, dict):
+            cols["shot_outcome"].append(_name(shot.get("outcome")))
+            cols["shot_statsbomb_xg"].append(shot.get("statsbomb_xg"))
+        else:
+            cols["shot_outcome"].append(None)
+            cols["shot_statsbomb_xg"].append(None)
+
+        carry = e.get("carry")
+        if isinstance(carry, dict) and end_loc is None:
+            end_loc = carry.get("end_location")
+
+        if isinstance(end_loc, list) and len(end_loc) >= 2:
+            cols["end_x"].append(end_loc[0])
+            cols["end_y"].append(end_loc[1])
+        else:
+            cols["end_x"].append(None)
+            cols["end_y"].append(None)
+
+    n = len(events)
+    partition = {"competition_id": comp_id, "season_id": season_id, "match_id": match_id}
+
+    arrays = []
+    for field in EVENTS_FLAT_SCHEMA:
+        if field.name in partition:
+            arrays.append(pa.array([partition[field.name]] * n, type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(cols[field.name], type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(cols[field.name], type=field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=EVENTS_FLAT_SCHEMA)
+
+
+def flatten_match(task: tuple[DataFile, int, int, int]) -> pa.RecordBatch:
+    """
+    Read one match events file and flatten every event.
+
+    Defined at module level so it can be shipped to worker processes.
+    """
+    events_file, comp_id, season_id, match_id = task
+    return flatten_events(read_json(events_file), comp_id, season_id, match_id)
+
+
+def flatten_match_stats(task: tuple[DataFile, int, int, int]) -> tuple[pa.RecordBatch, pa.RecordBatch]:
+    """
+    Flatten one match and aggregate it into per-player stats in the same
+    worker, so the stats cost no extra read of the events.
+    """
+    batch = flatten_match(task)
+    return batch, match_player_stats(batch)
+
+
+def map_matches(func, tasks: list, workers: int = 1, chunksize: int = 4):
+    """
+    Apply func to every task, yielding results in task order.
+
+    With workers > 1 the tasks run in a process pool. Results are still
+    yielded in submission order, so the output does not depend on the
+    number of workers. Tasks are submitted in windows to keep the number
+    of finished-but-unconsumed results bounded.
+
+    Workers are spawned rather than forked: polars keeps a thread pool
+    that does not survive fork, and spawn is also what Windows uses.
+    """
+    if workers <= 1:
+        yield from map(func, tasks)
+        return
+
+    window = workers * chunksize * 4
+    it = iter(tasks)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        while True:
+            chunk = list(islice(it, window))
+            if not chunk:
+                break
+            yield from pool.map(func, chunk, chunksize=chunksize)
+
+
+def export_events_flat(
+    data_root: str = "data",
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+    out_root: str = "lakehouse/bronze/events_flat",
+    batch_size: int = 100,
+    workers: int = 1,
+    chunksize: int = 4,
+    streaming: bool = False,
+    memory_limit_mb: float = 256,
+    resume: bool = False,
+    stats_root: str | None = "lakehouse/bronze/player_match_stats",
+) -> int:
+    """
+    Export flattened StatsBomb events to Parquet, partitioned by
+    competition_id / season_id.
+
+    Every match is flattened into a typed RecordBatch (EVENTS_FLAT_SCHEMA).
+    By default batches are grouped into files of roughly batch_size * 2000
+    events. With streaming=True they are streamed into one file per
+    partition, flushing a row group whenever memory_limit_mb of batches is
+    buffered.
+
+    Matches are processed in (competition_id, season_id, match_id) order.
+    With workers > 1, JSON parsing and flattening run in a process pool
+    while this process keeps buffering and writing in manifest order, so
+    the files written are the same for any worker count.
+
+    Every written match is recorded in out_root/_checkpoint.jsonl. A full
+    run first clears the previous output. With resume=True only matches
+    that are missing or whose events file changed are processed, each into
+    its own file, so an interrupted or nightly run picks up where the
+    output stands.
+
+    Per-player match stats (PLAYER_MATCH_STATS_SCHEMA) are aggregated from
+    each flattened match and written to stats_root with the same partition
+    layout and their own checkpoint, one file per events_flat file (one per
+    match when resuming). stats_root=None skips them.
+
+    Returns the number of rows written.
+    """
+    out_root = Path(out_root)
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    tasks = match_tasks(data_root, manifest_path)
+    fingerprints = match_fingerprints(manifest_path)
+    checkpoint = Checkpoint(out_root, fingerprints)
+    stats_checkpoint = Checkpoint(stats_root, fingerprints) if stats_root is not None else None
+
+    def flatten_all(todo):
+        if stats_checkpoint is None:
+            return ((batch, None) for batch in map_matches(flatten_match, todo, workers, chunksize))
+        return map_matches(flatten_match_stats, todo, workers, chunksize)
+
+    if resume:
+        todo_flat = {task[3] for task in checkpoint.pending(tasks)}
+        todo_stats = {task[3] for task in stats_checkpoint.pending(tasks)} if stats_checkpoint is not None else set()
+        # un partido pendiente en cualquiera de las dos salidas se vuelve a leer una vez
+        todo = [task for task in tasks if task[3] in todo_flat or task[3] in todo_stats]
+        print(f"Partidos al día: {len(tasks) - len(todo)} | pendientes: {len(todo)}")
+
+        total_rows = 0
+        for processed, (task, (batch, stats)) in enumerate(zip(todo, flatten_all(todo)), start=1):
+            if task[3] in todo_flat:
+                total_rows += checkpoint.write_match(task, "events_flat", batch, EVENTS_FLAT_PARQUET_OPTIONS)
+            if task[3] in todo_stats:
+                stats_checkpoint.write_match(task, "player_match_stats", stats)
+            if processed % 50 == 0:
+                print(f"Procesados {processed}/{len(todo)} partidos | filas escritas: {total_rows}")
+
+        print(f"✅ Events FLAT exportados (resume). Filas nuevas: {total_rows}")
+        print(f"📁 Salida: {out_root}")
+        return total_rows
+
+    # Export completo: sin ficheros ni checkpoint de ejecuciones anteriores
+    checkpoint.reset()
+    clear_outputs(out_root)
+
+    stats_writer = None
+    stats_buf = []
+    if stats_checkpoint is not None:
+        stats_checkpoint.reset()
+        clear_outputs(stats_root)
+        stats_writer = BatchWriter(stats_root, "player_match_stats")
+
+    def flush_stats(key, buf_tasks):
+        # mismas tareas que el fichero de events_flat que se acaba de cerrar
+        if stats_writer is None:
+            return
+        if any(b.num_rows for b in stats_buf):
+            stats_writer.write_table(key, pa.Table.from_batches(stats_buf, schema=PLAYER_MATCH_STATS_SCHEMA))
+            stats_checkpoint.record(buf_tasks, stats_writer.last_file)
+        else:
+            stats_checkpoint.record(buf_tasks, None)
+        stats_buf.clear()
+
+    if streaming:
+        writer = StreamingParquetWriter(
+            out_root, "events_flat", EVENTS_FLAT_SCHEMA, memory_limit_mb=memory_limit_mb,
+            parquet_options=EVENTS_FLAT_PARQUET_OPTIONS,
+        )
+        pending = []
+
+        def close_partition():
+            key = writer.current_key
+            checkpoint.record(pending, writer.close())
+            flush_stats(key, pending)
+            pending.clear()
+
+        for processed, (task, (batch, stats)) in enumerate(zip(tasks, flatten_all(tasks)), start=1):
+            key = (task[1], task[2])
+            if key != writer.current_key:
+                close_partition()
+            writer.write_batch(key, batch)
+            pending.append(task)
+            if stats is not None:
+                stats_buf.append(stats)
+            if processed % 50 == 0:
+                print(f"Procesados {processed}/{len(tasks)} partidos | filas escritas: {writer.total_rows} | buffer_mb: {writer.buffered_bytes / 1e6:.1f}")
+        close_partition()
+
+        print(f"✅ Events FLAT exportados (streaming). Filas totales: {writer.total_rows}")
+        print(f"📁 Salida: {out_root}")
+        return writer.total_rows
+
+    writer = BatchWriter(out_root, "events_flat", parquet_options=EVENTS_FLAT_PARQUET_OPTIONS)
+
+    def flush(key, buf, buf_tasks):
+        if buf:
+            writer.write_table(key, pa.Table.from_batches(buf, schema=EVENTS_FLAT_SCHEMA))
+            checkpoint.record(buf_tasks, writer.last_file)
+            flush_stats(key, buf_tasks)
+
+    buffer = []
+    buffer_tasks = []
+    buffer_rows = 0
+    current_key = None
+    processed = 0
+
+    for task, (batch, stats) in zip(tasks, flatten_all(tasks)):
+        key = (task[1], task[2])
+
+        if current_key is None:
+            current_key = key
+
+        # si cambiamos de partición, volcamos
+        if key != current_key:
+            flush(current_key, buffer, buffer_tasks)
+            buffer, buffer_tasks, buffer_rows = [], [], 0
+            current_key = key
+
+        buffer.append(batch)
+        buffer_tasks.append(task)
+        buffer_rows += batch.num_rows
+        if stats is not None:
+            stats_buf.append(stats)
+
+        processed += 1
+        if processed % 50 == 0:
+            print(f"Procesados {processed}/{len(tasks)} partidos | filas escritas: {writer.total_rows} | buffer_events: {buffer_rows}")
+
+        if buffer_rows >= batch_size * 2000:  # umbral aproximado (depende del partido)
+            flush(current_key, buffer, buffer_tasks)
+            buffer, buffer_tasks, buffer_rows = [], [], 0
+
+    # flush final
+    flush(current_key, buffer, buffer_tasks)
+
+    print(f"✅ Events FLAT exportados. Filas totales: {writer.total_rows}")
+    print(f"📁 Salida: {out_root}")
+
+    return writer.total_rows
+
+
+if __name__ == "__main__":
+    export_events_flat()
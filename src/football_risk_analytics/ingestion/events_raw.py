@@ -0,0 +1,107 @@
+from pathlib import Path
+import polars as pl
+
+from football_risk_analytics.ingestion.checkpoint import Checkpoint
+from football_risk_analytics.ingestion.events_flat import map_matches
+from football_risk_analytics.ingestion.manifest import match_fingerprints, match_tasks, read_json
+from football_risk_analytics.ingestion.sources import DataFile
+from football_risk_analytics.ingestion.writers import BatchWriter, clear_outputs
+
+
+def events_frame(events: list[dict], comp_id: int, season_id: int, match_id: int) -> pl.DataFrame:
+    # polars tolerante a esquemas
+    return pl.from_dicts(events, infer_schema_length=None).with_columns([
+        pl.lit(int(comp_id)).alias("competition_id"),
+        pl.lit(int(season_id)).alias("season_id"),
+        pl.lit(int(match_id)).alias("match_id"),
+    ])
+
+
+def read_match_frame(task: tuple[DataFile, int, int, int]) -> pl.DataFrame:
+    events_file, comp_id, season_id, match_id = task
+    return events_frame(read_json(events_file), comp_id, season_id, match_id)
+
+
+def export_events_parquet(
+    data_root: str = "data",
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+    out_root: str = "lakehouse/bronze/events",
+    batch_size: int = 50,
+    workers: int = 1,
+    resume: bool = False,
+) -> int:
+    """
+    Export raw StatsBomb events (nested columns kept as structs) to Parquet,
+    one file per batch_size matches within each competition_id / season_id
+    partition.
+
+    Written matches are checkpointed as in export_events_flat: a full run
+    replaces the previous output, resume=True only (re)writes missing or
+    changed matches, one file per match.
+
+    Returns the number of rows written.
+    """
+    out_root = Path(out_root)
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    tasks = match_tasks(data_root, manifest_path)
+    checkpoint = Checkpoint(out_root, match_fingerprints(manifest_path))
+
+    if resume:
+        todo = checkpoint.pending(tasks)
+        print(f"Partidos al día: {len(tasks) - len(todo)} | pendientes: {len(todo)}")
+
+        total_rows = 0
+        for task, df_events in zip(todo, map_matches(read_match_frame, todo, workers)):
+            total_rows += checkpoint.write_match(task, "events", df_events)
+
+        print(f"✅ Events exportados (resume, filas nuevas): {total_rows}")
+        print(f"📁 Salida: {out_root}")
+        return total_rows
+
+    # Export completo: sin ficheros ni checkpoint de ejecuciones anteriores
+    checkpoint.reset()
+    clear_outputs(out_root)
+
+    writer = BatchWriter(out_root, "events_batch")
+
+    def flush(key, buf, buf_tasks):
+        if buf:
+            writer.write(key, pl.concat(buf, how="diagonal_relaxed"))
+            checkpoint.record(buf_tasks, writer.last_file)
+
+    buffer = []
+    buffer_tasks = []
+    current_key = None  # (competition_id, season_id)
+
+    for task, df_events in zip(tasks, map_matches(read_match_frame, tasks, workers)):
+        key = (task[1], task[2])
+
+        if current_key is None:
+            current_key = key
+
+        # Si cambiamos de competition/season, volcamos lo acumulado antes
+        if key != current_key:
+            flush(current_key, buffer, buffer_tasks)
+            buffer, buffer_tasks = [], []
+            current_key = key
+
+        buffer.append(df_events)
+        buffer_tasks.append(task)
+
+        # Flush por tamaño de batch
+        if len(buffer) >= batch_size:
+            flush(current_key, buffer, buffer_tasks)
+            buffer, buffer_tasks = [], []
+
+    # Flush final
+    flush(current_key, buffer, buffer_tasks)
+
+    print(f"✅ Events exportados (filas totales): {writer.total_rows}")
+    print(f"📁 Salida: {out_root}")
+
+    return writer.total_rows
+
+
+if __name__ == "__main__":
+    export_events_parquet()
@@ -0,0 +1,275 @@
+from pathlib import Path
+import hashlib
+import json
+import polars as pl
+
+from football_risk_analytics.ingestion.sources import DataFile, DataSource, open_source
+
+
+# Ficheros por partido que se huellan en el manifest: prefijo de columna -> carpeta
+MATCH_FILES = {
+    "events": "events",
+    "lineups": "lineups",
+    "threesixty": "three-sixty",
+}
+
+FINGERPRINT_SCHEMA = {
+    "size": pl.Int64,
+    "mtime_ns": pl.Int64,
+    "hash": pl.String,
+}
+
+
+def read_json(path: Path | DataFile):
+    # DataFile: el contenido (descomprimido) va directo al parser, sin tocar disco
+    if isinstance(path, DataFile):
+        with path.open() as f:
+            return json.load(f)
+    with Path(path).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def match_tasks(
+    data_root: str | DataSource = "data",
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+    match_ids: set[int] | None = None,
+) -> list[tuple[DataFile, int, int, int]]:
+    """
+    List (events_file, competition_id, season_id, match_id) for every
+    manifest match with an events file, sorted by partition and match_id.
+
+    data_root may be a directory or a zip / tar archive (see open_source).
+    match_ids restricts the list, e.g. to changed_match_ids().
+    """
+    source = open_source(data_root)
+    df_manifest = pl.read_parquet(manifest_path).filter(pl.col("has_events") == True)
+    if match_ids is not None:
+        df_manifest = df_manifest.filter(pl.col("match_id").is_in(list(match_ids)))
+    df_manifest = df_manifest.sort(["competition_id", "season_id", "match_id"])
+
+    return [
+        (
+            source.file(f"events/{int(row['match_id'])}.json"),
+            int(row["competition_id"]),
+            int(row["season_id"]),
+            int(row["match_id"]),
+        )
+        for row in df_manifest.iter_rows(named=True)
+    ]
+
+
+def file_hash(file: DataFile) -> str:
+    """
+    Hash of a file's (decompressed) content (blake2b, 128 bits), read in
+    chunks. A match keeps its hash if its file is later gzipped or archived.
+    """
+    with file.open() as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def list_match_files(source: DataSource, folder: str) -> dict[int, tuple[DataFile, int, int]]:
+    """
+    List {match_id: (file, size, mtime_ns)} for the <match_id>.json files in
+    folder with a single listing (os.scandir, or the archive index).
+
+    A missing folder yields an empty dict (e.g. no three-sixty download).
+    """
+    files = {}
+    for name, (size, mtime_ns) in source.listdir(folder).items():
+        stem, ext = name.rsplit(".", 1) if "." in name else (name, "")
+        if ext != "json" or not stem.isdigit():
+            continue
+        files[int(stem)] = (source.file(f"{folder}/{name}"), size, mtime_ns)
+    return files
+
+
+def previous_fingerprints(manifest_path: Path) -> dict[str, dict[int, tuple]]:
+    """
+    Read {prefix: {match_id: (size, mtime_ns, hash)}} from an existing
+    manifest. Manifests written before fingerprinting give empty dicts.
+    """
+    previous = {prefix: {} for prefix in MATCH_FILES}
+    if not manifest_path.exists():
+        return previous
+
+    df = pl.read_parquet(manifest_path)
+    for prefix in MATCH_FILES:
+        cols = [f"{prefix}_{name}" for name in FINGERPRINT_SCHEMA]
+        if not set(cols).issubset(df.columns):
+            continue
+        for match_id, size, mtime_ns, digest in df.select(["match_id", *cols]).iter_rows():
+            if digest is not None:
+                previous[prefix][match_id] = (size, mtime_ns, digest)
+    return previous
+
+
+def build_manifest(
+    data_root: str | DataSource = "data",
+    out_root: str = "lakehouse/manifests",
+    full: bool = False,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Build match_manifest.parquet and match_manifest_changes.parquet.
+
+    For every match listed in data/matches the manifest stores, for the
+    events, lineups and three-sixty files, has_<file> plus the file size,
+    mtime_ns and a content hash. Each folder is listed once with os.scandir
+    instead of one exists() call per match and file.
+
+    data_root may be a directory (plain or per-file .json.gz) or a zip / tar
+    archive, read in place (see open_source).
+
+    Hashes from the previous manifest are reused when size and mtime_ns are
+    unchanged, so only new or touched files are read. full=True rehashes
+    every file.
+
+    The changes file lists the matches whose files were added, modified or
+    removed since the previous manifest (status = new / modified / removed),
+    so exporters can reprocess only those matches.
+
+    Returns (manifest, changes).
+    """
+    source = open_source(data_root)
+    out_root = Path(out_root)
+    out_root.mkdir(parents=True, exist_ok=True)
+    out_file = out_root / "match_manifest.parquet"
+    changes_file = out_root / "match_manifest_changes.parquet"
+
+    previous = previous_fingerprints(out_file)
+    had_manifest = out_file.exists()
+    previous_matches = (
+        set(pl.read_parquet(out_file, columns=["match_id"])["match_id"].to_list())
+        if had_manifest else set()
+    )
+
+    listings = {prefix: list_match_files(source, folder) for prefix, folder in MATCH_FILES.items()}
+
+    competitions = read_json(source.file("competitions.json"))
+
+    rows = []
+    changes = []
+    hashed = 0
+
+    for comp in competitions:
+        competition_id = comp["competition_id"]
+        season_id = comp["season_id"]
+
+        matches_path = source.file(f"matches/{competition_id}/{season_id}.json")
+        if not matches_path.exists():
+            continue
+
+        matches = read_json(matches_path)
+
+        for m in matches:
+            match_id = m["match_id"]
+
+            row = {
+                "competition_id": competition_id,
+                "season_id": season_id,
+                "match_id": match_id,
+                "match_date": m.get("match_date"),
+            }
+            changed = False
+
+            for prefix, listing in listings.items():
+                entry = listing.get(match_id)
+                prev = previous[prefix].get(match_id)
+
+                if entry is None:
+                    size = mtime_ns = digest = None
+                else:
+                    path, size, mtime_ns = entry
+                    # mismo tamaño y mtime: reutilizamos el hash anterior
+                    if not full and prev is not None and prev[:2] == (size, mtime_ns):
+                        digest = prev[2]
+                    else:
+                        digest = file_hash(path)
+                        hashed += 1
+
+                row[f"has_{prefix}"] = entry is not None
+                row[f"{prefix}_size"] = size
+                row[f"{prefix}_mtime_ns"] = mtime_ns
+                row[f"{prefix}_hash"] = digest
+
+                if digest != (prev[2] if prev is not None else None):
+                    changed = True
+
+            rows.append(row)
+
+            if match_id not in previous_matches:
+                changes.append((competition_id, season_id, match_id, "new"))
+            elif changed:
+                changes.append((competition_id, season_id, match_id, "modified"))
+
+    schema = {
+        "competition_id": pl.Int64,
+        "season_id": pl.Int64,
+        "match_id": pl.Int64,
+        "match_date": pl.String,
+    }
+    for prefix in MATCH_FILES:
+        schema[f"has_{prefix}"] = pl.Boolean
+    for prefix in MATCH_FILES:
+        for name, dtype in FINGERPRINT_SCHEMA.items():
+            schema[f"{prefix}_{name}"] = dtype
+
+    df = pl.DataFrame(rows, schema=schema)
+
+    # partidos que estaban en el manifest anterior y ya no aparecen
+    if had_manifest:
+        current = set(df["match_id"].to_list())
+        removed = (
+            pl.read_parquet(out_file, columns=["competition_id", "season_id", "match_id"])
+            .filter(~pl.col("match_id").is_in(list(current)))
+        )
+        for competition_id, season_id, match_id in removed.iter_rows():
+            changes.append((competition_id, season_id, match_id, "removed"))
+
+    df_changes = pl.DataFrame(
+        changes,
+        schema={"competition_id": pl.Int64, "season_id": pl.Int64, "match_id": pl.Int64, "status": pl.String},
+        orient="row",
+    ).sort(["competition_id", "season_id", "match_id"])
+
+    df.write_parquet(out_file)
+    df_changes.write_parquet(changes_file)
+
+    print("✅ Manifest creado:", out_file)
+    print("Total partidos:", df.shape[0])
+    print(f"Ficheros hasheados: {hashed} | cambios desde la última ejecución: {df_changes.height}")
+    print(df.select([
+        (pl.col("has_events").mean() * 100).alias("pct_events"),
+        (pl.col("has_lineups").mean() * 100).alias("pct_lineups"),
+        (pl.col("has_threesixty").mean() * 100).alias("pct_360"),
+    ]))
+    if df_changes.height:
+        print(df_changes.group_by("status").len().sort("status"))
+
+    return df, df_changes
+
+
+def changed_match_ids(
+    changes_path: str = "lakehouse/manifests/match_manifest_changes.parquet",
+    statuses: tuple[str, ...] = ("new", "modified"),
+) -> set[int]:
+    """
+    match_ids from the last build_manifest run with one of the given statuses.
+    """
+    return set(
+        pl.read_parquet(changes_path)
+        .filter(pl.col("status").is_in(list(statuses)))["match_id"]
+        .to_list()
+    )
+
+
+def match_fingerprints(
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+) -> dict[int, str | None]:
+    """
+    {match_id: events_hash} from the manifest. Manifests built before
+    fingerprinting map every match to None.
+    """
+    df = pl.read_parquet(manifest_path)
+    if "events_hash" not in df.columns:
+        return {match_id: None for match_id in df["match_id"].to_list()}
+    return dict(df.select(["match_id", "events_hash"]).iter_rows())
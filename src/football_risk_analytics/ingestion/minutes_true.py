@@ -0,0 +1,498 @@
+from pathlib import Path
+import polars as pl
+import pyarrow as pa
+
+from football_risk_analytics.ingestion.events_flat import map_matches
+from football_risk_analytics.ingestion.manifest import match_tasks, read_json
+from football_risk_analytics.ingestion.sources import DataFile
+from football_risk_analytics.ingestion.writers import BatchWriter, StreamingParquetWriter, clear_outputs
+
+
+MINUTES_TRUE_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("team", pa.string()),
+    ("player_id", pa.int64()),
+    ("player", pa.string()),
+    ("start_minute", pa.int64()),
+    ("end_minute", pa.int64()),
+    ("minutes_played", pa.int64()),
+    ("match_max_minute", pa.int64()),
+])
+
+
+def event_type(e):
+    t = e.get("type")
+    return (t or {}).get("name") if isinstance(t, dict) else None
+
+
+def match_minutes_true(events: list[dict], comp_id: int, season_id: int, match_id: int) -> list[dict]:
+    """
+    Derive per-player playing intervals for one match from its raw events.
+
+    Starters play from 0, substitutions move start/end, red cards and
+    second yellows cut the interval. Match length is capped at 130.
+    """
+    if not events:
+        return []
+
+    # Duración del partido (cap 130)
+    match_max = max([e.get("minute", 0) or 0 for e in events])
+    match_max = min(int(match_max), 130)
+
+    # 1) Starting XI -> starters por equipo
+    starters = {}  # team_name -> {player_id: player_name}
+    for e in events:
+        if event_type(e) == "Starting XI":
+            team_name = ((e.get("team") or {}).get("name")) if isinstance(e.get("team"), dict) else None
+            tactics = e.get("tactics") or {}
+            lineup = tactics.get("lineup") or []
+            if team_name is None:
+                continue
+            if team_name not in starters:
+                starters[team_name] = {}
+            for p in lineup:
+                player = p.get("player") or {}
+                pid = player.get("id")
+                pname = player.get("name")
+                if pid is not None:
+                    starters[team_name][int(pid)] = pname
+
+    # Si por lo que sea no hay Starting XI, saltamos (raro, pero posible)
+    if not starters:
+        return []
+
+    # 2) Inicializamos intervals: starters juegan 0 -> match_max
+    # intervals[(team, player_id)] = {"player": name, "start": 0, "end": match_max}
+    intervals = {}
+    for team_name, plist in starters.items():
+        for pid, pname in plist.items():
+            intervals[(team_name, pid)] = {"player": pname, "start": 0, "end": match_max}
+
+    # 3) Procesamos substitutions en orden cronológico
+    # Substitution event: e["player"] = el que sale; e["substitution"]["replacement"] = el que entra
+    # Nota: un jugador puede entrar y luego salir (segunda sustitución) -> lo soportamos
+    events_sorted = sorted(events, key=lambda x: (x.get("minute", 0) or 0, x.get("second", 0) or 0))
+
+    for e in events_sorted:
+        if event_type(e) != "Substitution":
+            continue
+
+        team_name = ((e.get("team") or {}).get("name")) if isinstance(e.get("team"), dict) else None
+        if team_name is None:
+            continue
+
+        minute = e.get("minute", 0) or 0
+        minute = max(0, min(int(minute), match_max))
+
+        off_player = (e.get("player") or {})
+        off_id = off_player.get("id")
+
+        sub = e.get("substitution") or {}
+        rep = sub.get("replacement") or {}
+        on_id = rep.get("id")
+        on_name = rep.get("name")
+
+        # El que sale: end = minute
+        if off_id is not None:
+            key_off = (team_name, int(off_id))
+            if key_off in intervals:
+                intervals[key_off]["end"] = min(intervals[key_off]["end"], minute)
+            else:
+                # edge: sale alguien no detectado en starting xi (raro)
+                intervals[key_off] = {"player": off_player.get("name"), "start": 0, "end": minute}
+
+        # El que entra: start = minute, end = match_max
+        if on_id is not None:
+            key_on = (team_name, int(on_id))
+            # si ya existía por alguna razón, no pisamos el start si es 0
+            if key_on not in intervals:
+                intervals[key_on] = {"player": on_name, "start": minute, "end": match_max}
+            else:
+                # si estaba (caso raro), ajustamos start al minuto de entrada si tiene start=0
+                intervals[key_on]["start"] = max(intervals[key_on]["start"], minute)
+
+    # 4) (Opcional simple) Ajuste por roja directa o 2ª amarilla.
+    # StatsBomb suele tener eventos "Bad Behaviour" o "Foul Committed" con card.
+    # Para no complicarlo demasiado: si detectamos card roja asociada a player_id,
+    # cortamos su end en ese minuto.
+    for e in events_sorted:
+        minute = e.get("minute", 0) or 0
+        minute = max(0, min(int(minute), match_max))
+        t = event_type(e)
+        if t not in ("Foul Committed", "Bad Behaviour"):
+            continue
+
+        player = e.get("player") or {}
+        pid = player.get("id")
+        if pid is None:
+            continue
+
+        card_name = None
+        if t == "Foul Committed":
+            fc = e.get("foul_committed") or {}
+            card = fc.get("card") or {}
+            card_name = card.get("name")
+        elif t == "Bad Behaviour":
+            bb = e.get("bad_behaviour") or {}
+            card = bb.get("card") or {}
+            card_name = card.get("name")
+
+        if card_name in ("Red Card", "Second Yellow"):
+            team_name = ((e.get("team") or {}).get("name")) if isinstance(e.get("team"), dict) else None
+            if team_name is None:
+                continue
+            key = (team_name, int(pid))
+            if key in intervals:
+                intervals[key]["end"] = min(intervals[key]["end"], minute)
+
+    # 5) Emitimos filas
+    rows = []
+    for (team_name, pid), itv in intervals.items():
+        start = int(itv["start"])
+        end = int(itv["end"])
+        minutes_played = max(0, end - start)
+        rows.append({
+            "competition_id": comp_id,
+            "season_id": season_id,
+            "match_id": match_id,
+            "team": team_name,
+            "player_id": pid,
+            "player": itv.get("player"),
+            "start_minute": start,
+            "end_minute": end,
+            "minutes_played": minutes_played,
+            "match_max_minute": match_max,
+        })
+
+    return rows
+
+
+PARTITION_KEYS = ["competition_id", "season_id", "match_id"]
+
+CARD_CUTOFFS = ("Red Card", "Second Yellow")
+
+
+def _field(schema: pl.Schema, column: str, *path: str, dtype: pl.DataType) -> pl.Expr:
+    """
+    Expression for a (nested) raw events field cast to dtype, or a typed
+    null when the column or a struct field on the path is missing: raw
+    events files only carry the keys present in their matches.
+    """
+    dt = schema.get(column)
+    if dt is None:
+        return pl.lit(None, dtype)
+
+    expr = pl.col(column)
+    for name in path:
+        fields = {f.name: f.dtype for f in dt.fields} if isinstance(dt, pl.Struct) else {}
+        if name not in fields:
+            return pl.lit(None, dtype)
+        expr = expr.struct.field(name)
+        dt = fields[name]
+    return expr.cast(dtype)
+
+
+_NAMED = pl.Struct({"name": pl.String})
+_PERSON = pl.Struct({"id": pl.Int64, "name": pl.String})
+
+# Campos de los events que usa el cálculo de minutos
+MINUTES_EVENTS_SCHEMA = {
+    "minute": pl.Int64,
+    "second": pl.Int64,
+    "type": _NAMED,
+    "team": _NAMED,
+    "player": _PERSON,
+    "tactics": pl.Struct({"lineup": pl.List(pl.Struct({"player": _PERSON}))}),
+    "substitution": pl.Struct({"replacement": _PERSON}),
+    "foul_committed": pl.Struct({"card": _NAMED}),
+    "bad_behaviour": pl.Struct({"card": _NAMED}),
+}
+
+LINEUP_DTYPE = pl.List(pl.Struct({"player_id": pl.Int64, "player": pl.String}))
+
+
+def narrow_events(events: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Project a raw events frame (bronze/events layout) onto the flat columns
+    the minutes computation needs, with the same schema for every input.
+    """
+    schema = events.collect_schema()
+    event_type_ = _field(schema, "type", "name", dtype=pl.String)
+
+    lineup_dtype = schema.get("tactics")
+    lineup_fields = {}
+    if isinstance(lineup_dtype, pl.Struct):
+        lineup_dtype = {f.name: f.dtype for f in lineup_dtype.fields}.get("lineup")
+        if isinstance(lineup_dtype, pl.List) and isinstance(lineup_dtype.inner, pl.Struct):
+            player_dtype = {f.name: f.dtype for f in lineup_dtype.inner.fields}.get("player")
+            if isinstance(player_dtype, pl.Struct):
+                lineup_fields = {f.name for f in player_dtype.fields}
+
+    if "id" in lineup_fields:
+        player = pl.element().struct.field("player")
+        lineup = pl.col("tactics").struct.field("lineup").list.eval(pl.struct(
+            player.struct.field("id").cast(pl.Int64).alias("player_id"),
+            (player.struct.field("name").cast(pl.String) if "name" in lineup_fields else pl.lit(None, pl.String)).alias("player"),
+        ))
+    else:
+        lineup = pl.lit(None, LINEUP_DTYPE)
+
+    return events.select(
+        *[pl.col(c).cast(pl.Int64) for c in PARTITION_KEYS],
+        _field(schema, "minute", dtype=pl.Int64).fill_null(0).alias("minute"),
+        _field(schema, "second", dtype=pl.Int64).fill_null(0).alias("second"),
+        event_type_.alias("type"),
+        _field(schema, "team", "name", dtype=pl.String).alias("team"),
+        _field(schema, "player", "id", dtype=pl.Int64).alias("player_id"),
+        _field(schema, "player", "name", dtype=pl.String).alias("player"),
+        _field(schema, "substitution", "replacement", "id", dtype=pl.Int64).alias("replacement_id"),
+        _field(schema, "substitution", "replacement", "name", dtype=pl.String).alias("replacement"),
+        pl.when(event_type_ == "Foul Committed")
+        .then(_field(schema, "foul_committed", "card", "name", dtype=pl.String))
+        .when(event_type_ == "Bad Behaviour")
+        .then(_field(schema, "bad_behaviour", "card", "name", dtype=pl.String))
+        .alias("card"),
+        lineup.cast(LINEUP_DTYPE).alias("lineup"),
+    )
+
+
+def minutes_true_frame(events: pl.LazyFrame) -> pl.DataFrame:
+    """
+    Columnar version of match_minutes_true over many matches at once.
+
+    events is a narrow_events frame with each match's events in file order.
+    Same rules as the per-match loop:
+    - matches without a Starting XI (with team) give no rows
+    - starters play from 0, match length is capped at 130
+    - start = last entry minute, end = first exit minute (a player can come
+      on and go off again), capped by red / second yellow cards
+    - players first seen in a substitution take the name from that event
+
+    Rows come out in the loop's order: matches by partition and match_id,
+    starters by team and lineup order, then players added by substitutions.
+    """
+    player_key = ["team", "player_id"]
+    key = PARTITION_KEYS + player_key
+
+    ev = events.with_row_index("event_idx")
+
+    matches = ev.group_by(PARTITION_KEYS).agg(
+        pl.col("minute").max().clip(upper_bound=130).alias("match_max_minute")
+    )
+
+    # Minuto del evento acotado a [0, duración]
+    ev = ev.join(matches, on=PARTITION_KEYS, how="inner").with_columns(
+        pl.col("minute").clip(0, pl.col("match_max_minute")).alias("minute_c")
+    )
+
+    # 1) Starting XI -> starters por equipo (orden de aparición; último nombre gana)
+    xi = ev.filter((pl.col("type") == "Starting XI") & pl.col("team").is_not_null())
+    xi_teams = xi.group_by(PARTITION_KEYS + ["team"]).agg(pl.col("event_idx").min().alias("team_order"))
+    starters = (
+        xi.select(PARTITION_KEYS + ["team", "lineup"])
+        .explode("lineup")
+        .with_row_index("lineup_idx")
+        .unnest("lineup")
+        .filter(pl.col("player_id").is_not_null())
+        .group_by(key)
+        .agg(
+            pl.col("player").sort_by("lineup_idx").last().alias("starter_name"),
+            pl.col("lineup_idx").min().alias("starter_order"),
+        )
+        .join(xi_teams, on=PARTITION_KEYS + ["team"], how="left")
+    )
+
+    # 2) Substitutions en orden cronológico: sale player, entra replacement
+    subs = ev.filter((pl.col("type") == "Substitution") & pl.col("team").is_not_null())
+    sides = pl.concat([
+        subs.filter(pl.col("player_id").is_not_null()).select(
+            key + ["player", "minute_c", "minute", "second", "event_idx", pl.lit(0).alias("side")]
+        ),
+        subs.filter(pl.col("replacement_id").is_not_null()).select(
+            PARTITION_KEYS + [
+                "team",
+                pl.col("replacement_id").alias("player_id"),
+                pl.col("replacement").alias("player"),
+                "minute_c", "minute", "second", "event_idx",
+                pl.lit(1).alias("side"),
+            ]
+        ),
+    ])
+    subbed = (
+        sides.sort(["minute", "second", "event_idx", "side"])
+        .with_row_index("sub_idx")
+        .group_by(key)
+        .agg(
+            pl.col("player").sort_by("sub_idx").first().alias("sub_name"),
+            pl.col("sub_idx").min().alias("sub_order"),
+            pl.col("minute_c").filter(pl.col("side") == 1).max().alias("on_minute"),
+            pl.col("minute_c").filter(pl.col("side") == 0).min().alias("off_minute"),
+        )
+    )
+
+    # 3) Roja directa o 2ª amarilla: corta el intervalo
+    cards = (
+        ev.filter(
+            pl.col("type").is_in(["Foul Committed", "Bad Behaviour"])
+            & pl.col("player_id").is_not_null()
+            & pl.col("team").is_not_null()
+            & pl.col("card").is_in(CARD_CUTOFFS)
+        )
+        .group_by(key)
+        .agg(pl.col("minute_c").min().alias("card_minute"))
+    )
+
+    return (
+        starters.join(subbed, on=key, how="full", coalesce=True)
+        .join(xi_teams.select(PARTITION_KEYS).unique(), on=PARTITION_KEYS, how="semi")
+        .join(cards, on=key, how="left")
+        .join(matches, on=PARTITION_KEYS, how="left")
+        .with_columns(
+            pl.when(pl.col("starter_order").is_not_null())
+            .then(pl.col("starter_name"))
+            .otherwise(pl.col("sub_name"))
+            .alias("player"),
+            pl.col("on_minute").fill_null(0).alias("start_minute"),
+            pl.min_horizontal("match_max_minute", "off_minute", "card_minute").alias("end_minute"),
+            # starters primero, luego los que aparecen en sustituciones
+            pl.col("starter_order").is_null().cast(pl.Int64).alias("phase"),
+        )
+        .with_columns((pl.col("end_minute") - pl.col("start_minute")).clip(lower_bound=0).alias("minutes_played"))
+        .sort(PARTITION_KEYS + ["phase", "team_order", "starter_order", "sub_order"], nulls_last=True)
+        .select(MINUTES_TRUE_SCHEMA.names)
+        .collect()
+    )
+
+
+def read_match_events(task: tuple[DataFile, int, int, int]) -> pl.DataFrame:
+    """
+    Read the MINUTES_EVENTS_SCHEMA subset of one match events file.
+
+    polars parses the JSON natively and skips every other key, which is
+    much cheaper than inferring the full nested schema of the events.
+    """
+    events_file, comp_id, season_id, match_id = task
+    with events_file.open() as f:
+        events = pl.read_json(f, schema=MINUTES_EVENTS_SCHEMA)
+    return events.with_columns(
+        pl.lit(comp_id, pl.Int64).alias("competition_id"),
+        pl.lit(season_id, pl.Int64).alias("season_id"),
+        pl.lit(match_id, pl.Int64).alias("match_id"),
+    )
+
+
+def scan_events_narrow(events_root: str | Path) -> pl.LazyFrame:
+    """
+    Narrowed events of every bronze/events file. Each file is projected on
+    its own, since raw files differ in schema.
+    """
+    files = sorted(Path(events_root).glob("*/*/*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"No hay ficheros de events en {events_root} (ejecuta export_events_parquet)")
+    return pl.concat([narrow_events(pl.scan_parquet(f, hive_partitioning=False)) for f in files], rechunk=True)
+
+
+def read_match_minutes(task: tuple[DataFile, int, int, int]) -> list[dict]:
+    events_file, comp_id, season_id, match_id = task
+    return match_minutes_true(read_json(events_file), comp_id, season_id, match_id)
+
+
+def export_player_match_minutes_true(
+    data_root: str = "data",
+    manifest_path: str = "lakehouse/manifests/match_manifest.parquet",
+    out_root: str = "lakehouse/bronze/player_match_minutes_true",
+    workers: int = 1,
+    print_every: int = 100,
+    streaming: bool = False,
+    memory_limit_mb: float = 64,
+    engine: str = "columnar",
+    events_root: str | None = None,
+) -> int:
+    """
+    Export true minutes played per player-match, derived from raw events,
+    one file per competition_id / season_id partition.
+
+    engine="columnar" (default) computes every match in one vectorized
+    pass (minutes_true_frame). Events are read from the bronze/events
+    Parquet files under events_root when given, otherwise from the JSON
+    files (only the fields it needs, parsed by the workers). engine="python" runs the per-match loop
+    (match_minutes_true); both give the same rows.
+
+    With streaming=True the per-match engine is used and rows are written
+    per match as typed record batches (MINUTES_TRUE_SCHEMA), holding only
+    up to memory_limit_mb of them at any time.
+
+    Returns the number of rows written.
+    """
+    if engine not in ("columnar", "python"):
+        raise ValueError(f"engine desconocido: {engine} (columnar | python)")
+
+    out_root = Path(out_root)
+    out_root.mkdir(parents=True, exist_ok=True)
+    # Export completo con nombre fijo: sin esto quedarían los ficheros compactados de antes al lado
+    clear_outputs(out_root)
+
+    tasks = match_tasks(data_root, manifest_path)
+
+    if streaming:
+        writer = StreamingParquetWriter(
+            out_root, "player_match_minutes_true", MINUTES_TRUE_SCHEMA,
+            numbered=False, memory_limit_mb=memory_limit_mb,
+        )
+        for processed, (task, rows_match) in enumerate(
+            zip(tasks, map_matches(read_match_minutes, tasks, workers)), start=1
+        ):
+            writer.write_rows((task[1], task[2]), rows_match)
+            if processed % print_every == 0:
+                print(f"Procesados {processed}/{len(tasks)} partidos | filas minutos: {writer.total_rows}")
+        writer.close()
+
+        print("✅ Export terminado (streaming)")
+        print("Filas totales:", writer.total_rows)
+        print("Salida:", out_root)
+        return writer.total_rows
+
+    if engine == "columnar":
+        if events_root is not None:
+            events = scan_events_narrow(events_root)
+        else:
+            frames = list(map_matches(read_match_events, tasks, workers))
+            # rechunk: polars falla con columnas struct de varios chunks en los joins
+            events = narrow_events(pl.concat(frames, rechunk=True).lazy()) if frames else None
+        df = minutes_true_frame(events) if events is not None else pl.from_arrow(MINUTES_TRUE_SCHEMA.empty_table())
+    else:
+        rows = []
+        processed = 0
+
+        for rows_match in map_matches(read_match_minutes, tasks, workers):
+            rows.extend(rows_match)
+
+            processed += 1
+            if processed % print_every == 0:
+                print(f"Procesados {processed}/{len(tasks)} partidos | filas minutos: {len(rows)}")
+
+        df = pl.from_dicts(rows, infer_schema_length=None)
+
+    # Particionado por comp/season
+    writer = BatchWriter(out_root, "player_match_minutes_true", numbered=False)
+    for (comp_id, season_id), part in df.group_by(["competition_id", "season_id"]):
+        writer.write((comp_id, season_id), part)
+
+    print("✅ Export terminado")
+    print("Filas totales:", df.height)
+    print(
+        "Min/Max minutes_played:",
+        df.select([
+            pl.col("minutes_played").min().alias("min_minutes"),
+            pl.col("minutes_played").max().alias("max_minutes"),
+        ]).to_dicts()
+    )
+    print("Salida:", out_root)
+
+    return df.height
+
+
+if __name__ == "__main__":
+    export_player_match_minutes_true()
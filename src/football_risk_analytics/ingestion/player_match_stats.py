@@ -0,0 +1,66 @@
+import polars as pl
+import pyarrow as pa
+
+
+PLAYER_MATCH_STATS_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("player_id", pa.int64()),
+    ("player", pa.string()),
+    ("team", pa.string()),
+    ("events_count", pa.int64()),
+    ("shots", pa.int64()),
+    ("xg", pa.float64()),
+    ("passes", pa.int64()),
+    ("total_pass_length", pa.float64()),
+    ("carries", pa.int64()),
+    ("progressive_x", pa.float64()),
+])
+
+GROUP_KEYS = ["competition_id", "season_id", "match_id", "player_id", "player", "team"]
+
+
+def _sql_sum(expr: pl.Expr) -> pl.Expr:
+    # SUM de SQL: ignora nulos, pero si todos son nulos devuelve NULL (no 0)
+    return pl.when(expr.is_not_null().any()).then(expr.sum())
+
+
+def _is_type(name: str) -> pl.Expr:
+    # type NULL cuenta como "no es", igual que el CASE WHEN de SQL
+    return (pl.col("type") == name).fill_null(False)
+
+
+def match_player_stats(flat: pa.RecordBatch) -> pa.RecordBatch:
+    """
+    Aggregate one match of flattened events (EVENTS_FLAT_SCHEMA) into
+    per-player counts: events, shots, xg, passes, pass length, carries and
+    progressive_x.
+
+    Same definitions as the original player_match_stats GROUP BY, so the
+    table can be rebuilt as a union of these per-match rows. Events without
+    a player form their own (player_id = NULL) group, as in SQL.
+    """
+    df = pl.from_arrow(pa.Table.from_batches([flat])).with_columns(
+        pl.col(["type", "player", "team"]).cast(pl.String)
+    )
+
+    stats = df.group_by(GROUP_KEYS).agg(
+        pl.len().cast(pl.Int64).alias("events_count"),
+        _is_type("Shot").sum().cast(pl.Int64).alias("shots"),
+        _sql_sum(pl.when(_is_type("Shot")).then(pl.col("shot_statsbomb_xg")).otherwise(0.0)).alias("xg"),
+        _is_type("Pass").sum().cast(pl.Int64).alias("passes"),
+        _sql_sum(pl.col("pass_length")).alias("total_pass_length"),
+        _is_type("Carry").sum().cast(pl.Int64).alias("carries"),
+        pl.when(pl.col("end_x").is_not_null() & pl.col("x").is_not_null())
+        .then(pl.col("end_x") - pl.col("x"))
+        .otherwise(0.0)
+        .sum()
+        .alias("progressive_x"),
+    )
+
+    if stats.height == 0:
+        return pa.RecordBatch.from_pylist([], schema=PLAYER_MATCH_STATS_SCHEMA)
+
+    table = stats.to_arrow().select(PLAYER_MATCH_STATS_SCHEMA.names).cast(PLAYER_MATCH_STATS_SCHEMA)
+    return table.combine_chunks().to_batches()[0]
@@ -0,0 +1,269 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import gzip
+import os
+import tarfile
+import zipfile
+
+
+# Una instancia por (tipo, root) en cada proceso: el índice del archivo se lee una vez
+_SOURCES = {}
+
+
+def _restore_source(cls, root: str) -> "DataSource":
+    key = (cls, root)
+    if key not in _SOURCES:
+        _SOURCES[key] = cls(root)
+    return _SOURCES[key]
+
+
+class DataSource(ABC):
+    """
+    A StatsBomb open-data tree (competitions.json, matches/, events/,
+    lineups/, three-sixty/) addressed by paths relative to its data root,
+    e.g. "events/123.json".
+
+    A file may also be stored gzip-compressed as "<name>.gz": it is listed
+    and opened under its plain name and decompressed while it is read.
+
+    Sources pickle by type and root, without open handles. Unpickling
+    reuses one instance per process, so worker processes open and index an
+    archive once rather than once per task.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = str(root)
+
+    def __reduce__(self):
+        return _restore_source, (type(self), self.root)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.root!r})"
+
+    def file(self, rel: str) -> "DataFile":
+        return DataFile(self, rel)
+
+    @abstractmethod
+    def exists(self, rel: str) -> bool:
+        """Whether rel exists (plain or as rel.gz)."""
+
+    @abstractmethod
+    def open(self, rel: str):
+        """
+        Binary stream over the (decompressed) content of rel.
+        """
+
+    @abstractmethod
+    def listdir(self, rel: str) -> dict[str, tuple[int, int]]:
+        """
+        {name: (size, mtime_ns)} for the files directly under folder rel,
+        from a single listing. Missing folders give an empty dict.
+        """
+
+
+def _plain_name(name: str) -> str:
+    return name[:-3] if name.endswith(".gz") else name
+
+
+def _mtime_ns(seconds: float) -> int:
+    return int(seconds * 1_000_000_000)
+
+
+class DirectorySource(DataSource):
+    """
+    Loose files under a directory, optionally as per-file .json.gz.
+    """
+
+    def _path(self, rel: str) -> Path | None:
+        path = Path(self.root) / rel
+        if path.is_file():
+            return path
+        gz = path.with_name(path.name + ".gz")
+        return gz if gz.is_file() else None
+
+    def exists(self, rel: str) -> bool:
+        return self._path(rel) is not None
+
+    def open(self, rel: str):
+        path = self._path(rel)
+        if path is None:
+            raise FileNotFoundError(Path(self.root) / rel)
+        return gzip.open(path, "rb") if path.suffix == ".gz" else path.open("rb")
+
+    def listdir(self, rel: str) -> dict[str, tuple[int, int]]:
+        folder = Path(self.root) / rel
+        if not folder.is_dir():
+            return {}
+
+        files = {}
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                files[_plain_name(entry.name)] = (st.st_size, st.st_mtime_ns)
+        return files
+
+
+class ArchiveSource(DataSource):
+    """
+    Members of a zip or tar archive, read without extracting to disk.
+
+    The archive is indexed once. The data root inside it is the folder
+    holding competitions.json, so both "data/..." and GitHub snapshots
+    ("open-data-master/data/...") work.
+    """
+
+    def __init__(self, root: str | Path):
+        super().__init__(root)
+        self._archive = None
+        self._members = None
+        self._prefix = ""
+
+    @abstractmethod
+    def _open_archive(self):
+        """The open archive object."""
+
+    @abstractmethod
+    def _index(self) -> dict:
+        """{name: member} for the files of the archive."""
+
+    @abstractmethod
+    def _name(self, member) -> str:
+        """Path of member inside the archive."""
+
+    @abstractmethod
+    def _member_info(self, member) -> tuple[int, int]:
+        """(size, mtime_ns) of member."""
+
+    @abstractmethod
+    def _open_member(self, member):
+        """Binary stream over the raw content of member."""
+
+    def _load(self) -> None:
+        if self._members is not None:
+            return
+        self._archive = self._open_archive()
+        self._members = self._index()
+
+        roots = [
+            name[: -len("competitions.json")]
+            for name in self._members
+            if name == "competitions.json" or name.endswith("/competitions.json")
+        ]
+        self._prefix = min(roots, key=len) if roots else ""
+
+    def _member(self, rel: str):
+        self._load()
+        name = self._prefix + rel
+        return self._members.get(name) or self._members.get(name + ".gz")
+
+    def exists(self, rel: str) -> bool:
+        return self._member(rel) is not None
+
+    def open(self, rel: str):
+        member = self._member(rel)
+        if member is None:
+            raise FileNotFoundError(f"{self.root}:{self._prefix}{rel}")
+        stream = self._open_member(member)
+        return gzip.GzipFile(fileobj=stream, mode="rb") if self._name(member).endswith(".gz") else stream
+
+    def listdir(self, rel: str) -> dict[str, tuple[int, int]]:
+        self._load()
+        folder = self._prefix + rel.rstrip("/") + "/"
+
+        files = {}
+        for name, member in self._members.items():
+            if not name.startswith(folder):
+                continue
+            child = name[len(folder):]
+            if child and "/" not in child:
+                files[_plain_name(child)] = self._member_info(member)
+        return files
+
+
+class ZipSource(ArchiveSource):
+    def _open_archive(self):
+        return zipfile.ZipFile(self.root)
+
+    def _index(self) -> dict:
+        return {info.filename: info for info in self._archive.infolist() if not info.is_dir()}
+
+    def _name(self, member) -> str:
+        return member.filename
+
+    def _member_info(self, member) -> tuple[int, int]:
+        # las fechas zip no tienen zona horaria: las tratamos como UTC para que sean estables
+        stamp = datetime(*member.date_time, tzinfo=timezone.utc).timestamp()
+        return member.file_size, _mtime_ns(stamp)
+
+    def _open_member(self, member):
+        return self._archive.open(member)
+
+
+class TarSource(ArchiveSource):
+    """
+    Plain or compressed (gz, bz2, xz) tar archives.
+
+    Members are read by offset. In a compressed tar, reading a member that
+    comes before the previous one restarts decompression from the start,
+    so prefer zip or an uncompressed tar for large dumps.
+    """
+
+    def _open_archive(self):
+        return tarfile.open(self.root, "r:*")
+
+    def _index(self) -> dict:
+        return {info.name: info for info in self._archive.getmembers() if info.isfile()}
+
+    def _name(self, member) -> str:
+        return member.name
+
+    def _member_info(self, member) -> tuple[int, int]:
+        return member.size, _mtime_ns(member.mtime)
+
+    def _open_member(self, member):
+        return self._archive.extractfile(member)
+
+
+@dataclass(frozen=True)
+class DataFile:
+    """
+    One file of a DataSource. Picklable, so it can travel in worker tasks.
+    """
+
+    source: DataSource
+    rel: str
+
+    def open(self):
+        return self.source.open(self.rel)
+
+    def read_bytes(self) -> bytes:
+        with self.open() as f:
+            return f.read()
+
+    def exists(self) -> bool:
+        return self.source.exists(self.rel)
+
+    def __str__(self):
+        return f"{self.source.root}:{self.rel}"
+
+
+def open_source(data_root: str | Path | DataSource = "data") -> DataSource:
+    """
+    DataSource for data_root: a directory, a zip archive or a tar archive
+    (optionally compressed).
+    """
+    if isinstance(data_root, DataSource):
+        return data_root
+
+    path = Path(data_root)
+    if path.is_dir():
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    if path.is_file() and tarfile.is_tarfile(path):
+        return TarSource(path)
+    raise FileNotFoundError(f"DATA_ROOT no es un directorio ni un zip/tar: {data_root}")
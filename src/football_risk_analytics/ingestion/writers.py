@@ -0,0 +1,189 @@
+from pathlib import Path
+import os
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def partition_dir(out_root: Path, comp_id: int, season_id: int) -> Path:
+    return Path(out_root) / f"competition_id={comp_id}" / f"season_id={season_id}"
+
+
+def compact_table(table: pa.Table) -> pa.Table:
+    """
+    Merge per-match chunks into one, with a single dictionary per
+    dictionary-encoded column, so Parquet pages are not split per match.
+    """
+    return table.unify_dictionaries().combine_chunks()
+
+
+def tmp_path(path: Path) -> Path:
+    # oculto y sin extensión .parquet: los globs */*/*.parquet no lo leen
+    return path.with_name(f".{path.name}.tmp")
+
+
+def write_atomic(path: Path, data, parquet_options: dict | None = None) -> None:
+    """
+    Write a polars DataFrame or Arrow Table / RecordBatch to path through a
+    temporary file and os.replace, so readers never see a partial file.
+    """
+    tmp = tmp_path(path)
+    if isinstance(data, pl.DataFrame):
+        data.write_parquet(tmp)
+    else:
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        options = {"compression": "zstd", **(parquet_options or {})}
+        pq.write_table(compact_table(data), tmp, **options)
+    os.replace(tmp, path)
+
+
+def clear_outputs(out_root: str | Path) -> int:
+    """
+    Delete the Parquet files (and leftover temporary files) of every
+    partition under out_root, so a full export does not leave stale files
+    next to the new ones. Returns the number of files removed.
+    """
+    removed = 0
+    for pattern in ("*/*/*.parquet", "*/*/.*.tmp"):
+        for path in Path(out_root).glob(pattern):
+            path.unlink()
+            removed += 1
+    return removed
+
+
+class BatchWriter:
+    """
+    Write DataFrames as Parquet files under the competition_id / season_id
+    partition layout.
+
+    With numbered=True every write creates {prefix}_{idx:05d}.parquet, where
+    idx counts writes within the partition. Otherwise each write goes to
+    {prefix}.parquet, so callers must write each partition once.
+
+    parquet_options are passed to pyarrow when writing Arrow tables
+    (e.g. use_dictionary). Files are written atomically and last_file is the
+    most recent one completed.
+    """
+
+    def __init__(
+        self,
+        out_root: str | Path,
+        prefix: str,
+        numbered: bool = True,
+        parquet_options: dict | None = None,
+    ):
+        self.out_root = Path(out_root)
+        self.prefix = prefix
+        self.numbered = numbered
+        # zstd, igual que el valor por defecto de polars
+        self.parquet_options = {"compression": "zstd", **(parquet_options or {})}
+        self.batch_idx = {}
+        self.total_rows = 0
+        self.last_file = None
+
+    def next_file(self, key: tuple[int, int]) -> Path:
+        out_dir = partition_dir(self.out_root, *key)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        if not self.numbered:
+            return out_dir / f"{self.prefix}.parquet"
+
+        idx = self.batch_idx.get(key, 0)
+        self.batch_idx[key] = idx + 1
+        return out_dir / f"{self.prefix}_{idx:05d}.parquet"
+
+    def write(self, key: tuple[int, int], df: pl.DataFrame) -> int:
+        if df.height == 0:
+            return 0
+        self.last_file = self.next_file(key)
+        write_atomic(self.last_file, df)
+        self.total_rows += df.height
+        return df.height
+
+    def write_table(self, key: tuple[int, int], table: pa.Table) -> int:
+        if table.num_rows == 0:
+            return 0
+        self.last_file = self.next_file(key)
+        write_atomic(self.last_file, table, self.parquet_options)
+        self.total_rows += table.num_rows
+        return table.num_rows
+
+
+class StreamingParquetWriter(BatchWriter):
+    """
+    Stream rows into one Parquet file per partition as typed Arrow record
+    batches.
+
+    Rows are converted to a RecordBatch with the declared schema as soon as
+    they arrive. Batches are buffered until their size reaches
+    memory_limit_mb and then written out as one row group, so memory stays
+    bounded by the ceiling instead of growing with the dataset.
+
+    Partitions are expected to arrive contiguously (inputs sorted by
+    competition_id, season_id): the open file is closed when the partition
+    changes. Files are written under a temporary name and only renamed into
+    place on close.
+    """
+
+    def __init__(
+        self,
+        out_root: str | Path,
+        prefix: str,
+        schema: pa.Schema,
+        numbered: bool = True,
+        memory_limit_mb: float = 256,
+        parquet_options: dict | None = None,
+    ):
+        super().__init__(out_root, prefix, numbered=numbered, parquet_options=parquet_options)
+        self.schema = schema
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+        self.current_key = None
+        self.current_file = None
+        self.writer = None
+        self.batches = []
+        self.buffered_bytes = 0
+
+    def write_rows(self, key: tuple[int, int], rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        return self.write_batch(key, pa.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def write_batch(self, key: tuple[int, int], batch: pa.RecordBatch) -> int:
+        if key != self.current_key:
+            self.close()
+            self.current_key = key
+
+        self.batches.append(batch)
+        self.buffered_bytes += batch.nbytes
+        if self.buffered_bytes >= self.memory_limit_bytes:
+            self.flush()
+        return batch.num_rows
+
+    def flush(self) -> None:
+        if not self.batches:
+            return
+        if self.writer is None:
+            self.current_file = self.next_file(self.current_key)
+            self.writer = pq.ParquetWriter(tmp_path(self.current_file), self.schema, **self.parquet_options)
+
+        table = compact_table(pa.Table.from_batches(self.batches, schema=self.schema))
+        self.writer.write_table(table, row_group_size=table.num_rows)
+        self.total_rows += table.num_rows
+
+        self.batches = []
+        self.buffered_bytes = 0
+
+    def close(self) -> Path | None:
+        """
+        Flush and finalize the open file. Returns its path, or None if
+        nothing was written since the last close.
+        """
+        self.flush()
+        if self.writer is None:
+            return None
+        self.writer.close()
+        os.replace(tmp_path(self.current_file), self.current_file)
+        self.last_file = self.current_file
+        self.writer = None
+        return self.last_file
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from pathlib import Path
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import brier_score_loss, roc_auc_score
+
+from football_risk_analytics.modeling.feature_matrix import (
+    FEATURES,
+    ID_COLUMNS,
+    ensure_feature_matrix,
+    feature_array,
+    load_feature_matrix,
+    valid_rows,
+)
+from football_risk_analytics.modeling.train_baseline import LABEL, LABEL_DATE, baseline_model
+
+
+# Bloques semanales (lunes a domingo), como el notebook 05
+MIN_TRAIN_WEEKS = 20
+TEST_WEEKS = 4
+STEP_WEEKS = 4
+
+# Alertas por partido: los k jugadores con más riesgo de cada match_id
+TOP_K = 3
+
+
+@dataclass(frozen=True)
+class Fold:
+    fold: int
+    train_rows: np.ndarray
+    test_rows: np.ndarray
+    train_end: str
+    test_end: str
+
+
+def week_starts(match_dates) -> np.ndarray:
+    """
+    Monday of the week of each date, as datetime64[D].
+    """
+    days = np.asarray(match_dates, dtype="datetime64[D]").astype(np.int64)
+    # 1970-01-01 fue jueves: el día 4 es el primer lunes
+    return ((days - 4) // 7 * 7 + 4).astype("datetime64[D]")
+
+
+def walk_forward_folds(
+    match_dates,
+    min_train_weeks: int = MIN_TRAIN_WEEKS,
+    test_weeks: int = TEST_WEEKS,
+    step_weeks: int = STEP_WEEKS,
+    label_dates=None,
+) -> list[Fold]:
+    """
+    Chronological folds over the weeks that have matches: fold i trains on
+    every week before its test block and tests on the next test_weeks
+    weeks; the test block moves step_weeks forward each fold. Rows are
+    positions in match_dates.
+
+    label_dates is when each row's label becomes known (the date of the
+    next match for high_risk_next). Train rows whose label date falls on
+    or after the start of the test block are purged, so no fold trains on
+    an outcome from its test weeks.
+    """
+    weeks = week_starts(match_dates)
+    uniq = np.unique(weeks)
+    known = None if label_dates is None else np.asarray(label_dates, dtype="datetime64[D]")
+
+    folds = []
+    start = min_train_weeks
+    while start + test_weeks <= len(uniq):
+        train = weeks < uniq[start]
+        if known is not None:
+            # NaT (fecha desconocida) compara False: también se purga
+            train &= known < uniq[start]
+        train_rows = np.flatnonzero(train)
+        test_rows = np.flatnonzero((weeks >= uniq[start]) & (weeks <= uniq[start + test_weeks - 1]))
+        folds.append(
+            Fold(len(folds) + 1, train_rows, test_rows, str(uniq[start - 1]), str(uniq[start + test_weeks - 1]))
+        )
+        start += step_weeks
+    return folds
+
+
+def precision_at_k(y_true: np.ndarray, scores: np.ndarray, groups: np.ndarray, k: int = TOP_K) -> float:
+    """
+    Share of positives among the k highest scores of each group (ties by
+    position), e.g. the k alerts per match.
+    """
+    if len(y_true) == 0:
+        return float("nan")
+    order = np.lexsort((-scores, groups))
+    sorted_groups = groups[order]
+    group_start = np.r_[0, np.flatnonzero(sorted_groups[1:] != sorted_groups[:-1]) + 1]
+    rank = np.arange(len(order)) - np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+    return float(y_true[order][rank < k].mean())
+
+
+def evaluate_fold(
+    path: str,
+    fold: Fold,
+    features: list[str] = FEATURES,
+    label: str = LABEL,
+    k: int = TOP_K,
+    model_factory=baseline_model,
+) -> dict:
+    """
+    Train on the fold's train rows of the feature matrix at path and score
+    its test rows. Runs in a joblib worker: the matrix is memory-mapped
+    again here, so workers share the file pages and only the fold's rows
+    are copied.
+    """
+    start = time.perf_counter()
+    matrix = load_feature_matrix(path)
+    train = matrix.take(fold.train_rows)
+    test = matrix.take(fold.test_rows)
+
+    # float64 como train_baseline: lbfgs sobre float32 converge a otra solución
+    X_train = pd.DataFrame(feature_array(train, features, dtype=np.float64), columns=features)
+    X_test = pd.DataFrame(feature_array(test, features, dtype=np.float64), columns=features)
+    y_train = train.column(label).to_numpy()
+    y_test = test.column(label).to_numpy()
+
+    model = model_factory()
+    model.fit(X_train, y_train)
+    scores = model.predict_proba(X_test)[:, 1]
+
+    # AUC sin definir si el bloque de test tiene una sola clase
+    auc = roc_auc_score(y_test, scores) if len(np.unique(y_test)) > 1 else float("nan")
+    return {
+        "fold": fold.fold,
+        "train_end": fold.train_end,
+        "test_end": fold.test_end,
+        "train_rows": len(fold.train_rows),
+        "test_rows": len(fold.test_rows),
+        "prevalence": float(y_test.mean()),
+        "auc": float(auc),
+        "brier": float(brier_score_loss(y_test, scores)),
+        f"precision_at_{k}": precision_at_k(y_test, scores, test.column("match_id").to_numpy(), k),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_backtest(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_dataset_predictive",
+    features: list[str] = FEATURES,
+    label: str = LABEL,
+    min_train_weeks: int = MIN_TRAIN_WEEKS,
+    test_weeks: int = TEST_WEEKS,
+    step_weeks: int = STEP_WEEKS,
+    k: int = TOP_K,
+    n_jobs: int = -1,
+    output_csv: str = "outputs/backtest/backtest_folds.csv",
+    model_factory=baseline_model,
+    label_date: str | None = LABEL_DATE,
+) -> pd.DataFrame:
+    """
+    Walk-forward backtest of the baseline model on source_table.
+
+    Folds are built by match week (walk_forward_folds) over the rows
+    train_baseline would use, and trained and evaluated in parallel with
+    joblib (n_jobs workers, -1 = all cores). Workers receive the path of
+    the feature matrix (modeling.feature_matrix) and the fold's row
+    positions, not the data. Train rows whose label_date column (when
+    the label is known) reaches into the test block are purged; None
+    turns the purge off.
+
+    Returns one row per fold with AUC, Brier score and precision@k (the
+    top k scores of each match), also written to output_csv.
+    """
+    start = time.perf_counter()
+    extra_columns = [label_date] if label_date else []
+    path = ensure_feature_matrix(db_path, source_table, features, label=label, extra_columns=extra_columns)
+    matrix = load_feature_matrix(path)
+
+    rows = np.flatnonzero(valid_rows(matrix, ID_COLUMNS + features + [label]))
+    dates = matrix.column("match_date").to_numpy()[rows]
+    label_dates = matrix.column(label_date).to_numpy(zero_copy_only=False)[rows] if label_date else None
+    folds = [
+        Fold(f.fold, rows[f.train_rows], rows[f.test_rows], f.train_end, f.test_end)
+        for f in walk_forward_folds(dates, min_train_weeks, test_weeks, step_weeks, label_dates)
+    ]
+    if not folds:
+        print(f"⚠️ Not enough weeks for a fold: {len(np.unique(week_starts(dates)))} weeks with matches, "
+              f"need {min_train_weeks + test_weeks}")
+        return pd.DataFrame()
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(str(path), fold, features, label, k, model_factory) for fold in folds
+    )
+    report = pd.DataFrame(results)
+
+    output_path = Path(output_csv)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(output_path, index=False)
+
+    metrics = ["auc", "brier", f"precision_at_{k}"]
+    print(f"Folds: {len(report)} | wall-clock {time.perf_counter() - start:.2f}s | sum of folds {report['seconds'].sum():.2f}s")
+    print(report[metrics].agg(["mean", "std"]).to_string())
+    print(f"Backtest saved to: {output_path}")
+
+    return report
+
+
+if __name__ == "__main__":
+    run_backtest()
@@ -0,0 +1,186 @@
+from pathlib import Path
+import json
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from football_risk_analytics.db import arrow_reader, connect
+from football_risk_analytics.features.incremental import table_fingerprint
+
+
+MATRIX_DIR = "lakehouse/features"
+
+ID_COLUMNS = [
+    "player_id",
+    "competition_id",
+    "season_id",
+    "match_id",
+    "match_date",
+    "team",
+]
+
+FEATURES = [
+    "shots_per90",
+    "xg_per90",
+    "passes_per90",
+    "carries_per90",
+    "progressive_x_per90",
+    "xg_last_5",
+    "shots_last_5",
+    "progressive_last_5",
+    "trend_xg_3v3",
+    "minutes_last_7d",
+    "minutes_last_14d",
+    "minutes_last_28d",
+    "minutes_last_5_matches",
+    "acwr",
+]
+
+
+def matrix_path(source_table: str, matrix_dir: str = MATRIX_DIR) -> Path:
+    return Path(matrix_dir) / f"{source_table}.arrow"
+
+
+def feature_matrix_sql(
+    source_table: str,
+    features: list[str],
+    label: str | None = None,
+    extra_columns: list[str] | None = None,
+) -> str:
+    # NULL -> NaN: columnas float32 sin máscara de validez, legibles sin copia desde el mapa de memoria
+    columns = ID_COLUMNS + list(extra_columns or [])
+    columns += [f"COALESCE(CAST({f} AS FLOAT), 'NaN'::FLOAT) AS {f}" for f in features]
+    if label is not None:
+        columns.append(label)
+    select_sql = ",\n        ".join(columns)
+    return f"""
+    SELECT
+        {select_sql}
+    FROM {source_table}
+    """
+
+
+def read_matrix_metadata(path) -> dict | None:
+    """
+    The export parameters stored in the matrix file's schema, or None if
+    there is no file.
+    """
+    if not Path(path).exists():
+        return None
+    with pa.memory_map(str(path)) as source:
+        metadata = ipc.open_file(source).schema.metadata or {}
+    return {key.decode(): json.loads(value) for key, value in metadata.items()}
+
+
+def export_feature_matrix(
+    con,
+    source_table: str,
+    path,
+    features: list[str] = FEATURES,
+    label: str | None = None,
+    batch_rows: int = 1_000_000,
+    fingerprint: list | None = None,
+    extra_columns: list[str] | None = None,
+) -> Path:
+    """
+    Write the id columns, extra_columns as they are, the features as
+    float32 (NULL as NaN) and the label of source_table to an uncompressed Arrow IPC (Feather v2) file,
+    streaming record batches from DuckDB. The source fingerprint (computed
+    here unless the caller already has it), features and label go in the
+    schema metadata (read_matrix_metadata). The file is replaced
+    atomically.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    metadata = {
+        "source_table": source_table,
+        "fingerprint": fingerprint if fingerprint is not None else table_fingerprint(con, source_table),
+        "features": list(features),
+        "label": label,
+        "extra_columns": list(extra_columns or []),
+    }
+
+    reader = arrow_reader(con.execute(feature_matrix_sql(source_table, features, label, extra_columns)), batch_rows)
+    schema = reader.schema.with_metadata({key: json.dumps(value) for key, value in metadata.items()})
+    tmp_path = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, ipc.new_file(sink, schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+    os.replace(tmp_path, path)
+    return path
+
+
+def ensure_feature_matrix(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_dataset_predictive",
+    features: list[str] = FEATURES,
+    label: str | None = None,
+    matrix_dir: str = MATRIX_DIR,
+    extra_columns: list[str] | None = None,
+) -> Path:
+    """
+    Path of the feature matrix of source_table, exported again only when
+    the table (its fingerprint), the features, the label or the
+    extra_columns changed.
+    """
+    path = matrix_path(source_table, matrix_dir)
+    con = connect(db_path, stage="feature_matrix", read_only=True)
+    try:
+        fingerprint = table_fingerprint(con, source_table)
+        # los valores pasan por JSON en la metadata: se comparan igual que se guardan
+        current = json.loads(json.dumps({
+            "fingerprint": fingerprint,
+            "features": list(features),
+            "label": label,
+            "extra_columns": list(extra_columns or []),
+        }))
+        metadata = read_matrix_metadata(path) or {}
+        if all(metadata.get(key) == value for key, value in current.items()):
+            print(f"⏭️ Feature matrix up to date: {path}")
+        else:
+            export_feature_matrix(
+                con, source_table, path, features, label, fingerprint=fingerprint, extra_columns=extra_columns
+            )
+            print(f"✅ Feature matrix exported: {path}")
+    finally:
+        con.close()
+    return path
+
+
+def load_feature_matrix(path) -> pa.Table:
+    """
+    The matrix as an Arrow table backed by a memory map of the file: no
+    data is read or copied until a column is used.
+    """
+    return ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def feature_array(table: pa.Table, features: list[str], dtype=np.float32) -> np.ndarray:
+    """
+    (rows, features) array. Each column chunk is a zero-copy view of the
+    mapped file, copied once into the column-major result (converted to
+    dtype on that copy).
+    """
+    X = np.empty((table.num_rows, len(features)), dtype=dtype, order="F")
+    for j, name in enumerate(features):
+        offset = 0
+        for chunk in table.column(name).chunks:
+            values = chunk.to_numpy(zero_copy_only=True)
+            X[offset:offset + len(values), j] = values
+            offset += len(values)
+    return X
+
+
+def valid_rows(table: pa.Table, columns: list[str]) -> np.ndarray:
+    """
+    Boolean mask of the rows without NULL (or NaN, for float columns) in
+    any of columns.
+    """
+    keep = np.ones(table.num_rows, dtype=bool)
+    for name in columns:
+        column = table.column(name)
+        keep &= column.is_valid().to_numpy(zero_copy_only=False)
+        if pa.types.is_floating(column.type):
+            keep &= ~np.isnan(column.to_numpy())
+    return keep
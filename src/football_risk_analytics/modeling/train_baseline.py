@@ -1,26 +1,28 @@
-import duckdb
 import joblib
 from pathlib import Path
+import numpy as np
+import pandas as pd
 
 from sklearn.linear_model import LogisticRegression
 
+from football_risk_analytics.modeling.feature_matrix import (
+    FEATURES,
+    ID_COLUMNS,
+    ensure_feature_matrix,
+    feature_array,
+    load_feature_matrix,
+    valid_rows,
+)
 
-FEATURES = [
-    "shots_per90",
-    "xg_per90",
-    "passes_per90",
-    "carries_per90",
-    "progressive_x_per90",
-    "xg_last_5",
-    "shots_last_5",
-    "progressive_last_5",
-    "trend_xg_3v3",
-    "minutes_last_7d",
-    "minutes_last_14d",
-    "minutes_last_28d",
-    "minutes_last_5_matches",
-    "acwr",
-]
+
+LABEL = "high_risk_next"
+
+# Fecha en la que se conoce la etiqueta (el siguiente partido): la usa el backtest para purgar
+LABEL_DATE = "next_match_date"
+
+
+def baseline_model() -> LogisticRegression:
+    return LogisticRegression(max_iter=3000)
 
 
 def train_baseline(
@@ -28,21 +30,17 @@ def train_baseline(
     source_table: str = "player_dataset_predictive",
     model_dir: str = "models/baseline",
 ):
-    con = duckdb.connect(db_path)
-
-    df = con.execute(f"""
-    SELECT *
-    FROM {source_table}
-    """).df()
-
-    con.close()
+    # Matriz float32 en Arrow IPC, mapeada en memoria: sin conversión DuckDB -> pandas en cada entrenamiento
+    matrix = load_feature_matrix(ensure_feature_matrix(db_path, source_table, FEATURES, label=LABEL, extra_columns=[LABEL_DATE]))
 
-    df = df.dropna()
+    # equivalente al dropna() sobre ids, features y etiqueta
+    keep = valid_rows(matrix, ID_COLUMNS + FEATURES + [LABEL])
 
-    X = df[FEATURES]
-    y = df["high_risk_next"]
+    # lbfgs con entrada float32 trabaja en float32 y converge a otra solución: se ajusta en float64
+    X = pd.DataFrame(feature_array(matrix, FEATURES, dtype=np.float64)[keep], columns=FEATURES)
+    y = matrix.column(LABEL).to_numpy()[keep]
 
-    model = LogisticRegression(max_iter=3000)
+    model = baseline_model()
     model.fit(X, y)
 
     model_path = Path(model_dir) / "model.pkl"
@@ -51,7 +49,7 @@ def train_baseline(
     joblib.dump(model, model_path)
 
     print(f"Model saved to: {model_path}")
-    print(f"Rows used: {len(df)}")
+    print(f"Rows used: {len(X)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+from pathlib import Path
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from football_risk_analytics.db import arrow_reader, connect
+from football_risk_analytics.modeling.feature_matrix import FEATURES, ID_COLUMNS
+from football_risk_analytics.modeling.train_baseline import LABEL, baseline_model
+
+
+BATCH_ROWS = 100_000
+
+# Filas que parity_report carga en memoria como mucho: muestra de entrenamiento del modelo base
+# y muestra del holdout con la que se puntúan los dos modelos
+PARITY_SAMPLE_ROWS = 200_000
+
+
+def complete_rows_sql(features: list[str], label: str) -> str:
+    # las mismas filas que deja el dropna() de train_baseline
+    return " AND ".join(
+        [f"{c} IS NOT NULL" for c in ID_COLUMNS + features + [label]]
+        + [f"NOT isnan({f}::DOUBLE)" for f in features]
+    )
+
+
+def stream_batches(
+    con,
+    source_table: str,
+    features: list[str] = FEATURES,
+    label: str = LABEL,
+    where: str | None = None,
+    batch_rows: int = BATCH_ROWS,
+    shuffle_seed: int | None = None,
+    sample_rows: int | None = None,
+):
+    """
+    Yield (X, y) for the complete rows of source_table (and where), one
+    Arrow record batch of at most batch_rows rows at a time, so only one
+    batch is held in Python. With shuffle_seed the rows come in a
+    pseudo-random order (sorted by a hash in DuckDB, which spills to disk
+    if needed). With sample_rows only a reservoir sample of that many rows
+    is read.
+    """
+    conditions = complete_rows_sql(features, label) + (f" AND ({where})" if where else "")
+    sql = f"""
+    SELECT {", ".join(f"{f}::DOUBLE AS {f}" for f in features)}, {label}, player_id, match_id
+    FROM {source_table}
+    WHERE {conditions}
+    """
+    if sample_rows is not None:
+        sql = f"SELECT * FROM ({sql}) USING SAMPLE reservoir({int(sample_rows)} ROWS) REPEATABLE (42)"
+    if shuffle_seed is not None:
+        sql = f"SELECT * FROM ({sql}) ORDER BY hash(player_id, match_id, {shuffle_seed})"
+    result = con.execute(sql)
+    for batch in arrow_reader(result, batch_rows):
+        X = pd.DataFrame({f: batch.column(f).to_numpy() for f in features})
+        yield X, batch.column(label).to_numpy()
+
+
+def fit_streaming(
+    con,
+    source_table: str = "player_dataset_predictive",
+    features: list[str] = FEATURES,
+    label: str = LABEL,
+    where: str | None = None,
+    epochs: int = 5,
+    standardize: bool = True,
+    batch_rows: int = BATCH_ROWS,
+    alpha: float = 1e-4,
+    learning_rate: str = "constant",
+    eta0: float = 0.01,
+    average: bool = True,
+    random_state: int = 42,
+) -> tuple[Pipeline, int]:
+    """
+    Fit StandardScaler (one pass, with standardize) and an SGDClassifier
+    with log loss (epochs passes, each in a new shuffled order) with
+    partial_fit over stream_batches. Returns (pipeline, rows per epoch).
+
+    The defaults are averaged SGD with a constant step: the "optimal"
+    schedule of SGDClassifier ranks well but gives poorly calibrated
+    probabilities on small or noisy tables, far from the baseline's.
+    """
+    scaler = StandardScaler()
+    if standardize:
+        for X, _ in stream_batches(con, source_table, features, label, where, batch_rows):
+            scaler.partial_fit(X)
+
+    model = SGDClassifier(
+        loss="log_loss",
+        alpha=alpha,
+        learning_rate=learning_rate,
+        eta0=eta0,
+        average=average,
+        random_state=random_state,
+    )
+    classes = np.array([0, 1])
+    rows = 0
+    for epoch in range(epochs):
+        rows = 0
+        for X, y in stream_batches(con, source_table, features, label, where, batch_rows, shuffle_seed=epoch):
+            model.partial_fit(scaler.transform(X) if standardize else X, y, classes=classes)
+            rows += len(y)
+
+    steps = [("scaler", scaler)] if standardize else []
+    return Pipeline(steps + [("model", model)]), rows
+
+
+def _scores(models, con, source_table, features, label, where, batch_rows, sample_rows) -> tuple[np.ndarray, list]:
+    # todos los modelos en la misma pasada: una sola muestra, las mismas filas para cada uno
+    y_parts, score_parts = [], [[] for _ in models]
+    for X, y in stream_batches(con, source_table, features, label, where, batch_rows, sample_rows=sample_rows):
+        y_parts.append(y)
+        for parts, model in zip(score_parts, models):
+            parts.append(model.predict_proba(X)[:, 1])
+    if not y_parts:
+        return np.array([]), [np.array([]) for _ in models]
+    return np.concatenate(y_parts), [np.concatenate(parts) for parts in score_parts]
+
+
+def _quality(y: np.ndarray, scores: np.ndarray) -> dict:
+    if len(y) == 0:
+        return {"auc": float("nan"), "brier": float("nan"), "log_loss": float("nan")}
+    return {
+        "auc": float(roc_auc_score(y, scores)) if len(np.unique(y)) > 1 else float("nan"),
+        "brier": float(brier_score_loss(y, scores)),
+        "log_loss": float(log_loss(y, scores, labels=[0, 1])),
+    }
+
+
+def parity_report(
+    con,
+    source_table: str = "player_dataset_predictive",
+    features: list[str] = FEATURES,
+    label: str = LABEL,
+    holdout_share: float = 0.2,
+    batch_rows: int = BATCH_ROWS,
+    sample_rows: int = PARITY_SAMPLE_ROWS,
+    **fit_params,
+) -> dict:
+    """
+    Train the streaming model and the in-memory baseline
+    (train_baseline.baseline_model) on the rows before the match_date that
+    leaves holdout_share of the rows after it, and compare AUC, Brier
+    score and log loss on those later rows.
+
+    The streaming model uses every training row. The baseline is fitted
+    on a sample of at most sample_rows of them and both are scored on a
+    sample of at most sample_rows holdout rows, so memory stays bounded
+    (identical to a full comparison when the table fits in the samples).
+    """
+    cutoff = con.execute(f"""
+    SELECT quantile_disc(match_date, {1 - holdout_share})
+    FROM {source_table}
+    WHERE {complete_rows_sql(features, label)}
+    """).fetchone()[0]
+    train_where, test_where = f"match_date < DATE '{cutoff}'", f"match_date >= DATE '{cutoff}'"
+
+    start = time.perf_counter()
+    streaming, _ = fit_streaming(con, source_table, features, label, train_where, batch_rows=batch_rows, **fit_params)
+    streaming_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batches = list(stream_batches(con, source_table, features, label, train_where, batch_rows, sample_rows=sample_rows))
+    baseline = baseline_model()
+    if batches:
+        baseline.fit(pd.concat([X for X, _ in batches], ignore_index=True), np.concatenate([y for _, y in batches]))
+    baseline_seconds = time.perf_counter() - start
+
+    models = [streaming, baseline] if batches else [streaming]
+    y, scores = _scores(models, con, source_table, features, label, test_where, batch_rows, sample_rows)
+    streaming_scores = scores[0]
+    report = {
+        "cutoff": str(cutoff),
+        "baseline_train_rows": sum(len(b[1]) for b in batches),
+        "test_rows": len(y),
+        "streaming": {**_quality(y, streaming_scores), "seconds": streaming_seconds},
+    }
+    if batches:
+        baseline_scores = scores[1]
+        report["baseline"] = {**_quality(y, baseline_scores), "seconds": baseline_seconds}
+        report["score_correlation"] = float(np.corrcoef(streaming_scores, baseline_scores)[0, 1]) if len(y) > 1 else float("nan")
+
+    print(f"=== Parity: streaming SGD vs in-memory baseline (holdout from {cutoff}, {len(y)} rows) ===")
+    print(f"Baseline fitted on {report['baseline_train_rows']} sampled training rows")
+    for name in ("streaming", "baseline"):
+        if name in report:
+            r = report[name]
+            print(f"{name:<10} AUC {r['auc']:.4f} | Brier {r['brier']:.4f} | log loss {r['log_loss']:.4f} | fit {r['seconds']:.2f}s")
+    if "score_correlation" in report:
+        print(f"Score correlation: {report['score_correlation']:.4f}")
+
+    return report
+
+
+def train_streaming(
+    db_path: str = "lakehouse/analytics.duckdb",
+    source_table: str = "player_dataset_predictive",
+    model_dir: str = "models/streaming",
+    epochs: int = 5,
+    standardize: bool = True,
+    batch_rows: int = BATCH_ROWS,
+    parity: bool = False,
+    alpha: float = 1e-4,
+    learning_rate: str = "constant",
+    eta0: float = 0.01,
+    average: bool = True,
+):
+    """
+    Out-of-core alternative to train_baseline: fit_streaming over the whole
+    table, so memory depends on batch_rows and not on the table size. The
+    pipeline is saved as model.pkl in model_dir (usable by score_batch).
+    With parity, parity_report first compares it with the in-memory
+    baseline on a chronological holdout (bounded by PARITY_SAMPLE_ROWS).
+    """
+    fit_params = {
+        "epochs": epochs,
+        "standardize": standardize,
+        "alpha": alpha,
+        "learning_rate": learning_rate,
+        "eta0": eta0,
+        "average": average,
+    }
+    con = connect(db_path, stage="train_streaming", read_only=True)
+    if parity:
+        parity_report(con, source_table, batch_rows=batch_rows, **fit_params)
+
+    model, rows = fit_streaming(con, source_table, batch_rows=batch_rows, **fit_params)
+    con.close()
+
+    model_path = Path(model_dir) / "model.pkl"
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+
+    joblib.dump(model, model_path)
+
+    print(f"Model saved to: {model_path}")
+    print(f"Rows used: {rows} per epoch x {epochs} epochs")
+    return model
+
+
+if __name__ == "__main__":
+    train_streaming()
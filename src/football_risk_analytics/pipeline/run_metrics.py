@@ -0,0 +1,117 @@
+from datetime import datetime
+import json
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+RUNS_TABLE = "pipeline_runs"
+
+# Métricas de las sentencias perfiladas (db.execute_main) que se suman por etapa
+SUMMED = ("rows_in", "rows_out", "bytes_read", "bytes_written")
+
+
+def peak_rss_bytes(children: bool = False) -> int | None:
+    """
+    Peak resident memory of this process so far, or of its largest child
+    process with children=True. None where getrusage is not available.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux da KiB; macOS, bytes
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def stage_metrics(statements: list[dict], peak_rss: int | None) -> dict:
+    """
+    One record for a stage from the profiles of its main statements: the
+    counters summed, the largest buffer and temp-dir peaks, the profiles
+    as a JSON list (null when no statement was profiled).
+    """
+    metrics = {key: None for key in SUMMED}
+    for key in SUMMED:
+        values = [s[key] for s in statements if s[key] is not None]
+        if values:
+            metrics[key] = sum(values)
+    metrics["statement_seconds"] = sum(s["seconds"] for s in statements) if statements else None
+    metrics["peak_buffer_memory"] = max((s["peak_buffer_memory"] or 0 for s in statements), default=None)
+    metrics["peak_temp_dir_size"] = max((s["peak_temp_dir_size"] or 0 for s in statements), default=None)
+    metrics["peak_rss"] = peak_rss
+    metrics["profile"] = json.dumps([s["profile"] for s in statements]) if statements else None
+    return metrics
+
+
+def _ensure_runs_table(con) -> None:
+    con.execute(f"""
+    CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+        run_id VARCHAR,
+        stage VARCHAR,
+        status VARCHAR,
+        started_at TIMESTAMP,
+        wall_seconds DOUBLE,
+        statement_seconds DOUBLE,
+        rows_in BIGINT,
+        rows_out BIGINT,
+        bytes_read BIGINT,
+        bytes_written BIGINT,
+        peak_buffer_memory BIGINT,
+        peak_temp_dir_size BIGINT,
+        peak_rss BIGINT,
+        profile JSON
+    )
+    """)
+
+
+def save_stage_run(
+    con,
+    run_id: str,
+    stage: str,
+    status: str,
+    started_at: datetime,
+    wall_seconds: float,
+    metrics: dict | None = None,
+) -> None:
+    """
+    Append one row to pipeline_runs; metrics as returned by stage_metrics
+    (None for stages that were not profiled).
+    """
+    _ensure_runs_table(con)
+    metrics = metrics or {}
+    columns = (
+        "statement_seconds",
+        "rows_in",
+        "rows_out",
+        "bytes_read",
+        "bytes_written",
+        "peak_buffer_memory",
+        "peak_temp_dir_size",
+        "peak_rss",
+        "profile",
+    )
+    con.execute(
+        f"""
+        INSERT INTO {RUNS_TABLE} VALUES (
+            ?, ?, ?, ?, ?,
+            {", ".join("?" for _ in columns)}
+        )
+        """,
+        [run_id, stage, status, started_at, wall_seconds, *(metrics.get(c) for c in columns)],
+    )
+
+
+def print_run(con, run_id: str) -> None:
+    rows = con.execute(f"""
+    SELECT stage, status, wall_seconds, rows_in, rows_out, bytes_read, peak_rss
+    FROM {RUNS_TABLE}
+    WHERE run_id = ?
+    ORDER BY started_at
+    """, [run_id]).fetchall()
+    print(f"=== {RUNS_TABLE} (run {run_id}) ===")
+    for stage, status, seconds, rows_in, rows_out, bytes_read, peak_rss in rows:
+        mb = f"{bytes_read / 1e6:.1f} MB" if bytes_read is not None else "-"
+        rss = f"{peak_rss / 2**20:.0f} MiB" if peak_rss is not None else "-"
+        print(f"{stage:<45} {status:<8} {seconds:>7.2f}s  rows in {rows_in}  out {rows_out}  read {mb}  peak RSS {rss}")
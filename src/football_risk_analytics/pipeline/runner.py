@@ -0,0 +1,173 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+import runpy
+import subprocess
+import sys
+import time
+
+from football_risk_analytics.db import collect_profiles, connect, profile_settings, shared_connection
+from football_risk_analytics.pipeline.run_metrics import peak_rss_bytes, print_run, save_stage_run, stage_metrics
+from football_risk_analytics.pipeline.stage_cache import (
+    cached_fingerprint,
+    outputs_exist,
+    save_fingerprint,
+    stage_fingerprint,
+)
+from football_risk_analytics.pipeline.stages import PIPELINE_STAGES, Stage, stage_dependencies
+
+
+def run_stage(stage: Stage, in_process: bool = True) -> float:
+    """
+    Run the stage script as __main__ in this interpreter (already imported
+    modules are reused) or in a new process. Returns the seconds it took.
+    """
+    start = time.perf_counter()
+    if in_process:
+        runpy.run_path(stage.script, run_name="__main__")
+    else:
+        subprocess.run([sys.executable, stage.script], check=True)
+    return time.perf_counter() - start
+
+
+def run_stage_profiled(stage: Stage, in_process: bool = True) -> tuple[float, dict]:
+    """
+    run_stage collecting the DuckDB profile of the stage's main statements
+    (db.execute_main) and the peak RSS. Statement profiles are only
+    collected in-process; in a subprocess the peak RSS is the largest
+    child's.
+    """
+    with collect_profiles() as statements:
+        seconds = run_stage(stage, in_process)
+    return seconds, stage_metrics(statements, peak_rss_bytes(children=not in_process))
+
+
+def stage_profiles(stage: Stage) -> frozenset[str]:
+    """
+    Names of the DuckDB resource profiles the stage's connections use.
+    """
+    return frozenset(profile_settings(stage=key)[0] for key in stage.connect_stages()) or frozenset(
+        [profile_settings()[0]]
+    )
+
+
+def print_timings(timings: dict[str, dict], wall_seconds: float) -> None:
+    print("=== Pipeline timings ===")
+    for name, t in timings.items():
+        print(f"{name:<45} {t['status']:<8} start {t['start']:>7.2f}s  {t['seconds']:>7.2f}s")
+    busy = sum(t["seconds"] for t in timings.values())
+    print(f"Wall-clock {wall_seconds:.2f}s | sum of stages {busy:.2f}s")
+
+
+def run_pipeline(
+    db_path: str = "lakehouse/analytics.duckdb",
+    stages: tuple[Stage, ...] = PIPELINE_STAGES,
+    max_workers: int = 4,
+    use_cache: bool = True,
+    in_process: bool = True,
+    profile: bool = False,
+) -> dict[str, dict]:
+    """
+    Run the stages as a dependency graph (stage_dependencies): a stage
+    starts as soon as the stages producing its inputs are done, so
+    independent branches (e.g. 05 form and 06 load features after 04) run
+    concurrently in up to max_workers threads.
+
+    With use_cache a stage whose fingerprint is unchanged is skipped (see
+    stage_cache). Stages run in-process by default, sharing one DuckDB
+    connection (db.shared_connection), so concurrent stages only need to
+    write different tables. DuckDB settings are database-wide: in-process,
+    only stages with the same resource profile (stage_profiles) run at
+    the same time, and the runner's own queries don't touch the settings.
+    If a stage fails, the running stages finish, nothing else starts and
+    the error is raised.
+
+    With profile every stage (built, skipped or failed) gets a row in
+    pipeline_runs under one run_id: wall time, rows scanned and written,
+    bytes read and DuckDB's JSON profile of its main statements, and the
+    peak RSS (see run_metrics). The peak RSS is the process's so far, so
+    with concurrent stages it is an upper bound for each of them.
+
+    Returns {stage: {"status", "start", "seconds"}} in completion order.
+    """
+    deps = stage_dependencies(stages)
+    pending = {stage.name: stage for stage in stages}
+    done = set()
+    running = {}
+    timings = {}
+    error = None
+    start = time.perf_counter()
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    profiles = {stage.name: stage_profiles(stage) for stage in stages}
+
+    # en proceso, todas las etapas reutilizan una conexión abierta durante toda la ejecución
+    shared = shared_connection(db_path) if in_process else nullcontext()
+    with shared, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # lanzar todo lo que esté listo; una etapa saltada puede desbloquear otras al momento
+            while error is None and (ready := [s for s in pending.values() if deps[s.name] <= done]):
+                # en proceso, SET/RESET afectan a toda la base: solo juntas etapas con el mismo perfil
+                busy = {profiles[s.name] for s, *_ in running.values()}
+                ready = [s for s in ready if not in_process or not busy or busy == {profiles[s.name]}]
+                if not ready:
+                    break
+                stage = ready[0]
+                del pending[stage.name]
+                # huella y caché en este hilo: los hilos de etapa solo ejecutan scripts
+                con = connect(db_path, apply_profile=False)
+                fingerprint = stage_fingerprint(con, stage)
+                skip = use_cache and fingerprint == cached_fingerprint(con, stage) and outputs_exist(con, stage)
+                con.close()
+
+                if skip:
+                    print(f"⏭️ {stage.name}: sin cambios, se reutiliza la salida")
+                    timings[stage.name] = {"status": "skipped", "start": time.perf_counter() - start, "seconds": 0.0}
+                    done.add(stage.name)
+                    if profile:
+                        con = connect(db_path, apply_profile=False)
+                        save_stage_run(con, run_id, stage.name, "skipped", datetime.now(), 0.0)
+                        con.close()
+                    continue
+
+                print(f"▶️ {stage.name}")
+                future = pool.submit(run_stage_profiled if profile else run_stage, stage, in_process)
+                running[future] = (stage, fingerprint, time.perf_counter() - start, datetime.now())
+
+            if not running:
+                if error is None and pending:
+                    raise ValueError(f"Stages with unmet or cyclic dependencies: {sorted(pending)}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint, stage_start, started_at = running.pop(future)
+                try:
+                    result = future.result()
+                except BaseException as e:
+                    print(f"❌ {stage.name}: {e!r}")
+                    timings[stage.name] = {"status": "failed", "start": stage_start, "seconds": 0.0}
+                    error = error or e
+                    if profile:
+                        con = connect(db_path, apply_profile=False)
+                        failed_seconds = time.perf_counter() - start - stage_start
+                        save_stage_run(con, run_id, stage.name, "failed", started_at, failed_seconds)
+                        con.close()
+                    continue
+
+                seconds, metrics = result if profile else (result, None)
+                con = connect(db_path, apply_profile=False)
+                save_fingerprint(con, stage, fingerprint, seconds)
+                if profile:
+                    save_stage_run(con, run_id, stage.name, "built", started_at, seconds, metrics)
+                con.close()
+                timings[stage.name] = {"status": "built", "start": stage_start, "seconds": seconds}
+                done.add(stage.name)
+
+    print_timings(timings, time.perf_counter() - start)
+    if profile:
+        con = connect(db_path, apply_profile=False)
+        print_run(con, run_id)
+        con.close()
+    if error is not None:
+        raise error
+    return timings
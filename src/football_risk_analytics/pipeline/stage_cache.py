@@ -0,0 +1,105 @@
+from pathlib import Path
+import ast
+import glob
+import hashlib
+import json
+import os
+
+from football_risk_analytics.features.incremental import table_exists, table_fingerprint
+from football_risk_analytics.pipeline.stages import Stage
+
+
+CACHE_TABLE = "stage_cache"
+
+PACKAGE = "football_risk_analytics"
+SRC_ROOT = Path(__file__).resolve().parents[2]
+
+
+def code_files(script: str) -> list[Path]:
+    """
+    The script plus every football_risk_analytics module it imports,
+    directly or through other modules of the package.
+    """
+    seen = set()
+    todo = [Path(script)]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.ImportFrom):
+                modules = [node.module or ""]
+                modules += [f"{node.module}.{alias.name}" for alias in node.names]
+            elif isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            else:
+                continue
+            for module in modules:
+                if module.split(".")[0] != PACKAGE:
+                    continue
+                base = SRC_ROOT / module.replace(".", "/")
+                todo += [p for p in (base.with_suffix(".py"), base / "__init__.py") if p.exists()]
+    return sorted(seen)
+
+
+def files_fingerprint(patterns: tuple[str, ...]) -> list:
+    # (ruta, tamaño, mtime) como en el manifest: sin leer el contenido
+    data_root = os.environ.get("FRA_DATA_ROOT", "data")
+    entries = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern.format(data_root=data_root), recursive=True)):
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime_ns))
+    return entries
+
+
+def stage_fingerprint(con, stage: Stage) -> str:
+    """
+    sha256 of the stage code (script and imported modules), its params
+    and the current content of its input tables and files.
+    """
+    digest = hashlib.sha256()
+    for path in code_files(stage.script):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    state = {
+        "params": stage.params(),
+        "inputs": {table: table_fingerprint(con, table) for table in stage.inputs},
+        "input_files": files_fingerprint(stage.input_files),
+    }
+    digest.update(json.dumps(state, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def outputs_exist(con, stage: Stage) -> bool:
+    return all(table_exists(con, t) for t in stage.outputs) and all(
+        Path(f).exists() for f in stage.output_files
+    )
+
+
+def _ensure_cache_table(con) -> None:
+    con.execute(f"""
+    CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+        stage VARCHAR PRIMARY KEY,
+        fingerprint VARCHAR,
+        seconds DOUBLE,
+        updated_at TIMESTAMP
+    )
+    """)
+
+
+def cached_fingerprint(con, stage: Stage) -> str | None:
+    _ensure_cache_table(con)
+    row = con.execute(f"SELECT fingerprint FROM {CACHE_TABLE} WHERE stage = ?", [stage.name]).fetchone()
+    return row[0] if row else None
+
+
+def save_fingerprint(con, stage: Stage, fingerprint: str, seconds: float) -> None:
+    _ensure_cache_table(con)
+    con.execute(
+        f"INSERT OR REPLACE INTO {CACHE_TABLE} VALUES (?, ?, ?, now()::TIMESTAMP)",
+        [stage.name, fingerprint, seconds],
+    )
+
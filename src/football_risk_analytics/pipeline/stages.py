@@ -0,0 +1,170 @@
+from dataclasses import dataclass, field
+from typing import Callable
+import fnmatch
+import os
+
+from football_risk_analytics.features.form_features import FORM_SPEC
+from football_risk_analytics.features.load_features import LOAD_SPEC
+from football_risk_analytics.features.rolling_spec import load_rolling_spec
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One pipeline step: the script that runs it and what it reads and writes.
+
+    input_files are glob patterns ({data_root} is FRA_DATA_ROOT); params
+    returns the settings outside the code that change its output.
+    db_stages are the db.connect(stage=...) keys its scripts use, which
+    pick their DuckDB resource profile (the output tables by default).
+    """
+
+    name: str
+    script: str
+    inputs: tuple[str, ...] = ()
+    input_files: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    output_files: tuple[str, ...] = ()
+    params: Callable[[], dict] = field(default=dict, compare=False)
+    db_stages: tuple[str, ...] = ()
+
+    def connect_stages(self) -> tuple[str, ...]:
+        return self.db_stages or self.outputs
+
+
+def _manifest_params() -> dict:
+    return {
+        "data_root": os.environ.get("FRA_DATA_ROOT", "data"),
+        "full": os.environ.get("FRA_MANIFEST_FULL", "0") == "1",
+    }
+
+
+# Etapas de datos 01-09 en orden de ejecución
+DATA_STAGES = (
+    Stage(
+        "01_build_manifest",
+        "scripts/01_build_manifest.py",
+        input_files=("{data_root}", "{data_root}/**/*"),
+        output_files=("lakehouse/manifests/match_manifest.parquet",),
+        params=_manifest_params,
+    ),
+    Stage(
+        "02_build_matches_view",
+        "scripts/02_build_matches_view.py",
+        input_files=("lakehouse/bronze/matches/*/*/*.parquet",),
+        outputs=("matches",),
+    ),
+    Stage(
+        "03_build_player_match_stats",
+        "scripts/03_build_player_match_stats.py",
+        input_files=(
+            "lakehouse/bronze/player_match_stats/*/*/*.parquet",
+            "lakehouse/bronze/events_flat/*/*/*.parquet",
+        ),
+        outputs=("player_match_stats",),
+    ),
+    Stage(
+        "04_build_player_match_features_true_time",
+        "scripts/04_build_player_match_features_true_time.py",
+        inputs=("player_match_stats", "matches"),
+        input_files=("lakehouse/bronze/player_match_minutes_true/*/*/*.parquet",),
+        outputs=("player_match_minutes_true", "player_match_features_true_time"),
+        db_stages=("player_match_features_true_time",),
+    ),
+    Stage(
+        "05_build_player_form_features",
+        "scripts/05_build_player_form_features.py",
+        inputs=("player_match_features_true_time",),
+        outputs=("player_form_features",),
+        params=lambda: {"spec": load_rolling_spec(FORM_SPEC)},
+    ),
+    Stage(
+        "06_build_player_load_features_true",
+        "scripts/06_build_player_load_features_true.py",
+        inputs=("player_match_features_true_time",),
+        outputs=("player_load_features_true",),
+        params=lambda: {"spec": load_rolling_spec(LOAD_SPEC)},
+    ),
+    Stage(
+        "07_build_player_acwr_true",
+        "scripts/07_build_player_acwr_true.py",
+        inputs=("player_load_features_true",),
+        outputs=("player_acwr_true",),
+    ),
+    Stage(
+        "08_build_player_dataset_final",
+        "scripts/08_build_player_dataset_final.py",
+        inputs=(
+            "player_match_features_true_time",
+            "player_form_features",
+            "player_load_features_true",
+            "player_acwr_true",
+        ),
+        outputs=("player_dataset_final",),
+    ),
+    Stage(
+        "09_build_player_dataset_predictive",
+        "scripts/09_build_player_dataset_predictive.py",
+        inputs=("player_dataset_final",),
+        outputs=("player_dataset_predictive",),
+    ),
+)
+
+# Modelo e inferencia: leen y escriben ficheros además de tablas
+MODEL_STAGES = (
+    Stage(
+        "20_train_baseline",
+        "scripts/20_train_baseline.py",
+        inputs=("player_dataset_predictive",),
+        output_files=("models/baseline/model.pkl",),
+        db_stages=("feature_matrix",),
+    ),
+    Stage(
+        "10_score_batch",
+        "scripts/10_score_batch.py",
+        inputs=("player_dataset_final",),
+        input_files=("models/baseline/model.pkl", "models/baseline/metadata.json"),
+        output_files=(
+            "outputs/predictions/player_risk_scores.csv",
+            "outputs/predictions/player_risk_scores.parquet",
+        ),
+        db_stages=("feature_matrix",),
+    ),
+    Stage(
+        "11_rank_players",
+        "scripts/11_rank_players.py",
+        input_files=("outputs/predictions/player_risk_scores.csv",),
+        output_files=("outputs/alerts/ranked_players.csv", "outputs/alerts/ranked_players.parquet"),
+    ),
+    Stage(
+        "12_generate_alerts",
+        "scripts/12_generate_alerts.py",
+        input_files=("outputs/alerts/ranked_players.csv",),
+        output_files=("outputs/alerts/top_players_alerts.csv", "outputs/alerts/medical_review_queue.csv"),
+    ),
+)
+
+PIPELINE_STAGES = DATA_STAGES + MODEL_STAGES
+
+
+def stage_dependencies(stages: tuple[Stage, ...]) -> dict[str, set[str]]:
+    """
+    {stage: stages it waits for}: the producers of its input tables and of
+    the files its input_files patterns match.
+    """
+    producers = {}
+    for stage in stages:
+        for output in (*stage.outputs, *stage.output_files):
+            producers[output] = stage.name
+
+    deps = {}
+    for stage in stages:
+        needed = {producers[t] for t in stage.inputs if t in producers}
+        needed |= {
+            name
+            for output, name in producers.items()
+            for pattern in stage.input_files
+            if fnmatch.fnmatch(output, pattern)
+        }
+        deps[stage.name] = needed - {stage.name}
+    return deps
@@ -0,0 +1,40 @@
+import duckdb
+import pytest
+
+
+# 30 jugadores x 40 partidos cada 4-7 días, dos temporadas; valores deterministas (hash)
+SOURCE_SQL = """
+CREATE TABLE player_match_features_true_time AS
+SELECT
+    p AS player_id,
+    11 AS competition_id,
+    CASE WHEN m < 20 THEN 90 ELSE 91 END AS season_id,
+    m * 10 + p % 3 AS match_id,
+    CAST(DATE '2022-08-01' + INTERVAL (m * 7 + hash(p, m) % 4) DAY AS DATE) AS match_date,
+    'T' || p % 3 AS team,
+    CAST(hash(p, m, 1) % 91 AS INTEGER) AS minutes,
+    (hash(p, m, 2) % 100) / 100.0 AS xg,
+    CAST(hash(p, m, 3) % 5 AS INTEGER) AS shots,
+    (hash(p, m, 4) % 300) / 10.0 AS progressive_x,
+    (hash(p, m, 3) % 5) * 1.0 AS shots_per90,
+    (hash(p, m, 2) % 100) / 100.0 AS xg_per90,
+    (hash(p, m, 5) % 60) * 1.0 AS passes_per90,
+    (hash(p, m, 6) % 30) * 1.0 AS carries_per90,
+    (hash(p, m, 4) % 300) / 10.0 AS progressive_x_per90
+FROM range(30) AS players(p), range(40) AS matches(m)
+"""
+
+
+@pytest.fixture
+def match_features_db(tmp_path, monkeypatch):
+    """
+    Path of a DuckDB file holding a synthetic player_match_features_true_time
+    (stage 04 output); the working directory is tmp_path, so connect() finds
+    no config and leaves DuckDB's defaults.
+    """
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "features.duckdb")
+    con = duckdb.connect(db_path)
+    con.execute(SOURCE_SQL)
+    con.close()
+    return db_path
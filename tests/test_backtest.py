@@ -0,0 +1,58 @@
+import numpy as np
+
+from football_risk_analytics.modeling.backtest import precision_at_k, walk_forward_folds, week_starts
+
+
+def _dates(seed: int = 0, rows: int = 2000):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 40 * 7, rows)
+    # semanas 10-11 sin partidos: los bloques cuentan solo semanas con partidos
+    days = days[(days < 70) | (days >= 84)]
+    match_dates = np.datetime64("2023-01-02") + days.astype("timedelta64[D]")
+    label_dates = match_dates + rng.integers(1, 21, len(match_dates)).astype("timedelta64[D]")
+    label_dates[rng.random(len(match_dates)) < 0.05] = np.datetime64("NaT")
+    return match_dates, label_dates
+
+
+def test_walk_forward_folds_purge_train_labels_from_test_block():
+    match_dates, label_dates = _dates()
+    weeks = week_starts(match_dates)
+    uniq = np.unique(weeks)
+    unknown = np.isnat(label_dates)
+
+    folds = walk_forward_folds(match_dates, min_train_weeks=8, test_weeks=3, step_weeks=2, label_dates=label_dates)
+    assert len(folds) == (len(uniq) - 8 - 3) // 2 + 1
+
+    purged = 0
+    for i, fold in enumerate(folds):
+        start = 8 + i * 2
+        test_start = uniq[start]
+        # los bloques de test avanzan step_weeks semanas con partidos por fold
+        assert weeks[fold.test_rows].min() == test_start
+        assert np.array_equal(fold.test_rows, np.flatnonzero((weeks >= test_start) & (weeks <= uniq[start + 2])))
+
+        train = fold.train_rows
+        assert np.all(weeks[train] < test_start)
+        assert not unknown[train].any()
+        assert np.all(label_dates[train] < test_start)
+        # todo lo anterior al bloque con etiqueta conocida antes de él sigue en train
+        kept = np.flatnonzero((weeks < test_start) & ~unknown & (label_dates < test_start))
+        assert np.array_equal(train, kept)
+        purged += int(((weeks < test_start) & ~(label_dates < test_start)).sum())
+    assert purged > 0
+
+    # sin label_dates se entrena con todas las semanas anteriores
+    unpurged = walk_forward_folds(match_dates, min_train_weeks=8, test_weeks=3, step_weeks=2)
+    assert all(np.array_equal(f.train_rows, np.flatnonzero(weeks < weeks[f.test_rows].min())) for f in unpurged)
+
+
+def test_precision_at_k_per_group_with_ties():
+    groups = np.array([7, 3, 7, 3, 7, 3, 7])
+    scores = np.array([0.9, 0.5, 0.9, 0.5, 0.1, 0.2, 0.9])
+    y_true = np.array([0, 1, 1, 0, 1, 1, 1])
+    # grupo 3: empate a 0.5 -> filas 1 y 3 por posición; grupo 7: empate a 0.9 -> filas 0 y 2
+    assert precision_at_k(y_true, scores, groups, k=2) == np.mean([0, 1, 1, 0])
+    # k mayor que el grupo: todas sus filas
+    assert precision_at_k(y_true, scores, groups, k=10) == y_true.mean()
+    assert precision_at_k(y_true, scores, np.zeros(7, dtype=int), k=1) == 0.0
+    assert np.isnan(precision_at_k(np.array([]), np.array([]), np.array([]), k=5))
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import duckdb
+
+from football_risk_analytics.features.acwr import build_player_acwr_true
+from football_risk_analytics.features.dataset_final import build_player_dataset_final
+from football_risk_analytics.features.form_features import build_player_form_features
+from football_risk_analytics.features.load_features import build_player_load_features_true
+
+
+CONFIG_PATH = str(Path(__file__).resolve().parents[1] / "config" / "base.yaml")
+
+MERGED = ("player_load_features_true", "player_acwr_true", "player_dataset_final")
+
+# Correcciones, fechas movidas, partidos borrados, jornadas nuevas, un jugador nuevo y un partido antiguo
+MUTATIONS = (
+    "UPDATE player_match_features_true_time SET minutes = minutes + 17 WHERE hash(player_id, match_id) % 7 = 0",
+    "UPDATE player_match_features_true_time SET match_date = match_date - 2 WHERE hash(player_id, match_id, 9) % 11 = 0",
+    "DELETE FROM player_match_features_true_time WHERE hash(player_id, match_id, 8) % 13 = 0",
+    """
+    INSERT INTO player_match_features_true_time
+    SELECT * REPLACE (
+        match_id + 400 AS match_id,
+        CAST(match_date + INTERVAL 280 DAY AS DATE) AS match_date,
+        (minutes + 5) % 91 AS minutes
+    )
+    FROM player_match_features_true_time
+    WHERE match_date >= DATE '2023-03-01' AND player_id % 2 = 0
+    """,
+    """
+    INSERT INTO player_match_features_true_time
+    SELECT * REPLACE (99 AS player_id)
+    FROM player_match_features_true_time
+    WHERE player_id = 1
+    """,
+    """
+    INSERT INTO player_match_features_true_time
+    SELECT * REPLACE (1 AS match_id, DATE '2022-07-20' AS match_date, 90 AS minutes)
+    FROM player_match_features_true_time
+    WHERE player_id = 2
+    LIMIT 1
+    """,
+)
+
+
+def _build(db_path: str, incremental: bool) -> None:
+    build_player_form_features(db_path, config_path=CONFIG_PATH)
+    build_player_load_features_true(db_path, incremental=incremental, config_path=CONFIG_PATH)
+    build_player_acwr_true(db_path, incremental=incremental)
+    build_player_dataset_final(db_path, incremental=incremental)
+
+
+def test_incremental_merge_matches_full_rebuild(tmp_path, match_features_db, capsys):
+    merged, rebuilt = match_features_db, str(tmp_path / "rebuilt.duckdb")
+    _build(merged, incremental=False)
+
+    con = duckdb.connect(merged)
+    for sql in MUTATIONS:
+        con.execute(sql)
+    con.execute(f"ATTACH '{rebuilt}' AS rebuilt")
+    con.execute("CREATE TABLE rebuilt.player_match_features_true_time AS SELECT * FROM player_match_features_true_time")
+    con.close()
+
+    capsys.readouterr()
+    _build(merged, incremental=True)
+    # las tres tablas se actualizaron con merge, no reconstruidas
+    assert capsys.readouterr().out.count("Incremental:") == len(MERGED)
+    _build(rebuilt, incremental=False)
+
+    con = duckdb.connect(merged)
+    con.execute(f"ATTACH '{rebuilt}' AS rebuilt (READ_ONLY)")
+    for table in MERGED:
+        counts = con.execute(f"SELECT (SELECT COUNT(*) FROM {table}), (SELECT COUNT(*) FROM rebuilt.{table})").fetchone()
+        assert counts[0] == counts[1], table
+        for a, b in ((table, f"rebuilt.{table}"), (f"rebuilt.{table}", table)):
+            diff = con.execute(f"SELECT COUNT(*) FROM (SELECT * FROM {a} EXCEPT ALL SELECT * FROM {b})").fetchone()[0]
+            assert diff == 0, (table, a)
+    con.close()
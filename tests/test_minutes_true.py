@@ -0,0 +1,91 @@
+import json
+import random
+
+import duckdb
+import polars as pl
+
+from football_risk_analytics.ingestion.minutes_true import export_player_match_minutes_true
+
+
+COLUMNS = (
+    "competition_id, season_id, match_id, team, player_id, player, "
+    "start_minute, end_minute, minutes_played, match_max_minute"
+)
+
+
+def _random_events(rng: random.Random, match_id: int) -> list[dict]:
+    teams = [{"id": t, "name": f"Team {t}"} for t in (1, 2)]
+    events, on_pitch = [], {}
+    for team in teams:
+        lineup = [team["id"] * 100 + i for i in range(11)]
+        on_pitch[team["name"]] = list(lineup)
+        events.append({
+            "period": 1, "minute": 0, "second": 0, "type": {"name": "Starting XI"}, "team": team,
+            "tactics": {"lineup": [{"player": {"id": p, "name": f"P{p}"}} for p in lineup]},
+        })
+
+    for _ in range(rng.randint(20, 60)):
+        team = rng.choice(teams)
+        players = on_pitch[team["name"]]
+        minute, second = rng.randint(0, 140), rng.randint(0, 59)
+        kind = rng.random()
+        if kind < 0.15:
+            # sustitución: a veces sale alguien fuera del once o no hay quien entra
+            off = rng.choice(players) if rng.random() < 0.9 else team["id"] * 100 + rng.randint(50, 60)
+            on = team["id"] * 100 + rng.randint(11, 40)
+            event = {"type": {"name": "Substitution"}, "team": team, "player": {"id": off, "name": f"P{off}"}}
+            if rng.random() < 0.95:
+                event["substitution"] = {"replacement": {"id": on, "name": f"P{on}"}}
+            players.append(on)
+        elif kind < 0.3:
+            card = rng.choice(["Yellow Card", "Second Yellow", "Red Card"])
+            player = rng.choice(players)
+            if rng.random() < 0.5:
+                event = {"type": {"name": "Foul Committed"}, "foul_committed": {"card": {"name": card}}}
+            else:
+                event = {"type": {"name": "Bad Behaviour"}, "bad_behaviour": {"card": {"name": card}}}
+            event |= {"team": team, "player": {"id": player, "name": f"P{player}"}}
+        else:
+            player = rng.choice(players)
+            event = {"type": {"name": "Pass"}, "team": team, "player": {"id": player, "name": f"P{player}"}}
+        events.append({"period": 1 + (minute >= 45), "minute": minute, "second": second, **event})
+
+    events.append({"period": 2, "minute": rng.randint(90, 98), "second": 0, "type": {"name": "Half End"}, "team": teams[0]})
+    rng.shuffle(events)
+    return [{"index": i, **e} for i, e in enumerate(events, start=1)]
+
+
+def test_columnar_engine_matches_python_engine(tmp_path):
+    rng = random.Random(7)
+    data_root = tmp_path / "data"
+    (data_root / "events").mkdir(parents=True)
+    (data_root / "competitions.json").write_text(json.dumps([{"competition_id": 11, "season_id": 90}]))
+
+    matches = {"competition_id": [], "season_id": [], "match_id": [], "has_events": []}
+    for match_id in range(1, 41):
+        season_id = 90 + match_id % 2
+        (data_root / "events" / f"{match_id}.json").write_text(json.dumps(_random_events(rng, match_id)))
+        for key, value in zip(matches, (11, season_id, match_id, True)):
+            matches[key].append(value)
+    manifest_path = tmp_path / "match_manifest.parquet"
+    pl.DataFrame(matches).write_parquet(manifest_path)
+
+    exports = {
+        "columnar": {"engine": "columnar"},
+        "python": {"engine": "python"},
+        "streaming": {"engine": "python", "streaming": True},
+    }
+    rows = {}
+    for name, kwargs in exports.items():
+        out_root = tmp_path / name
+        rows[name] = export_player_match_minutes_true(
+            data_root=str(data_root), manifest_path=str(manifest_path), out_root=str(out_root), **kwargs
+        )
+    assert rows["columnar"] == rows["python"] == rows["streaming"] > 0
+
+    def scan(name):
+        return f"(SELECT {COLUMNS} FROM read_parquet('{(tmp_path / name).as_posix()}/*/*/*.parquet'))"
+
+    for name in ("columnar", "streaming"):
+        for a, b in ((scan(name), scan("python")), (scan("python"), scan(name))):
+            assert duckdb.sql(f"SELECT COUNT(*) FROM ({a} EXCEPT ALL {b})").fetchone()[0] == 0, name
@@ -0,0 +1,81 @@
+from pathlib import Path
+import math
+
+import duckdb
+import pytest
+
+from football_risk_analytics.features.acwr import build_player_acwr_true
+from football_risk_analytics.features.form_features import build_player_form_features
+from football_risk_analytics.features.load_features import build_player_load_features_true
+from football_risk_analytics.features.online_store import OnlineFeatureStore
+
+
+CONFIG_PATH = str(Path(__file__).resolve().parents[1] / "config" / "base.yaml")
+
+COLUMNS = (
+    "minutes_last_7d", "minutes_last_14d", "minutes_last_28d", "minutes_last_5_matches",
+    "xg_last_5", "trend_xg_3v3", "acwr",
+)
+
+
+def _sql_features(db_path: str) -> dict:
+    build_player_form_features(db_path, config_path=CONFIG_PATH)
+    build_player_load_features_true(db_path, config_path=CONFIG_PATH)
+    build_player_acwr_true(db_path)
+    con = duckdb.connect(db_path, read_only=True)
+    rows = con.execute("""
+    SELECT
+        l.player_id, l.match_id,
+        l.minutes_last_7d, l.minutes_last_14d, l.minutes_last_28d, l.minutes_last_5_matches,
+        f.xg_last_5, f.trend_xg_3v3, a.acwr
+    FROM player_load_features_true l
+    JOIN player_form_features f USING (player_id, match_id)
+    JOIN player_acwr_true a USING (player_id, match_id)
+    """).fetchall()
+    con.close()
+    return {(r[0], r[1]): dict(zip(COLUMNS, r[2:])) for r in rows}
+
+
+def _assert_same(online: list[dict], expected: dict) -> None:
+    for row in online:
+        sql = expected[(row["player_id"], row["match_id"])]
+        for column in COLUMNS:
+            a, b = row[column], sql[column]
+            assert (a is None) == (b is None), (row["player_id"], row["match_id"], column)
+            assert a is None or math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), (row, column)
+
+
+def test_online_store_matches_sql_features(match_features_db, tmp_path):
+    con = duckdb.connect(match_features_db, read_only=True)
+    rows = con.execute("""
+    SELECT player_id, season_id, match_id, match_date, minutes, xg
+    FROM player_match_features_true_time
+    ORDER BY match_date, match_id, player_id
+    """).fetchall()
+    con.close()
+    rows = [dict(zip(("player_id", "season_id", "match_id", "match_date", "minutes", "xg"), r)) for r in rows]
+    expected = _sql_features(match_features_db)
+
+    # de una pasada, cargando desde DuckDB
+    store = OnlineFeatureStore.from_duckdb(match_features_db)
+    assert len(store) == 30
+    _assert_same(OnlineFeatureStore().update_many(rows), expected)
+
+    # la mitad, snapshot, restore y el resto sobre el estado restaurado
+    half = len(rows) // 2
+    first = OnlineFeatureStore()
+    _assert_same(first.update_many(rows[:half]), expected)
+    snapshot = str(tmp_path / "online_store.parquet")
+    assert first.snapshot(snapshot) < half
+    restored = OnlineFeatureStore.restore(snapshot)
+    assert len(restored) == len(first)
+    _assert_same(restored.update_many(rows[half:]), expected)
+
+    # el mismo día solo se acepta un match_id mayor; uno anterior o repetido se rechaza
+    last = rows[-1]
+    restored.update(**{**last, "match_id": last["match_id"] + 1})
+    for match_id in (last["match_id"] + 1, last["match_id"]):
+        with pytest.raises(ValueError):
+            restored.update(**{**last, "match_id": match_id})
+    with pytest.raises(ValueError):
+        restored.update(**{**last, "match_id": last["match_id"] + 2, "match_date": rows[0]["match_date"]})
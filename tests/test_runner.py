@@ -0,0 +1,78 @@
+import json
+import textwrap
+
+from football_risk_analytics.pipeline.runner import run_pipeline
+from football_risk_analytics.pipeline.stages import Stage
+
+
+CONFIG = """
+duckdb:
+  profiles:
+    default: {}
+    heavy:
+      threads: 2
+      memory_limit: 1GB
+  stages:
+    a: heavy
+    b: heavy
+"""
+
+# a espera (con límite) a que el runner guarde la huella de b mientras a sigue corriendo
+STAGE_A = """
+import json, time
+from football_risk_analytics.db import connect, effective_settings
+
+con = connect({db!r}, stage="a")
+start, before = time.time(), effective_settings(con)
+for _ in range(300):
+    try:
+        if con.execute("SELECT count(*) FROM stage_cache WHERE stage = 'b'").fetchone()[0]:
+            break
+    except Exception:
+        pass
+    time.sleep(0.1)
+else:
+    raise TimeoutError("b never finished while a was running")
+after = effective_settings(con)
+con.close()
+with open({log!r}, "a") as f:
+    f.write(json.dumps({{"stage": "a", "start": start, "end": time.time(), "before": before, "after": after}}) + "\\n")
+"""
+
+STAGE_OTHER = """
+import json, time
+from football_risk_analytics.db import connect, effective_settings
+
+con = connect({db!r}, stage={key!r})
+start, settings = time.time(), effective_settings(con)
+con.close()
+with open({log!r}, "a") as f:
+    f.write(json.dumps({{"stage": {key!r}, "start": start, "end": time.time(), "before": settings}}) + "\\n")
+"""
+
+
+def test_runner_keeps_profiles_of_running_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("FRA_DUCKDB_PROFILE", raising=False)
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "base.yaml").write_text(CONFIG)
+    db, log = str(tmp_path / "test.duckdb"), str(tmp_path / "log.jsonl")
+
+    stages = []
+    for key in ("a", "b", "c"):
+        template = STAGE_A if key == "a" else STAGE_OTHER
+        script = tmp_path / f"stage_{key}.py"
+        script.write_text(textwrap.dedent(template.format(db=db, log=log, key=key)))
+        stages.append(Stage(key, str(script), db_stages=(key,)))
+
+    run_pipeline(db, stages=tuple(stages), use_cache=False)
+
+    runs = {r["stage"]: r for r in map(json.loads, (tmp_path / "log.jsonl").read_text().splitlines())}
+    a, b, c = runs["a"], runs["b"], runs["c"]
+    # b corrió y se registró durante a sin cambiar sus ajustes
+    assert a["start"] <= b["start"] and b["end"] <= a["end"]
+    assert a["before"]["threads"] == "2"
+    assert a["after"] == a["before"] == b["before"]
+    # c tiene otro perfil: espera a que terminen a y b
+    assert c["start"] >= a["end"]
+    assert c["before"]["threads"] != "2"
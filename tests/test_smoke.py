@@ -0,0 +1,46 @@
+import json
+
+import duckdb
+import polars as pl
+
+from football_risk_analytics.ingestion.compaction import compact_bronze
+from football_risk_analytics.ingestion.minutes_true import export_player_match_minutes_true
+
+
+def _events(match_id):
+    lineup = [{"player": {"id": match_id * 10 + i, "name": f"P{i}"}} for i in range(3)]
+    return [
+        {"index": 1, "period": 1, "minute": 0, "second": 0, "type": {"name": "Starting XI"},
+         "team": {"id": 1, "name": "A"}, "tactics": {"lineup": lineup}},
+        {"index": 2, "period": 2, "minute": 90, "second": 0, "type": {"name": "Half End"},
+         "team": {"id": 1, "name": "A"}},
+    ]
+
+
+def test_reexport_after_compaction_does_not_duplicate_rows(tmp_path):
+    data_root = tmp_path / "data"
+    (data_root / "events").mkdir(parents=True)
+    (data_root / "competitions.json").write_text(json.dumps([{"competition_id": 11, "season_id": 90}]))
+    for match_id in (1, 2):
+        (data_root / "events" / f"{match_id}.json").write_text(json.dumps(_events(match_id)))
+
+    manifest_path = tmp_path / "match_manifest.parquet"
+    pl.DataFrame({
+        "competition_id": [11, 11],
+        "season_id": [90, 90],
+        "match_id": [1, 2],
+        "has_events": [True, True],
+    }).write_parquet(manifest_path)
+
+    bronze_root = tmp_path / "bronze"
+    out_root = bronze_root / "player_match_minutes_true"
+    export = dict(data_root=str(data_root), manifest_path=str(manifest_path), out_root=str(out_root))
+
+    rows = export_player_match_minutes_true(**export)
+    compact_bronze(str(bronze_root), tables=("player_match_minutes_true",))
+    # exportación completa otra vez encima de la partición compactada
+    assert export_player_match_minutes_true(**export) == rows
+    assert export_player_match_minutes_true(**export, streaming=True) == rows
+
+    count = duckdb.sql(f"SELECT COUNT(*) FROM read_parquet('{out_root.as_posix()}/*/*/*.parquet')").fetchone()[0]
+    assert count == rows == 6